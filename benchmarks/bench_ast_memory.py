@@ -0,0 +1,47 @@
+import argparse
+import tracemalloc
+
+from benchmarks.sources import generate_expressions_source, timed
+from code_generator.interpeter import Interpreter
+from lexer.lexer import Lexer
+from my_parser.ast_arena import ASTArena
+from my_parser.my_parser import Parser
+
+arg_parser = argparse.ArgumentParser(description="Measures memory used by node objects tree and by arena tree")
+arg_parser.add_argument("--functions", dest="functions", default=200, type=int, help="count of generated functions")
+arg_parser.add_argument("--expressions", dest="expressions", default=50, type=int,
+                        help="count of assignments in each function")
+arg_parser.add_argument("--terms", dest="terms", default=16, type=int, help="count of operands in each expression")
+
+
+def parse(text, arena):
+    return Parser(Lexer(text).iter_tokens(), arena=arena).parse()
+
+
+def measure(text, make_arena):
+    # tracemalloc slows allocations down, so memory and time are measured in separate runs
+    tracemalloc.start()
+    tree = parse(text, make_arena())
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tree
+
+    parse_time = timed(parse, text, make_arena())
+    tree = parse(text, make_arena())
+    visit_time = timed(Interpreter(tree)._visit, tree)
+    return size, parse_time, visit_time
+
+
+def main():
+    args = arg_parser.parse_args()
+    text = generate_expressions_source(args.functions, args.expressions, args.terms)
+    for name, make_arena in (("node objects", lambda: None), ("arena", ASTArena)):
+        size, parse_time, visit_time = measure(text, make_arena)
+        print(f"{name:>12}: {size / 2 ** 20:7.1f} MiB, parsed in {parse_time:.3f}s, code emitted in {visit_time:.3f}s")
+    arena = ASTArena()
+    parse(text, arena)
+    print(f"{len(arena)} nodes, {arena.memory_size() / len(arena):.1f} bytes/node in arena arrays")
+
+
+if __name__ == "__main__":
+    main()
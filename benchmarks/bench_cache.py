@@ -0,0 +1,33 @@
+import argparse
+import os
+import time
+from tempfile import TemporaryDirectory
+
+from benchmarks.sources import generate_source
+from cache.compilation_cache import CompilationCache
+from compiler import compiler
+
+arg_parser = argparse.ArgumentParser(description="Measures compilation time with cold and warm compilation cache")
+arg_parser.add_argument("--functions", dest="functions", default=200, type=int,
+                        help="count of generated function pairs in benchmark source")
+arg_parser.add_argument("--repeat", dest="repeat", default=3, type=int, help="count of warm builds")
+
+
+def main():
+    args = arg_parser.parse_args()
+    text = generate_source(args.functions)
+    with TemporaryDirectory() as temp_dir:
+        cache = CompilationCache(os.path.join(temp_dir, "cache"))
+        output = os.path.join(temp_dir, "output")
+        times = []
+        for _ in range(args.repeat + 1):
+            start = time.perf_counter()
+            compiler(text, arch=64, output_cpp=output + ".cpp", output_exec=output, cache=cache)
+            times.append(time.perf_counter() - start)
+        print(f"cold build: {times[0]:.3f}s")
+        print(f"warm build: {min(times[1:]):.3f}s")
+        print(cache.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import argparse
+
+from benchmarks.sources import generate_source, timed
+from cache.incremental import IncrementalCompiler
+from code_generator.interpeter import Interpreter
+from lexer.lexer import Lexer
+from my_parser.my_parser import Parser
+
+arg_parser = argparse.ArgumentParser(description="Measures code generation after editing one function")
+arg_parser.add_argument("--functions", dest="functions", nargs="+", default=[200, 2000], type=int,
+                        help="count of generated function pairs, one source per value")
+
+
+def full_build(text):
+    ast = Parser(Lexer(text).iter_tokens()).parse()
+    Interpreter(ast)._visit(ast)
+
+
+def main():
+    args = arg_parser.parse_args()
+    for functions_count in args.functions:
+        text = generate_source(functions_count)
+        edited = text.replace("def main_a(start, end):\n    summ = 0", "def main_a(start, end):\n    summ = 1")
+        incremental = IncrementalCompiler()
+        full_time = timed(full_build, edited)
+        cold_time = timed(incremental.generate, text)
+        edit_time = timed(incremental.generate, edited)
+        print(f"{functions_count:>5} function pairs: full {full_time:.3f}s, incremental cold {cold_time:.3f}s, "
+              f"after edit {edit_time:.4f}s ({incremental.stats.compiled} of {sum(incremental.stats)} compiled)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.sources import generate_source
+from lexer.lexer import Lexer
+from lexer.source import load_source
+
+arg_parser = argparse.ArgumentParser(description="Measures lexer throughput of every lexer engine")
+arg_parser.add_argument("--functions", dest="functions", default=2000, type=int,
+                        help="count of generated function pairs in benchmark source")
+arg_parser.add_argument("--repeat", dest="repeat", default=3, type=int, help="best of N runs")
+
+
+def bench_engine(text, engine: str, repeat: int):
+    best = None
+    tokens_count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens_count = len(Lexer(text, engine=engine).get_tokens())
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return tokens_count, best
+
+
+def main():
+    args = arg_parser.parse_args()
+    text = generate_source(args.functions)
+    print(f"source: {len(text)} chars, {text.count(chr(10))} rows")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "bench.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        sources = {"text": load_source(path, use_mmap=False), "mmap": load_source(path)}
+
+        for engine in Lexer.ENGINES:
+            for source_name, source in sources.items():
+                if engine == "char" and source_name == "mmap":
+                    # char engine decodes the mapping first, it is the same as text
+                    continue
+                tokens_count, elapsed = bench_engine(source, engine, args.repeat)
+                print(f"{engine:>6} ({source_name}): {tokens_count} tokens in {elapsed:.3f}s, "
+                      f"{tokens_count / elapsed:,.0f} tokens/s")
+        sources["mmap"].close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+
+from benchmarks.sources import generate_expressions_source, timed
+from lexer.lexer import Lexer
+from my_parser.my_parser import Parser
+from my_parser.parallel_parser import ParallelParser
+
+arg_parser = argparse.ArgumentParser(description="Measures parser throughput on expression heavy sources")
+arg_parser.add_argument("--functions", dest="functions", default=200, type=int, help="count of generated functions")
+arg_parser.add_argument("--expressions", dest="expressions", default=50, type=int,
+                        help="count of assignments in each function")
+arg_parser.add_argument("--terms", dest="terms", nargs="+", default=[4, 16, 64], type=int,
+                        help="count of operands in each expression, one corpus per value")
+arg_parser.add_argument("--repeat", dest="repeat", default=3, type=int, help="best of N runs")
+arg_parser.add_argument("--jobs", dest="jobs", default=1, type=int,
+                        help="with more than one job the whole front end (lexer and parser) runs in a process pool "
+                             "and is compared with the serial one")
+
+
+def best_time(function, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        elapsed = timed(function)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    args = arg_parser.parse_args()
+    for terms_count in args.terms:
+        text = generate_expressions_source(args.functions, args.expressions, terms_count)
+        tokens = Lexer(text).get_tokens()
+        best = best_time(lambda: Parser(tokens).parse(), args.repeat)
+        print(f"{terms_count:>4} terms: {len(tokens)} tokens parsed in {best:.3f}s, {len(tokens) / best:,.0f} tokens/s")
+        if args.jobs > 1:
+            serial = best_time(lambda: Parser(Lexer(text).iter_tokens()).parse(), args.repeat)
+            parallel = best_time(lambda: ParallelParser(text, workers=args.jobs).parse(), args.repeat)
+            print(f"      {len(text) / 2 ** 20:.1f} MiB lexed and parsed: serial {serial:.3f}s, "
+                  f"{args.jobs} jobs {parallel:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+import os
+import subprocess
+import time
+from tempfile import TemporaryDirectory
+
+from compiler import compiler
+from ir.pipeline import OPT_LEVELS
+from lexer.source import load_source
+
+arg_parser = argparse.ArgumentParser(description="Measures run time of compiled prime sum program for each "
+                                                 "optimisation level")
+arg_parser.add_argument("--src", dest="src", default="tests/src/test_21.py",
+                        help="program with main(start, end) function")
+arg_parser.add_argument("--end", dest="end", default=30000, type=int, help="primes up to end are summed")
+arg_parser.add_argument("--repeat", dest="repeat", default=5, type=int, help="best of N runs")
+
+
+def run_time(exec_path: str, repeat: int) -> (float, str):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run([exec_path], stdout=subprocess.PIPE).stdout.decode("utf-8").strip()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output
+
+
+def main():
+    args = arg_parser.parse_args()
+    text = load_source(args.src, use_mmap=False).rstrip().rsplit("\n", 1)[0] + f"\nmain(2, {args.end})\n"
+    builds = [(codegen, level) for codegen in ("direct", "ir") for level in OPT_LEVELS]
+    with TemporaryDirectory() as temp_dir:
+        for codegen, opt_level in builds:
+            output = os.path.join(temp_dir, f"{codegen}_{opt_level}")
+            compiler(text, arch=64, output_cpp=output + ".cpp", output_exec=output, codegen=codegen,
+                     opt_level=opt_level)
+            best, result = run_time(output, args.repeat)
+            print(f"{codegen:>6} -O{opt_level}: {best:.3f}s (result {result})")
+
+
+if __name__ == "__main__":
+    main()
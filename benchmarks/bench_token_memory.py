@@ -0,0 +1,35 @@
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.sources import generate_source
+from lexer.lexer import Lexer
+
+arg_parser = argparse.ArgumentParser(description="Measures memory used by token list and by token table")
+arg_parser.add_argument("--functions", dest="functions", default=2000, type=int,
+                        help="count of generated function pairs in benchmark source")
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    tokens = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tokens, size, elapsed
+
+
+def main():
+    args = arg_parser.parse_args()
+    text = generate_source(args.functions)
+    tokens_list, list_size, list_time = measure(lambda: Lexer(text).get_tokens())
+    table, table_size, table_time = measure(lambda: Lexer(text).get_token_table())
+    count = len(tokens_list)
+    print(f"{count} tokens")
+    print(f"token list:  {list_size / count:6.1f} bytes/token, built in {list_time:.3f}s")
+    print(f"token table: {table_size / count:6.1f} bytes/token, built in {table_time:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import gc
+import time
+
+FUNC_TEMPLATE = """def is_prime_{i}(n):
+    curr = 2
+    # checks mod of all numbers from 2 end n-1, if mod == 0 then number is not prime
+    while curr < n:
+        if n % curr == 0:
+            return 0
+        else:
+            curr += 1
+    return 1
+
+
+def main_{i}(start, end):
+    summ = 0
+    curr = start
+    while curr <= end:
+        if is_prime_{i}(curr):
+            summ += (curr * 0x2 - 0b1) / 2 + 1 - 1
+        else:
+            curr += 1
+        curr += 1
+    return summ
+
+
+"""
+
+
+def generate_source(functions_count: int) -> str:
+    """
+    Returns program text made of functions_count copies of is_prime/main pairs and a top level call
+    """
+    # func names can't contain digits, so index is spelled with letters
+    names = ["".join(chr(ord("a") + int(d)) for d in str(i)) for i in range(functions_count)]
+    text = "".join(FUNC_TEMPLATE.format(i=name) for name in names)
+    return text + f"main_{names[-1]}(2, 10)\n"
+
+
+def generate_expression(rng, terms_count: int, variables) -> str:
+    """
+    Returns random arithmetic/comparison expression with terms_count operands
+    """
+    operations = ["+", "-", "*", "/", "%", "+", "-", "*", "<", "==", ">=", "or"]
+    parts = []
+    for i in range(terms_count):
+        operand = rng.choice([rng.choice(variables), str(rng.randint(1, 99)), "0x1f", "0b101"])
+        if rng.random() < 0.2:
+            operand = f"-{operand}"
+        if rng.random() < 0.2:
+            operand = f"({operand} {rng.choice(operations)} {rng.choice(variables)})"
+        parts.append(operand)
+        if i != terms_count - 1:
+            parts.append(rng.choice(operations))
+    return " ".join(parts)
+
+
+def generate_expressions_source(functions_count: int, expressions_count: int, terms_count: int,
+                                seed: int = 0) -> str:
+    """
+    Returns program made of functions with long arithmetic expressions assigned to locals
+    """
+    import random
+
+    rng = random.Random(seed)
+    names = ["".join(chr(ord("a") + int(d)) for d in str(i)) for i in range(functions_count)]
+    functions = []
+    for name in names:
+        variables = ["a", "b"]
+        lines = [f"def func_{name}(a, b):"]
+        for i in range(expressions_count):
+            var = f"v_{''.join(chr(ord('a') + int(d)) for d in str(i))}"
+            lines.append(f"    {var} = {generate_expression(rng, terms_count, variables)}")
+            variables.append(var)
+        lines.append(f"    return {variables[-1]}")
+        functions.append("\n".join(lines) + "\n\n\n")
+    return "".join(functions) + f"func_{names[-1]}(1, 2)\n"
+
+
+def timed(function, *args) -> float:
+    """
+    Returns time of one call of function, like timeit garbage collection is disabled while timing,
+    it adds too much noise
+    """
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        function(*args)
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
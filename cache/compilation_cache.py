@@ -0,0 +1,204 @@
+import fcntl
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import subprocess
+from contextlib import contextmanager
+from functools import lru_cache
+from glob import glob
+from typing import Dict, Iterator, Optional, Tuple
+
+from code_generator.code_generator import CodeGenerator
+from common.types import CacheStats
+from lexer.source import SourceBuffer
+from my_parser.AST import AST
+from my_parser.ast_arena import ASTArena
+
+# directory with compiler sources, which are a part of compiler version
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMPILER_SOURCES = ("compiler.py", "cache/*.py", "code_generator/*.py", "common/*.py", "exceptions/*.py",
+                    "ir/*.py", "lexer/*.py", "my_parser/*.py")
+
+
+@lru_cache(maxsize=None)
+def compiler_version() -> str:
+    """
+    Returns hash of g++ version and of sources of this compiler, computed once per process
+    """
+    digest = hashlib.sha256()
+    try:
+        gcc_version = subprocess.run(["g++", "--version"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout
+    except OSError:
+        gcc_version = b"no g++"
+    digest.update(gcc_version)
+    for pattern in COMPILER_SOURCES:
+        for path in sorted(glob(os.path.join(ROOT_DIR, pattern))):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+class CompilationCache:
+    """
+    On disk cache of compilation results, content addressed by hash of source text, target arch,
+    cpp template and compiler version.
+    Each entry is a directory with serialised AST (pickled ASTArena), asm, cpp and executable.
+    When total size of entries exceeds max_size, the least recently used entries are evicted.
+    Index of entries with their sizes, last use and hit/miss counters is kept in index.json.
+    Cache may be shared by concurrent builds, index is read and updated under lock of index.lock
+    """
+
+    INDEX_FILE = "index.json"
+    LOCK_FILE = "index.lock"
+    AST_FILE = "ast.pickle"
+    ASM_FILE = "output.asm"
+    CPP_FILE = "output.cpp"
+    EXEC_FILE = "output"
+
+    def __init__(self, path: str, max_size: int = 256 * 2 ** 20):
+        self.path = path
+        self.max_size = max_size
+        os.makedirs(path, exist_ok=True)
+
+    def key(self, text: SourceBuffer, arch: int, options: Tuple = ()) -> str:
+        """
+        Returns key of compilation of text for arch, options are any other settings which change output
+        """
+        digest = hashlib.sha256()
+        digest.update(text.encode("utf-8") if isinstance(text, str) else memoryview(text))
+        with open(CodeGenerator.TEMPLATE_PATH, "rb") as f:
+            template = f.read()
+        digest.update(hashlib.sha256(template).digest())
+        digest.update(repr((arch, tuple(options), compiler_version())).encode("utf-8"))
+        return digest.hexdigest()
+
+    def restore(self, key: str, output_asm: Optional[str] = None, output_cpp: Optional[str] = None,
+                output_exec: Optional[str] = None) -> bool:
+        """
+        Copies cached asm, cpp and executable to the given paths, returns False on cache miss
+        """
+        # entry is copied under the lock, so it is not evicted by another process meanwhile
+        with self._locked():
+            index = self._load_index()
+            entry = index["entries"].get(key)
+            entry_path = self._entry_path(key)
+            if entry is None or not os.path.isdir(entry_path):
+                index["entries"].pop(key, None)
+                index["misses"] += 1
+                self._save_index(index)
+                return False
+
+            for file_name, output_path in ((self.ASM_FILE, output_asm), (self.CPP_FILE, output_cpp),
+                                           (self.EXEC_FILE, output_exec)):
+                if output_path is not None:
+                    # copy keeps permission bits, so restored executable can be run
+                    shutil.copy(os.path.join(entry_path, file_name), output_path)
+
+            index["hits"] += 1
+            self._touch(index, key)
+            self._save_index(index)
+            return True
+
+    def store(self, key: str, ast: Optional[AST], asm: str, cpp: str, exec_path: str) -> None:
+        """
+        Adds results of compilation to cache and evicts least recently used entries above max_size.
+        Tree is not stored if ast is None (incremental builds don't build tree of the whole program).
+        If another build has stored the same key meanwhile, its entry is kept
+        """
+        # entry is written to temporary directory and renamed, so other processes never see a partial entry
+        temp_path = os.path.join(self.path, f"tmp-{key}-{os.getpid()}")
+        os.makedirs(temp_path, exist_ok=True)
+        if ast is not None:
+            with open(os.path.join(temp_path, self.AST_FILE), "wb") as f:
+                pickle.dump(ASTArena.of_tree(ast), f, pickle.HIGHEST_PROTOCOL)
+        with open(os.path.join(temp_path, self.ASM_FILE), "w") as f:
+            f.write(asm)
+        with open(os.path.join(temp_path, self.CPP_FILE), "w") as f:
+            f.write(cpp)
+        shutil.copy(exec_path, os.path.join(temp_path, self.EXEC_FILE))
+
+        entry_path = self._entry_path(key)
+        with self._locked():
+            if os.path.isdir(entry_path):
+                # entries of the same key have the same content
+                shutil.rmtree(temp_path)
+            else:
+                os.replace(temp_path, entry_path)
+            index = self._load_index()
+            index["entries"][key] = {"size": self._dir_size(entry_path)}
+            self._touch(index, key)
+            self._evict(index)
+            self._save_index(index)
+
+    def load_ast(self, key: str) -> Optional[AST]:
+        """
+        Returns cached tree as arena view, or None if there is no such entry
+        """
+        try:
+            with open(os.path.join(self._entry_path(key), self.AST_FILE), "rb") as f:
+                arena, root = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        return arena.view(root)
+
+    def stats(self) -> CacheStats:
+        index = self._load_index()
+        entries = index["entries"]
+        return CacheStats(index["hits"], index["misses"], len(entries),
+                          sum(entry["size"] for entry in entries.values()))
+
+    def clear(self) -> None:
+        shutil.rmtree(self.path)
+        os.makedirs(self.path)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """
+        Holds exclusive lock of the index, it is released when the process exits as well
+        """
+        with open(os.path.join(self.path, self.LOCK_FILE), "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.path, key)
+
+    def _load_index(self) -> Dict:
+        try:
+            with open(os.path.join(self.path, self.INDEX_FILE), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"clock": 0, "hits": 0, "misses": 0, "entries": {}}
+
+    def _save_index(self, index: Dict) -> None:
+        index_path = os.path.join(self.path, self.INDEX_FILE)
+        temp_path = f"{index_path}.{os.getpid()}"
+        with open(temp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(temp_path, index_path)
+
+    @staticmethod
+    def _touch(index: Dict, key: str) -> None:
+        """
+        Marks entry as the most recently used one, logical clock doesn't depend on file system timestamps
+        """
+        index["clock"] += 1
+        index["entries"][key]["last_used"] = index["clock"]
+
+    def _evict(self, index: Dict) -> None:
+        entries = index["entries"]
+        total_size = sum(entry["size"] for entry in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]["last_used"]):
+            if total_size <= self.max_size:
+                break
+            total_size -= entries.pop(key)["size"]
+            shutil.rmtree(self._entry_path(key), ignore_errors=True)
+
+    @staticmethod
+    def _dir_size(path: str) -> int:
+        return sum(entry.stat().st_size for entry in os.scandir(path))
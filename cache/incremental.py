@@ -0,0 +1,102 @@
+import hashlib
+import os
+import pickle
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from cache.compilation_cache import compiler_version
+from code_generator.code_generator import CodeGenerator
+from common.types import IncrementalStats
+from ir.pipeline import Pipeline
+from ir.unrolling import UNROLL_FACTOR
+from lexer.chunks import top_level_chunks
+from lexer.lexer import Lexer
+from lexer.source import SourceBuffer, source_to_text
+from my_parser.my_parser import Parser
+
+
+class IncrementalCompiler:
+    """
+    Function level incremental code generation.
+    Program is split into top level chunks (a function definition with its body, or a top level call),
+    each chunk is fingerprinted by its text and only chunks which are not known yet are lexed, parsed and
+    emitted. Code of a chunk doesn't depend on other chunks, as labels of each function are in its own
+    namespace, so instruction blocks of unchanged chunks are reused as they are.
+    Code depends on codegen, optimisation level, unroll factor, arch and the compiler itself, they are part
+    of fingerprint.
+    IR dump and changes made by passes of each chunk are kept with its block, ir_text and pass_stats
+    are the ones of the whole program after generate.
+    Blocks of the last build are kept, with state_path they are saved between runs
+    """
+
+    def __init__(self, state_path: Optional[str] = None, lexer_engine: str = "table", codegen: str = "ir",
+                 opt_level: int = 0, unroll_factor: int = UNROLL_FACTOR):
+        self.state_path = state_path
+        self.lexer_engine = lexer_engine
+        self.codegen = codegen
+        self.opt_level = opt_level
+        self.unroll_factor = unroll_factor
+        # fingerprint: (instruction block, IR dump, changes made by passes)
+        self.blocks: Dict[str, Tuple[List[str], str, Dict[str, int]]] = self._load_state()
+        self.stats = IncrementalStats(0, 0)
+        self.ir_text = ""
+        self.pass_stats: Dict[str, int] = {}
+
+    def generate(self, text: SourceBuffer, arch: int = 32) -> CodeGenerator:
+        """
+        Returns code generator with code of the whole program, reusing blocks of unchanged chunks
+        """
+        text = source_to_text(text)
+        blocks: Dict[str, Tuple[List[str], str, Dict[str, int]]] = {}
+        code_generator = CodeGenerator()
+        if Pipeline(arch, self.codegen, opt_level=self.opt_level, unroll_factor=self.unroll_factor).native:
+            code_generator.arch = arch
+        settings = f"{compiler_version()}:{self.codegen}:{self.opt_level}:{self.unroll_factor}:{arch}\n"
+        ir_texts = []
+        pass_stats = Counter()
+        reused = compiled = 0
+
+        for row, start, end in top_level_chunks(text):
+            chunk = text[start:end].rstrip()
+            fingerprint = hashlib.sha256((settings + chunk).encode("utf-8")).hexdigest()
+            block = blocks.get(fingerprint) or self.blocks.get(fingerprint)
+            if block is None:
+                block = self._compile_chunk(row, chunk, arch)
+                compiled += 1
+            else:
+                reused += 1
+            blocks[fingerprint] = block
+            code_generator.generated_code.extend(block[0])
+            ir_texts.append(block[1])
+            pass_stats.update(block[2])
+
+        self.blocks = blocks
+        self.stats = IncrementalStats(reused, compiled)
+        self.ir_text = "\n".join(ir_texts)
+        self.pass_stats = dict(pass_stats)
+        self._save_state()
+        return code_generator
+
+    def _compile_chunk(self, row: int, chunk: str, arch: int) -> Tuple[List[str], str, Dict[str, int]]:
+        tokens = Lexer(chunk + "\n", engine=self.lexer_engine, first_row=row).iter_tokens()
+        ast = Parser(tokens).parse()
+        # functions of chunk may be called from other chunks, functions it calls are not inlined as they are there too
+        pipeline = Pipeline(arch, self.codegen, opt_level=self.opt_level, whole_program=False,
+                            unroll_factor=self.unroll_factor)
+        code_generator = pipeline.generate(ast)
+        ir_text = repr(pipeline.module) if pipeline.module is not None else ""
+        return code_generator.generated_code, ir_text, pipeline.stats
+
+    def _load_state(self) -> Dict[str, Tuple[List[str], str, Dict[str, int]]]:
+        if self.state_path is None or not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, "rb") as f:
+            return pickle.load(f)
+
+    def _save_state(self) -> None:
+        if self.state_path is None:
+            return
+        temp_path = f"{self.state_path}.{os.getpid()}"
+        with open(temp_path, "wb") as f:
+            pickle.dump(self.blocks, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.state_path)
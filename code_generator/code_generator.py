@@ -1,15 +1,39 @@
 import copy
-from typing import Callable, List
+from typing import Callable, List, Tuple
 import re
 
-from common.types import CycleLabels
-from my_parser.AST import FunctionAST
+from common.types import CycleLabels, BinaryOpCode
+from lexer.my_token import Token
 
 
 class CodeGenerator:
+    # cpp file with CODE placeholder for generated asm
+    TEMPLATE_PATH = "build/build_template.cpp"
+
+    # operation: code emitted after the right operand, the left operand is pushed on the stack before it
+    BINARY_OPS_CODE = {
+        Token.OPERATIONS["DIV"]: ["push eax", "pop ebx", "pop eax", "cdq", "idiv ebx"],
+        Token.OPERATIONS["MUL"]: ["push eax", "pop eax", "pop ebx", "xor edx, edx", "cdq", "imul ebx"],
+        Token.OPERATIONS["MOD"]: ["push eax", "pop ebx", "pop eax", "cdq", "idiv ebx", "mov eax, edx"],
+        Token.OPERATIONS["PLUS"]: ["push eax", "pop eax", "pop ebx", "add eax, ebx"],
+        Token.OPERATIONS["MINUS"]: ["push eax", "pop ebx", "pop eax", "sub eax, ebx"],
+        Token.OPERATIONS["EQ"]: ["push eax", "pop ebx", "pop ecx", "xor eax, eax", "cmp ecx, ebx", "sete al"],
+        Token.OPERATIONS["NEQ"]: ["push eax", "pop ebx", "pop ecx", "xor eax, eax", "cmp ecx, ebx", "setne al"],
+        Token.OPERATIONS["GR"]: ["push eax", "pop ebx", "pop ecx", "xor eax, eax", "cmp ecx, ebx", "setg al"],
+        Token.OPERATIONS["LS"]: ["push eax", "pop ebx", "pop ecx", "xor eax, eax", "cmp ecx, ebx", "setl al"],
+        Token.OPERATIONS["GRE"]: ["push eax", "pop ebx", "pop ecx", "xor eax, eax", "cmp ecx, ebx", "setge al"],
+        Token.OPERATIONS["LSE"]: ["push eax", "pop ebx", "pop ecx", "xor eax, eax", "cmp ecx, ebx", "setle al"],
+    }
+
     def __init__(self):
         self.label_unique_id = 0
+        # prefix of created labels, labels of each function are prefixed with its label
+        self.label_namespace = ""
         self.generated_code = []
+        # arch of generated code if it is emitted native, otherwise 32 bit code is converted for 64 bit arch
+        self.arch = None
+        # loops are emitted with the test at the bottom
+        self.rotate_loops = False
 
     def add(self, code: str) -> None:
         self.generated_code.append(code)
@@ -18,14 +42,27 @@ class CodeGenerator:
         self.label_unique_id += 1
         return self.label_unique_id
 
+    def enter_label_namespace(self, namespace: str) -> Tuple[str, int]:
+        """
+        Labels created after this call are prefixed with namespace and numbered from 1, so code of a function
+        doesn't depend on code generated before it. Returns previous namespace state for leave_label_namespace
+        """
+        saved = self.label_namespace, self.label_unique_id
+        self.label_namespace = namespace
+        self.label_unique_id = 0
+        return saved
+
+    def leave_label_namespace(self, saved: Tuple[str, int]) -> None:
+        self.label_namespace, self.label_unique_id = saved
+
     def func_label_wrapper(self, func_id: str) -> str:
         return f"_func_{func_id}"
 
     def if_statement(self, cond: Callable[[], None], if_exp: Callable[[], None], else_exp: Callable[[], None]):
         unique_id = self._get_unique_id()
 
-        l1 = f"_else_{unique_id}"
-        l2 = f"_post_cond_{unique_id}"
+        l1 = f"{self.label_namespace}_else_{unique_id}"
+        l2 = f"{self.label_namespace}_post_cond_{unique_id}"
 
         cond()
         self.add("cmp eax, 0")
@@ -36,16 +73,57 @@ class CodeGenerator:
         else_exp()
         self.add(f"{l2}:")
 
+    def conditional_move(self, cond: Callable[[], None], if_exp: Callable[[], None],
+                         else_exp: Callable[[], None]) -> None:
+        """
+        Emits value of if_exp if cond is true, otherwise value of else_exp, to eax without branches.
+        Both values are computed before cond, so their expressions must have no side effects
+        """
+        if_exp()
+        self.add("push eax")
+        else_exp()
+        self.add("push eax")
+        cond()
+        self.add("cmp eax, 0")
+        self.add("pop eax")
+        self.add("pop ecx")
+        self.add("cmovne eax, ecx")
+
+    def conditional_set(self, cond: Callable[[], None], negated: bool = False) -> None:
+        """
+        Emits 1 if cond is true, otherwise 0, to eax without branches, values are swapped if negated is set
+        """
+        cond()
+        self.add("cmp eax, 0")
+        self.add("mov eax, 0")
+        self.add(f"set{'e' if negated else 'ne'} al")
+
     def while_statement(self, cond: Callable[[], None], while_body: Callable[[], None],
                         add_cycle_labels: Callable[[CycleLabels], None]) -> None:
         unique_id = self._get_unique_id()
 
-        start_l = f"_start_cycle_{unique_id}"
-        end_l = f"_end_cycle_{unique_id}"
+        start_l = f"{self.label_namespace}_start_cycle_{unique_id}"
+        end_l = f"{self.label_namespace}_end_cycle_{unique_id}"
 
         # adding CycleLabels for BREAK and CONTINUE statements
         add_cycle_labels(CycleLabels(start_l, end_l))
 
+        if self.rotate_loops:
+            # the test is emitted twice: the guard before the first iteration and the test at the bottom,
+            # which jumps back to the body, so an iteration runs one branch. Continue jumps to the bottom test
+            body_l = f"{self.label_namespace}_body_cycle_{unique_id}"
+            cond()
+            self.add("cmp eax, 0")
+            self.add(f"je {end_l}")
+            self.add(f"{body_l}:")
+            while_body()
+            self.add(f"{start_l}:")
+            cond()
+            self.add("cmp eax, 0")
+            self.add(f"jne {body_l}")
+            self.add(f"{end_l}:")
+            return
+
         self.add(f"{start_l}:")
         cond()
         self.add(f"cmp eax, 0")
@@ -54,150 +132,45 @@ class CodeGenerator:
         self.add(f"jmp {start_l}")
         self.add(f"{end_l}:")
 
-    def div_op(self, left: Callable[[], None], right: Callable[[], None]) -> None:
-        left()
-        self.add(f"push eax")
-        right()
-        self.add("push eax")
-        self.add("pop ebx")
-        self.add("pop eax")
-        self.add("cdq")
-        self.add("idiv ebx")
-
-    def mul_op(self, left: Callable[[], None], right: Callable[[], None]) -> None:
-        left()
-        self.add("push eax")
-        right()
-        self.add("push eax")
-        self.add("pop eax")
-        self.add("pop ebx")
-        self.add(f"xor edx, edx")
-        self.add("cdq")
-        self.add("imul ebx")
-
-    def mod_op(self, left: Callable[[], None], right: Callable[[], None]) -> None:
-        left()
-        self.add(f"push eax")
-        right()
-        self.add("push eax")
-        self.add("pop ebx")
-        self.add("pop eax")
-        self.add("cdq")
-        self.add("idiv ebx")
-        self.add("mov eax, edx")
-
-    def plus_op(self, left: Callable[[], None], right: Callable[[], None]) -> None:
-        left()
-        self.add("push eax")
-        right()
-        self.add("push eax")
-        self.add("pop eax")
-        self.add("pop ebx")
-        self.add("add eax, ebx")
-
-    def sub_op(self, left: Callable[[], None], right: Callable[[], None]) -> None:
-        left()
-        self.add("push eax")
-        right()
-        self.add("push eax")
-        self.add("pop ebx")
-        self.add("pop eax")
-        self.add("sub eax, ebx")
-
-    def eq_op(self, left: Callable[[], None], right: Callable[[], None]) -> None:
-        left()
-        self.add("push eax")
-        right()
-        self.add("push eax")
-        self.add("pop ebx")
-        self.add("pop ecx")
-        self.add("xor eax, eax")
-        self.add("cmp ecx, ebx")
-        self.add("sete al")
-
-    def neq_op(self, left: Callable[[], None], right: Callable[[], None]) -> None:
-        left()
-        self.add("push eax")
-        right()
-        self.add("push eax")
-        self.add("pop ebx")
-        self.add("pop ecx")
-        self.add("xor eax, eax")
-        self.add("cmp ecx, ebx")
-        self.add("setne al")
-
-    def gr_op(self, left: Callable[[], None], right: Callable[[], None]) -> None:
-        left()
-        self.add("push eax")
-        right()
-        self.add("push eax")
-        self.add("pop ebx")
-        self.add("pop ecx")
-        self.add("xor eax, eax")
-        self.add("cmp ecx, ebx")
-        self.add("setg al")
-
-    def ls_op(self, left: Callable[[], None], right: Callable[[], None]) -> None:
-        left()
-        self.add("push eax")
-        right()
-        self.add("push eax")
-        self.add("pop ebx")
-        self.add("pop ecx")
-        self.add("xor eax, eax")
-        self.add("cmp ecx, ebx")
-        self.add("setl al")
-
-    def gre_op(self, left: Callable[[], None], right: Callable[[], None]) -> None:
-        left()
-        self.add("push eax")
-        right()
-        self.add("push eax")
-        self.add("pop ebx")
-        self.add("pop ecx")
-        self.add("xor eax, eax")
-        self.add("cmp ecx, ebx")
-        self.add("setge al")
-
-    def lse_op(self, left: Callable[[], None], right: Callable[[], None]) -> None:
-        left()
-        self.add("push eax")
-        right()
-        self.add("push eax")
-        self.add("pop ebx")
-        self.add("pop ecx")
-        self.add("xor eax, eax")
-        self.add("cmp ecx, ebx")
-        self.add("setle al")
+    def binary_op(self, op: str) -> BinaryOpCode:
+        """
+        Returns code of binary operation, which is emitted after the left operand (in eax)
+        and after the right operand (in eax)
+        """
+        if op == Token.OPERATIONS["OR"]:
+            return self._logical_or_op()
+        return BinaryOpCode(["push eax"], self.BINARY_OPS_CODE[op])
 
-    def logical_or_op(self, left: Callable[[], None], right: Callable[[], None]) -> None:
+    def _logical_or_op(self) -> BinaryOpCode:
         unique_id = self._get_unique_id()
 
-        l1 = f"_there_{unique_id}"
-        l2 = f"_end1_{unique_id}"
-        l3 = f"_end0_{unique_id}"
-        l4 = f"_end_{unique_id}"
-
-        left()
-        self.add("cmp eax, 0")
-        self.add(f"je {l1}")
-        self.add(f"jmp {l2}")
-
-        self.add(f"{l1}:")
-        right()
-        self.add("cmp eax, 0")
-        self.add(f"je {l3}")
-        self.add(f"jmp {l2}")
-
-        self.add(f"{l2}:")
-        self.add("mov eax, 1")
-        self.add(f"jmp {l4}")
-
-        self.add(f"{l3}:")
-        self.add("xor eax, eax")
-        self.add(f"jmp {l4}")
-
-        self.add(f"{l4}:")
+        l1 = f"{self.label_namespace}_there_{unique_id}"
+        l2 = f"{self.label_namespace}_end1_{unique_id}"
+        l3 = f"{self.label_namespace}_end0_{unique_id}"
+        l4 = f"{self.label_namespace}_end_{unique_id}"
+
+        after_left = [
+            "cmp eax, 0",
+            f"je {l1}",
+            f"jmp {l2}",
+            f"{l1}:",
+        ]
+        after_right = [
+            "cmp eax, 0",
+            f"je {l3}",
+            f"jmp {l2}",
+
+            f"{l2}:",
+            "mov eax, 1",
+            f"jmp {l4}",
+
+            f"{l3}:",
+            "xor eax, eax",
+            f"jmp {l4}",
+
+            f"{l4}:",
+        ]
+        return BinaryOpCode(after_left, after_right)
 
     def _convert_generated_code_to_64_arch(self) -> List:
         gen_code = copy.deepcopy(self.generated_code)
@@ -215,6 +188,7 @@ class CodeGenerator:
         gen_code = map(lambda x: self._double_offset(x), gen_code)
         gen_code = map(lambda x: self._double_outer_scope_offset(x), gen_code)
         gen_code = map(lambda x: self._double_ret(x), gen_code)
+        gen_code = map(lambda x: self._double_frame_size(x), gen_code)
         gen_code = list(gen_code)
         return gen_code
 
@@ -246,26 +220,63 @@ class CodeGenerator:
             res = re.sub(re.compile(r"\d+"), d, res)
         return res if res else string
 
-    def write_to_asm_file(self, path, system_arch):
+    def align_labels(self, alignment: int) -> None:
+        """
+        Aligns function entries and loop heads (labels which are targets of backward jumps) to 2 ** alignment
+        bytes with .p2align directive. Code is not converted after it, as directive has no registers
+        """
+        labels = {}
+        heads = set()
+        for index, line in enumerate(self.generated_code):
+            if line.endswith(":"):
+                labels[line[:-1]] = index
+                # code of function is jumped over to its end label
+                if index and self.generated_code[index - 1] == f"jmp {line[:-1]}_end":
+                    heads.add(index)
+            elif line.startswith("j") and line.split(" ", 1)[1] in labels:
+                heads.add(labels[line.split(" ", 1)[1]])
+        code = []
+        for index, line in enumerate(self.generated_code):
+            if index in heads:
+                code.append(f".p2align {alignment}")
+            code.append(line)
+        self.generated_code = code
+
+    def to_native(self, system_arch) -> None:
+        """
+        Converts generated code for system_arch in place, so it can be rewritten as native code
+        """
+        if system_arch == 64 and self.arch != 64:
+            self.generated_code = self._convert_generated_code_to_64_arch()
+        self.arch = system_arch
+
+    def _double_frame_size(self, string: str) -> str:
+        res = re.fullmatch(re.compile(r"sub rsp, (\d+)"), string)
+        return f"sub rsp, {2 * int(res.group(1))}" if res else string
+
+    def asm_text(self, system_arch) -> str:
         gen_code = self.generated_code
-        if system_arch == 64:
+        if system_arch == 64 and self.arch != 64:
             gen_code = self._convert_generated_code_to_64_arch()
-        generated_string = "\n".join(gen_code)
-        with open(path, "w") as f:
-            f.write(generated_string)
+        return "\n".join(gen_code)
 
-    def write_to_cpp_file(self, output_path=None, system_arch=32, test=False):
+    def cpp_text(self, system_arch=32) -> str:
         gen_code = self.generated_code
-        if system_arch == 64:
+        if system_arch == 64 and self.arch != 64:
             gen_code = self._convert_generated_code_to_64_arch()
 
         generated_string = "\n\t".join(map(lambda x: f"\"{x};\"", gen_code))
 
-        with open("build/build_template.cpp", "r") as f:
+        with open(self.TEMPLATE_PATH, "r") as f:
             template = f.read()
 
-        template = template.replace("CODE", generated_string)
+        return template.replace("CODE", generated_string)
 
+    def write_to_asm_file(self, path, system_arch):
+        with open(path, "w") as f:
+            f.write(self.asm_text(system_arch))
+
+    def write_to_cpp_file(self, output_path=None, system_arch=32, test=False):
         if test:
             path = output_path or "build/main.cpp"
 
@@ -273,4 +284,13 @@ class CodeGenerator:
             path = output_path or "output.cpp"
 
         with open(path, "w") as f:
-            f.write(template)
+            f.write(self.cpp_text(system_arch))
+
+    def write_files(self, output_asm, output_cpp, system_arch, test=False):
+        """
+        Writes asm file if output_asm is set and cpp file with generated code
+        """
+        if output_asm is not None:
+            self.write_to_asm_file(output_asm, system_arch)
+
+        self.write_to_cpp_file(output_path=output_cpp, system_arch=system_arch, test=test)
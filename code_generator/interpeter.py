@@ -4,8 +4,8 @@ from common.types import CycleLabels
 from my_parser.AST import NumAST, StringAST, BinOpAST, UnOpAST, AST, StatementsListAST, AssignExpAST, IdAST, \
     CondStatementAST, \
     FunctionAST, FunctionCallAST, ProgramAST, WhileStatementAST, BreakStatementAST, ContinueStatementAST, \
-    ReturnStatementAST, CompOpAST
-from typing import Union, Type, Dict, List
+    ReturnStatementAST, CompOpAST, DecimalAST, iter_statements
+from typing import Union, Type, Dict, List, Optional, Tuple
 
 from code_generator.code_generator import CodeGenerator
 from exceptions.my_exceptions import NoVisitMethodException, NoSuchVariableException, InvalidSyntaxException
@@ -14,21 +14,61 @@ from copy import deepcopy
 
 
 class Interpreter:
-    def __init__(self, ast: ProgramAST):
+    # max count of nodes of each value of if/else which is emitted as conditional move, both values are computed
+    CONDITIONAL_MOVE_SIZE = 7
+    # operations of values of conditional moves, they have no side effects and don't trap
+    CONDITIONAL_MOVE_OPS = (Token.OPERATIONS["PLUS"], Token.OPERATIONS["MINUS"], Token.OPERATIONS["MUL"])
+
+    def __init__(self, ast: ProgramAST, tail_calls: bool = False, rotate_loops: bool = False,
+                 conditional_moves: bool = False):
         self.code_generator = CodeGenerator()
+        self.code_generator.rotate_loops = rotate_loops
         self.ast = ast
-
-        # var_id: offset
+        # if/else which assigns a simple value to the same variable in both branches is emitted without branches
+        self.conditional_moves = conditional_moves
+        # return of call of the current function by itself becomes rewrite of its args and jump to its body
+        self.tail_calls = tail_calls
+        # (name, count of args, label of body) of the current function if it has tail calls of itself
+        self.tail_call_target: Optional[Tuple[str, int, str]] = None
+
+        # var_id: offset of variables assigned before the current statement
         self.var_map: Dict[str, int] = dict()
         self.func_args_var_map: Dict[str, int] = dict()
+        # var_id: offset of each local variable of the current function
+        self.frame_layout: Dict[str, int] = dict()
         self.func_map = set()
-        self.var_offset = 0
 
         # list of end_of_cycle labels for BREAK to exit
         self.cycle_labels_list: List[CycleLabels] = []
 
-    def _decrement_offset(self) -> None:
-        self.var_offset -= 4
+    @staticmethod
+    def _frame_layout(node: FunctionAST) -> Dict[str, int]:
+        """
+        Returns offsets of local variables of function, in order of their first assignment in text.
+        Arguments are not locals, they are assigned in their slots
+        """
+        args = {arg.value for arg in node.func_args}
+        layout: Dict[str, int] = dict()
+        for statement in iter_statements(node.statement_list):
+            if isinstance(statement, AssignExpAST):
+                var_id = statement.var_id.value
+                if var_id not in args and var_id not in layout:
+                    layout[var_id] = -4 * (len(layout) + 1)
+        return layout
+
+    @staticmethod
+    def _is_self_call(node: AST, func_id: str, args_count: int) -> bool:
+        return isinstance(node, FunctionCallAST) and node.func_id.value == func_id and \
+            len(node.args or []) == args_count
+
+    @classmethod
+    def _has_tail_calls(cls, node: FunctionAST) -> bool:
+        """
+        Returns True if function returns result of call of itself
+        """
+        return any(isinstance(statement, ReturnStatementAST) and
+                   cls._is_self_call(statement.exp, node.func_id.value, len(node.func_args))
+                   for statement in iter_statements(node.statement_list))
 
     def _visit_exception(self, node) -> None:
         raise NoVisitMethodException(f"No _visit_{type(node).__name__} method")
@@ -45,9 +85,10 @@ class Interpreter:
 
     def _visit_FunctionAST(self, node: FunctionAST, **kwargs):
         # print("visited function definition")
-        # saving var map state and offset
+        # saving var map state
         saved_var_map = deepcopy(self.var_map)
-        saved_offset = self.var_offset
+        # all locals get fixed slots in the frame, so assignment is a store even inside of a loop
+        self.frame_layout = self._frame_layout(node)
         # adding local vars to local var map
         for i in range(len(node.func_args)):
             var_id = node.func_args[i].value
@@ -56,11 +97,17 @@ class Interpreter:
 
         func_label = f"{self.code_generator.func_label_wrapper(node.func_id.value)}"
         func_pre_end_label = f"{func_label}_pre_end"
+        saved_namespace = self.code_generator.enter_label_namespace(func_label)
         # adding labels to omit function
         self.code_generator.add(f"jmp {func_label}_end")
         self.code_generator.add(f"{func_label}:")
         self.code_generator.add("push ebp")
         self.code_generator.add("mov ebp, esp")
+        if self.frame_layout:
+            self.code_generator.add(f"sub esp, {len(self.frame_layout) * 4}")
+        if self.tail_calls and self._has_tail_calls(node):
+            self.tail_call_target = (node.func_id.value, len(node.func_args), f"{func_label}_body")
+            self.code_generator.add(f"{func_label}_body:")
 
         for statement in node.statement_list.children:
             self._visit(statement, func_pre_end_label=func_pre_end_label)
@@ -73,14 +120,20 @@ class Interpreter:
 
         self.code_generator.add(f"ret {len(node.func_args) * 4 if len(node.func_args) else ''}")
         self.code_generator.add(f"{func_label}_end:")
+        self.code_generator.leave_label_namespace(saved_namespace)
         # removing local vars from local var map
         self.func_args_var_map = dict()
-        # restoring var map state and offset
+        self.frame_layout = dict()
+        self.tail_call_target = None
+        # restoring var map state
         self.var_map = saved_var_map
-        self.var_offset = saved_offset
 
     def _visit_FunctionCallAST(self, node: FunctionCallAST, **kwargs):
         # print("visited function call")
+        self._push_args(node, **kwargs)
+        self.code_generator.add(f"call {self.code_generator.func_label_wrapper(node.func_id.value)}")
+
+    def _push_args(self, node: FunctionCallAST, **kwargs) -> None:
         if node.args:
             for arg in node.args[::-1]:
                 if arg.tok_type in (Token.NUMBER_DECIMAL, Token.NUMBER_BINARY, Token.NUMBER_HEX):
@@ -89,7 +142,13 @@ class Interpreter:
                     self._visit(IdAST(arg.value), **kwargs)
                     self.code_generator.add(f"push eax")
 
-        self.code_generator.add(f"call {self.code_generator.func_label_wrapper(node.func_id.value)}")
+    def _tail_call(self, node: FunctionCallAST, **kwargs) -> None:
+        # all args are pushed before the first slot is rewritten, as they may be read from the slots
+        self._push_args(node, **kwargs)
+        for i in range(len(node.args or [])):
+            self.code_generator.add("pop eax")
+            self.code_generator.add(f"mov [ebp + {4 + (i + 1) * 4}], eax")
+        self.code_generator.add(f"jmp {self.tail_call_target[2]}")
 
     def _visit_StatementsListAST(self, node: StatementsListAST, **kwargs) -> None:
         for child in node.children:
@@ -99,20 +158,22 @@ class Interpreter:
             # self.code_generator.add("\n")
 
     def _visit_AssignExpAST(self, node: AssignExpAST, **kwargs) -> None:
-        var_id = node.var_id.value
-
         self._visit(node.exp, **kwargs)
+        self._store(node.var_id.value)
 
-        # assigning new variable
-        if var_id not in self.var_map:
-            self.code_generator.add("push eax")
-            self._decrement_offset()
-            self.var_map.update({var_id: self.var_offset})
+    def _store(self, var_id: str) -> None:
+        """
+        Emits store of eax to variable
+        """
+        # assigning argument
+        if var_id not in self.frame_layout and var_id in self.func_args_var_map:
+            self.code_generator.add(f"mov [ebp + {self.func_args_var_map[var_id]}], eax")
+            return
 
-        # assigning existing variable
-        else:
-            var_offset = self.var_map.get(var_id)
-            self.code_generator.add(f"mov [ebp - {-var_offset}], eax")
+        # variable is known after its first assignment
+        var_offset = self.frame_layout[var_id]
+        self.var_map.update({var_id: var_offset})
+        self.code_generator.add(f"mov [ebp - {-var_offset}], eax")
 
     def _visit_IdAST(self, node: IdAST, **kwargs) -> None:
         var_offset = self.var_map.get(node.var_id)
@@ -126,11 +187,70 @@ class Interpreter:
             raise NoSuchVariableException(f"No such variable {node.var_id}")
 
     def _visit_CondStatementAST(self, node: CondStatementAST, **kwargs) -> None:
-        self.code_generator.if_statement(
-            lambda: self._visit(node.cond, **kwargs),
-            lambda: self._visit(node.node_if, **kwargs),
-            lambda: self._visit(node.node_else, **kwargs),
-        )
+        var_id = self._conditional_assignment(node) if self.conditional_moves else None
+        if var_id is None:
+            self.code_generator.if_statement(
+                lambda: self._visit(node.cond, **kwargs),
+                lambda: self._visit(node.node_if, **kwargs),
+                lambda: self._visit(node.node_else, **kwargs),
+            )
+            return
+        if_exp, else_exp = node.node_if.children[0].exp, node.node_else.children[0].exp
+        values = (self._flag_value(if_exp), self._flag_value(else_exp))
+        if values in ((1, 0), (0, 1)):
+            self.code_generator.conditional_set(lambda: self._visit(node.cond, **kwargs), negated=values == (0, 1))
+        else:
+            self.code_generator.conditional_move(
+                lambda: self._visit(node.cond, **kwargs),
+                lambda: self._visit(if_exp, **kwargs),
+                lambda: self._visit(else_exp, **kwargs),
+            )
+        self._store(var_id)
+
+    def _conditional_assignment(self, node: CondStatementAST) -> Optional[str]:
+        """
+        Returns variable of if/else whose branches are single assignments of simple values to the same variable,
+        None for other if/else
+        """
+        branches = (node.node_if, node.node_else)
+        if any(len(branch.children) != 1 or not isinstance(branch.children[0], AssignExpAST) for branch in branches):
+            return None
+        if_assignment, else_assignment = node.node_if.children[0], node.node_else.children[0]
+        if if_assignment.var_id.value != else_assignment.var_id.value or \
+                not self._is_simple_value(if_assignment.exp) or not self._is_simple_value(else_assignment.exp):
+            return None
+        return if_assignment.var_id.value
+
+    @classmethod
+    def _is_simple_value(cls, node: AST) -> bool:
+        """
+        Returns True if expression is small and made of variables, numbers, comparisons and operations which
+        can be computed on the path where it is not used
+        """
+        count = 0
+        stack = [node]
+        while stack:
+            item = stack.pop()
+            count += 1
+            if count > cls.CONDITIONAL_MOVE_SIZE:
+                return False
+            if isinstance(item, CompOpAST) and item.op.value != Token.OPERATIONS["OR"] or \
+                    isinstance(item, BinOpAST) and item.op.value in cls.CONDITIONAL_MOVE_OPS:
+                stack.extend((item.left, item.right))
+            elif isinstance(item, UnOpAST):
+                stack.append(item.right)
+            elif not isinstance(item, (IdAST, NumAST)):
+                return False
+        return True
+
+    @staticmethod
+    def _flag_value(node: AST) -> Optional[int]:
+        """
+        Returns value of decimal 0 or 1, None for other expressions
+        """
+        if isinstance(node, DecimalAST) and node.value in ("0", "1"):
+            return int(node.value)
+        return None
 
     def _visit_WhileStatementAST(self, node: WhileStatementAST, **kwargs) -> None:
         self.code_generator.while_statement(
@@ -164,6 +284,9 @@ class Interpreter:
         self.code_generator.add(f"jmp {self.cycle_labels_list[-1].start}")
 
     def _visit_ReturnStatementAST(self, node: ReturnStatementAST, **kwargs) -> None:
+        if self.tail_call_target is not None and self._is_self_call(node.exp, *self.tail_call_target[:2]):
+            self._tail_call(node.exp, **kwargs)
+            return
         self._visit(node.exp)
         label = kwargs.get("func_pre_end_label", None)
         if label is not None:
@@ -171,103 +294,54 @@ class Interpreter:
             self.code_generator.add(f"jmp {label}")
 
     def _visit_BinOpAST(self, node: BinOpAST, **kwargs) -> None:
-        if node.op.value == Token.OPERATIONS["DIV"]:
-            self.code_generator.div_op(
-                lambda: self._visit(node.left, **kwargs),
-                lambda: self._visit(node.right, **kwargs)
-            )
-
-        elif node.op.value == Token.OPERATIONS["MUL"]:
-            self.code_generator.mul_op(
-                lambda: self._visit(node.left, **kwargs),
-                lambda: self._visit(node.right, **kwargs)
-            )
-
-        elif node.op.value == Token.OPERATIONS["MOD"]:
-            self.code_generator.mod_op(
-                lambda: self._visit(node.left, **kwargs),
-                lambda: self._visit(node.right, **kwargs)
-            )
-
-        elif node.op.value == Token.OPERATIONS["PLUS"]:
-            self.code_generator.plus_op(
-                lambda: self._visit(node.left, **kwargs),
-                lambda: self._visit(node.right, **kwargs)
-            )
-
-        elif node.op.value == Token.OPERATIONS["MINUS"]:
-            self.code_generator.sub_op(
-                lambda: self._visit(node.left, **kwargs),
-                lambda: self._visit(node.right, **kwargs)
-            )
-
-        elif node.op.value == Token.OPERATIONS["OR"]:
-            self.code_generator.logical_or_op(
-                lambda: self._visit(node.left, **kwargs),
-                lambda: self._visit(node.right, **kwargs)
-            )
+        self._visit_expression(node, **kwargs)
 
     def _visit_CompOpAST(self, node: CompOpAST, **kwargs) -> None:
-        if node.op.value == Token.OPERATIONS["EQ"]:
-            self.code_generator.eq_op(
-                lambda: self._visit(node.left, **kwargs),
-                lambda: self._visit(node.right, **kwargs)
-            )
-
-        elif node.op.value == Token.OPERATIONS["NEQ"]:
-            self.code_generator.neq_op(
-                lambda: self._visit(node.left, **kwargs),
-                lambda: self._visit(node.right, **kwargs)
-            )
-
-        elif node.op.value == Token.OPERATIONS["GR"]:
-            self.code_generator.gr_op(
-                lambda: self._visit(node.left, **kwargs),
-                lambda: self._visit(node.right, **kwargs)
-            )
-
-        elif node.op.value == Token.OPERATIONS["LS"]:
-            self.code_generator.ls_op(
-                lambda: self._visit(node.left, **kwargs),
-                lambda: self._visit(node.right, **kwargs)
-            )
-
-        elif node.op.value == Token.OPERATIONS["GRE"]:
-            self.code_generator.gre_op(
-                lambda: self._visit(node.left, **kwargs),
-                lambda: self._visit(node.right, **kwargs)
-            )
-
-        elif node.op.value == Token.OPERATIONS["LSE"]:
-            self.code_generator.lse_op(
-                lambda: self._visit(node.left, **kwargs),
-                lambda: self._visit(node.right, **kwargs)
-            )
+        self._visit_expression(node, **kwargs)
 
     def _visit_UnOpAST(self, node: UnOpAST, **kwargs) -> None:
-        if node.op.value == Token.OPERATIONS["MINUS"]:
-            self._visit(node.right, **kwargs)
+        self._visit_expression(node, **kwargs)
 
-            self.code_generator.add("neg eax")
+    def _visit_expression(self, node: Type[AST], **kwargs) -> None:
+        """
+        Emits code of expression tree in post order with explicit stack instead of recursion,
+        so expressions of any depth can be compiled. Stack contains nodes and lists of code lines
+        """
+        stack = [node]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, list):
+                for code in item:
+                    self.code_generator.add(code)
+
+            elif isinstance(item, (BinOpAST, CompOpAST)):
+                code = self.code_generator.binary_op(item.op.value)
+                stack.append(code.after_right)
+                stack.append(item.right)
+                stack.append(code.after_left)
+                stack.append(item.left)
+
+            elif isinstance(item, UnOpAST):
+                if item.op.value == Token.OPERATIONS["MINUS"]:
+                    stack.append(["neg eax"])
+                    stack.append(item.right)
+
+            else:
+                self._visit(item, **kwargs)
 
     def _visit_DecimalAST(self, node: Union[NumAST, StringAST], **kwargs) -> None:
         self.code_generator.add(f"mov eax, {node.value}")
 
     def _visit_BinaryAST(self, node: Union[NumAST, StringAST], **kwargs):
-        print(f"visiting {node}")
         self.code_generator.add(f"mov eax, {node.value}")
 
     def _visit_HexAST(self, node: Union[NumAST, StringAST], **kwargs):
-        print(f"visiting {node}")
         self.code_generator.add(f"mov eax, {node.value}")
 
     def _visit_StringAST(self, node: Union[NumAST, StringAST], **kwargs):
-        print(f"visiting {node}")
         pass
 
-    def interpret(self, output_path, test, system_arch):
+    def interpret(self, output_path, test, system_arch, output_cpp=None):
         self._visit(self.ast)
 
-        self.code_generator.write_to_asm_file(output_path, system_arch)
-
-        self.code_generator.write_to_cpp_file(system_arch=system_arch, test=test)
+        self.code_generator.write_files(output_path, output_cpp, system_arch, test)
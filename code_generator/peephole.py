@@ -0,0 +1,223 @@
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from common.types import PeepholeRule
+
+REGISTER = r"(?:[re](?:[abcd]x|[sd]i|[sb]p)|r(?:8|9|1[0-5])d?)"
+IMMEDIATE = r"-?\d+"
+MEMORY = r"\[[^\]]+\]"
+
+PUSH_RE = re.compile(rf"push ({REGISTER}|{IMMEDIATE})$")
+POP_RE = re.compile(rf"pop ({REGISTER})$")
+MOV_RE = re.compile(rf"mov ({REGISTER}|{MEMORY}), (.+)$")
+JMP_RE = re.compile(r"jmp (\S+)$")
+SET_RE = re.compile(r"set(\w+) al$")
+CMOV_RE = re.compile(rf"cmovne ({REGISTER}), ({REGISTER})$")
+
+# registers changed by calls, functions save the other registers they use
+SCRATCH_REGISTERS = ("eax", "ecx", "edx", "rax", "rcx", "rdx")
+
+# condition code: negated condition code
+NEGATED_CONDITIONS = {"e": "ne", "ne": "e", "l": "ge", "ge": "l", "g": "le", "le": "g"}
+
+
+def _is_register(operand: str) -> bool:
+    return re.fullmatch(REGISTER, operand) is not None
+
+
+def _fits_immediate(operand: str) -> bool:
+    return re.fullmatch(IMMEDIATE, operand) is not None and -2 ** 31 <= int(operand) < 2 ** 31
+
+
+def _references(line: str, register: str) -> bool:
+    return re.search(rf"\b{register}\b", line) is not None
+
+
+def _push_pop(lines: List[str]) -> Optional[List[str]]:
+    """
+    push X; pop Y -> mov Y, X, nothing if X is Y
+    """
+    push, pop = PUSH_RE.match(lines[0]), POP_RE.match(lines[1])
+    if push is None or pop is None:
+        return None
+    if push.group(1) == pop.group(1):
+        return []
+    return [f"mov {pop.group(1)}, {push.group(1)}"]
+
+
+def _kills(line: str, register: str) -> bool:
+    """
+    Returns True if line overwrites register without reading it
+    """
+    if line.startswith("call "):
+        return register in SCRATCH_REGISTERS
+    mov = MOV_RE.match(line)
+    if mov is not None:
+        return mov.group(1) == register and not _references(mov.group(2), register)
+    pop = POP_RE.match(line)
+    return pop is not None and pop.group(1) == register
+
+
+def _mov_push(lines: List[str]) -> Optional[List[str]]:
+    """
+    mov R, X; push R; <R is overwritten> -> push X; <R is overwritten>
+    """
+    mov, push = MOV_RE.match(lines[0]), PUSH_RE.match(lines[1])
+    if mov is None or push is None or mov.group(1) != push.group(1) or not _is_register(mov.group(1)) or \
+            not _kills(lines[2], mov.group(1)):
+        return None
+    register, source = mov.groups()
+    if re.fullmatch(MEMORY, source):
+        size = "QWORD PTR" if register.startswith("r") else "DWORD PTR"
+        return [f"push {size} {source}", lines[2]]
+    if _is_register(source) and source[0] == register[0] or _fits_immediate(source):
+        return [f"push {source}", lines[2]]
+    return None
+
+
+def _jump_to_next(lines: List[str]) -> Optional[List[str]]:
+    """
+    jmp L; L: -> L:
+    """
+    jmp = JMP_RE.match(lines[0])
+    if jmp is None or lines[1] != f"{jmp.group(1)}:":
+        return None
+    return [lines[1]]
+
+
+def _unreachable(lines: List[str]) -> Optional[List[str]]:
+    """
+    Removes line after unconditional jump or return, unless it is a label
+    """
+    if not (lines[0].startswith("jmp ") or lines[0].startswith("ret")) or lines[1].endswith(":"):
+        return None
+    return [lines[0]]
+
+
+def _store_load(lines: List[str]) -> Optional[List[str]]:
+    """
+    mov M, R; mov R, M -> mov M, R
+    """
+    store, load = MOV_RE.match(lines[0]), MOV_RE.match(lines[1])
+    if store is None or load is None or store.group(1) != load.group(2) or store.group(2) != load.group(1) or \
+            not _is_register(load.group(1)):
+        return None
+    return [lines[0]]
+
+
+def _dead_mov(lines: List[str]) -> Optional[List[str]]:
+    """
+    mov R, X; mov R, Y -> mov R, Y if Y doesn't read R
+    """
+    first, second = MOV_RE.match(lines[0]), MOV_RE.match(lines[1])
+    if first is None or second is None or first.group(1) != second.group(1) or not _is_register(first.group(1)) or \
+            _references(second.group(2), first.group(1)):
+        return None
+    return [lines[1]]
+
+
+def _compare_boolean(lines: List[str]) -> Optional[Tuple[str, str, str]]:
+    """
+    Returns register, comparison and its condition code of xor R, R; cmp A, B; setCC al; cmp R, 0,
+    None if lines are not the comparison and the test of its boolean
+    """
+    xor, compare, setcc, test = lines
+    register = xor[4:].split(", ")[0] if xor.startswith("xor ") else None
+    condition = SET_RE.match(setcc)
+    if register not in ("eax", "rax") or xor != f"xor {register}, {register}" or not compare.startswith("cmp ") or \
+            condition is None or test != f"cmp {register}, 0":
+        return None
+    return register, compare, condition.group(1)
+
+
+def _compare_branch(lines: List[str]) -> Optional[List[str]]:
+    """
+    xor R, R; cmp A, B; setCC al; cmp R, 0; je/jne L -> cmp A, B; jNCC/jCC L.
+    Boolean in R is used only by the branch, it is emitted so for conditions of if and while
+    """
+    boolean = _compare_boolean(lines[:4])
+    branch = lines[4]
+    if boolean is None or branch.split(" ")[0] not in ("je", "jne"):
+        return None
+    _, compare, code = boolean
+    code = NEGATED_CONDITIONS[code] if branch.startswith("je ") else code
+    return [compare, f"j{code} {branch.split(' ', 1)[1]}"]
+
+
+def _compare_select(lines: List[str]) -> Optional[List[str]]:
+    """
+    xor R, R; cmp A, B; setCC al; cmp R, 0; pop R; pop C; cmovne R, C -> cmp A, B; pop R; pop C; cmovCC R, C.
+    Pops don't change flags, it is emitted so for if/else emitted as conditional move
+    """
+    boolean = _compare_boolean(lines[:4])
+    cmov = CMOV_RE.match(lines[6])
+    if boolean is None or cmov is None:
+        return None
+    register, compare, code = boolean
+    if lines[4] != f"pop {register}" or cmov.group(1) != register or lines[5] != f"pop {cmov.group(2)}":
+        return None
+    return [compare, lines[4], lines[5], f"cmov{code} {register}, {cmov.group(2)}"]
+
+
+def _compare_set(lines: List[str]) -> Optional[List[str]]:
+    """
+    xor R, R; cmp A, B; setCC al; cmp R, 0; mov R, 0; setne/sete al -> xor R, R; cmp A, B; setCC/setNCC al.
+    It is emitted so for if/else which assigns 1 and 0
+    """
+    boolean = _compare_boolean(lines[:4])
+    if boolean is None:
+        return None
+    register, compare, code = boolean
+    if lines[4] != f"mov {register}, 0" or lines[5] not in ("setne al", "sete al"):
+        return None
+    code = NEGATED_CONDITIONS[code] if lines[5] == "sete al" else code
+    return [lines[0], compare, f"set{code} al"]
+
+
+# all rules in the order they are tried
+RULES = (
+    PeepholeRule("push-pop", 2, _push_pop),
+    PeepholeRule("mov-push", 3, _mov_push),
+    PeepholeRule("jmp-next", 2, _jump_to_next),
+    PeepholeRule("unreachable", 2, _unreachable),
+    PeepholeRule("store-load", 2, _store_load),
+    PeepholeRule("dead-mov", 2, _dead_mov),
+    PeepholeRule("compare-branch", 5, _compare_branch),
+    PeepholeRule("compare-select", 7, _compare_select),
+    PeepholeRule("compare-set", 6, _compare_set),
+)
+
+
+class Peephole:
+    """
+    Windowed peephole optimiser over lines of native assembler.
+    Lines are appended to output one by one and after each line rules are tried on the window at the end
+    of output, so replacement is matched again together with the preceding lines. Each rule makes code
+    shorter, so rewriting stops. Hits of each rule are counted in hits
+    """
+
+    def __init__(self, rules: Optional[Iterable[str]] = None):
+        """
+        rules are names of enabled rules, all rules are enabled by default
+        """
+        rule_map = {rule.name: rule for rule in RULES}
+        self.rules = [rule_map[name] for name in rules] if rules is not None else list(RULES)
+        self.hits: Dict[str, int] = {rule.name: 0 for rule in self.rules}
+
+    def run(self, code: List[str]) -> List[str]:
+        output: List[str] = []
+        for line in code:
+            output.append(line)
+            matched = True
+            while matched:
+                matched = False
+                for rule in self.rules:
+                    if len(output) < rule.window:
+                        continue
+                    replacement = rule.rewrite(output[-rule.window:])
+                    if replacement is not None:
+                        output[-rule.window:] = replacement
+                        self.hits[rule.name] += 1
+                        matched = True
+                        break
+        return output
@@ -1,3 +1,13 @@
 from collections import namedtuple
 
 CycleLabels = namedtuple('CycleLabels', ['start', 'end'])
+# code of binary operation emitted after its left and after its right operand
+BinaryOpCode = namedtuple('BinaryOpCode', ['after_left', 'after_right'])
+# counters and size of compilation cache
+CacheStats = namedtuple('CacheStats', ['hits', 'misses', 'entries', 'size'])
+# count of top level chunks whose code was reused and compiled in the last incremental build
+IncrementalStats = namedtuple('IncrementalStats', ['reused', 'compiled'])
+# top level part of program text, which starts at row
+TextChunk = namedtuple('TextChunk', ['row', 'start', 'end'])
+# rule of peephole optimiser, rewrite returns replacement of window lines or None if they don't match
+PeepholeRule = namedtuple('PeepholeRule', ['name', 'window', 'rewrite'])
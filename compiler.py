@@ -1,9 +1,17 @@
 import argparse
 import subprocess
+from typing import List, Optional
 
-from code_generator.interpeter import Interpreter
+from cache.compilation_cache import CompilationCache
+from cache.incremental import IncrementalCompiler
+from ir.inlining import INLINE_THRESHOLD
+from ir.pipeline import CODEGENS, OPT_LEVELS, Pipeline
+from ir.unrolling import UNROLL_FACTOR
 from lexer.lexer import Lexer
+from lexer.source import open_source
+from my_parser.ast_arena import ASTArena
 from my_parser.my_parser import Parser
+from my_parser.parallel_parser import ParallelParser
 from pprint import pprint
 
 __all__ = ["compiler"]
@@ -36,28 +44,183 @@ arg_parser.add_argument(
     metavar="arch",
     help="architecture for assembler (32 or 64)",
 )
+arg_parser.add_argument(
+    "--lexer",
+    dest="lexer",
+    nargs="?",
+    default="table",
+    choices=Lexer.ENGINES,
+    metavar="lexer",
+    help="lexer engine (table or char)",
+)
+arg_parser.add_argument(
+    "--ast-arena",
+    dest="ast_arena",
+    action="store_true",
+    help="store syntax tree in flat arrays instead of node objects",
+)
+arg_parser.add_argument(
+    "--cache-dir",
+    dest="cache_dir",
+    nargs="?",
+    default=None,
+    metavar="cache_dir",
+    help="directory of compilation cache, unchanged sources are not compiled again",
+)
+arg_parser.add_argument(
+    "--cache-size",
+    dest="cache_size",
+    nargs="?",
+    default=256,
+    type=int,
+    metavar="cache_size",
+    help="max size of compilation cache in MiB",
+)
+arg_parser.add_argument(
+    "--cache-stats",
+    dest="cache_stats",
+    action="store_true",
+    help="print hit/miss statistics of compilation cache",
+)
+arg_parser.add_argument(
+    "--incremental",
+    dest="incremental",
+    nargs="?",
+    default=None,
+    metavar="state",
+    help="path of incremental build state, only changed functions are compiled again",
+)
+arg_parser.add_argument(
+    "--jobs",
+    dest="jobs",
+    nargs="?",
+    default=1,
+    type=int,
+    metavar="jobs",
+    help="count of processes which lex and parse top level functions in parallel",
+)
+arg_parser.add_argument(
+    "--codegen",
+    dest="codegen",
+    nargs="?",
+    default="ir",
+    choices=CODEGENS,
+    metavar="codegen",
+    help="code generation (ir: through intermediate representation and its passes, direct: straight from tree)",
+)
+arg_parser.add_argument(
+    "--emit-ir",
+    dest="emit_ir",
+    nargs="?",
+    default=None,
+    metavar="emit_ir",
+    help="path of file for dump of intermediate representation",
+)
+arg_parser.add_argument(
+    "-O",
+    dest="opt_level",
+    nargs="?",
+    default=0,
+    const=1,
+    type=int,
+    choices=OPT_LEVELS,
+    metavar="level",
+    help="optimisation level: 0 - none, 1 - optimisation passes and register allocation (-O is -O1), "
+         "2 - as 1 with unrolled loops, aligned loop heads and function entries",
+)
+arg_parser.add_argument(
+    "--inline-threshold",
+    dest="inline_threshold",
+    default=INLINE_THRESHOLD,
+    type=int,
+    metavar="count",
+    help="functions of at most count IR instructions are inlined at -O1, 0 disables inlining",
+)
+arg_parser.add_argument(
+    "--unroll-factor",
+    dest="unroll_factor",
+    default=UNROLL_FACTOR,
+    type=int,
+    metavar="factor",
+    help="counted loops are unrolled by factor at -O2, 1 disables unrolling",
+)
+arg_parser.add_argument(
+    "--report",
+    dest="report",
+    action="store_true",
+    help="print changes made by optimisation passes",
+)
 
 
-def compile_to_exec(cpp_path, exec_path, arch):
-    subprocess.run(f"g++ -m{arch} -masm=intel {cpp_path} -o {exec_path}".split(" "))
+def compile_to_exec(cpp_path, exec_path, arch) -> bool:
+    """
+    Returns True if g++ has built the executable
+    """
+    result = subprocess.run(f"g++ -m{arch} -masm=intel {cpp_path} -o {exec_path}".split(" "))
     # p = subprocess.Popen([f"./{exec_path}"], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
     #                      stderr=subprocess.PIPE)
     # output, err = p.communicate()
     # res = output.decode("utf-8")
     # res = res.replace("\n", "")
     # print(res)
+    return result.returncode == 0
+
+
+def compiler(text, arch, output_asm=None, test=False, output_cpp=None, output_exec=None, lexer_engine="table",
+             ast_arena=False, cache: Optional[CompilationCache] = None,
+             incremental: Optional[IncrementalCompiler] = None, jobs=1, codegen="ir", emit_ir=None,
+             opt_level=0, inline_threshold=INLINE_THRESHOLD, unroll_factor=UNROLL_FACTOR) -> List[str]:
+    """
+    Compiles text to executable, returns lines of compile report, which is empty if outputs are restored from cache
+    """
+    if cache is not None:
+        # default settings are not part of the key
+        options = tuple(f"{name}={value}" for name, value, default in (("codegen", codegen, "ir"),
+                                                                        ("opt_level", opt_level, 0),
+                                                                        ("inline_threshold", inline_threshold,
+                                                                         INLINE_THRESHOLD),
+                                                                        ("unroll_factor", unroll_factor,
+                                                                         UNROLL_FACTOR))
+                        if value != default)
+        key = cache.key(text, arch, options)
+        # on cache hit outputs are copied from cache and no phase is run, IR dump needs the front end to run
+        if emit_ir is None and cache.restore(key, output_asm=output_asm, output_cpp=output_cpp,
+                                             output_exec=output_exec):
+            return []
 
+    ir_text = None
+    if incremental is not None:
+        # only changed functions are lexed, parsed and emitted, whole program tree is not built
+        ast = None
+        code_generator = incremental.generate(text, arch)
+        ir_text = incremental.ir_text
+        report = Pipeline(arch, codegen, opt_level=opt_level).report(incremental.pass_stats)
+    else:
+        if jobs > 1:
+            # top level functions are lexed and parsed in a process pool, tree is made of arena views
+            ast = ParallelParser(text, workers=jobs, lexer_engine=lexer_engine).parse()
+        else:
+            lexer = Lexer(text, engine=lexer_engine)
+            # tokens are pulled lazily by the parser, only its lookahead window is kept in memory
+            parser = Parser(lexer.iter_tokens(), arena=ASTArena() if ast_arena else None)
+            ast = parser.parse()
+        # ast.prettyAST()
+        pipeline = Pipeline(arch, codegen, opt_level=opt_level, inline_threshold=inline_threshold,
+                            unroll_factor=unroll_factor)
+        code_generator = pipeline.generate(ast)
+        if pipeline.module is not None:
+            ir_text = repr(pipeline.module)
+        report = pipeline.report()
+    code_generator.write_files(output_asm, output_cpp, arch, test)
+    if emit_ir is not None and ir_text is not None:
+        with open(emit_ir, "w") as f:
+            f.write(ir_text)
+    compiled = compile_to_exec(output_cpp, output_exec, arch)
 
-def compiler(text, arch, output_asm=None, test=False, output_cpp=None, output_exec=None):
-    lexer = Lexer(text)
-    tokens = lexer.get_tokens()
-    # pprint(tokens)
-    parser = Parser(tokens)
-    ast = parser.parse()
-    # ast.prettyAST()
-    interpreter = Interpreter(ast)
-    interpreter.interpret(output_asm, test, arch)
-    compile_to_exec(output_cpp, output_exec, arch)
+    # executable at output_exec may be left from another build if g++ fails
+    if cache is not None and compiled:
+        cache.store(key, ast, code_generator.asm_text(arch), code_generator.cpp_text(arch), output_exec)
+    return report
 
 
 def main():
@@ -75,16 +238,36 @@ def main():
     cpp_out = "output.cpp"
     output_exec = "output"
 
-    with open(src, "rb") as f:
-        program_text = str(f.read())[2:-1]  # trims b"str" to str
+    cache = CompilationCache(args.cache_dir, args.cache_size * 2 ** 20) if args.cache_dir else None
+    incremental = IncrementalCompiler(args.incremental, lexer_engine=args.lexer, codegen=args.codegen,
+                                      opt_level=args.opt_level, unroll_factor=args.unroll_factor) \
+        if args.incremental else None
+
+    # mapping of the source is closed once compilation finishes
+    with open_source(src) as program_text:
+        report = compiler(
+            program_text,
+            output_asm=asm_out,
+            output_cpp=cpp_out,
+            output_exec=output_exec,
+            arch=arch,
+            lexer_engine=args.lexer,
+            ast_arena=args.ast_arena,
+            cache=cache,
+            incremental=incremental,
+            jobs=args.jobs,
+            codegen=args.codegen,
+            emit_ir=args.emit_ir,
+            opt_level=args.opt_level,
+            inline_threshold=args.inline_threshold,
+            unroll_factor=args.unroll_factor,
+        )
+
+    if args.report:
+        print("\n".join(report))
 
-    compiler(
-        program_text,
-        output_asm=asm_out,
-        output_cpp=cpp_out,
-        output_exec=output_exec,
-        arch=arch
-    )
+    if cache is not None and args.cache_stats:
+        print(cache.stats())
 
 
 if __name__ == "__main__":
@@ -15,3 +15,7 @@ class NoVisitMethodException(Exception):
 
 class NoSuchVariableException(Exception):
     pass
+
+
+class InvalidIRException(Exception):
+    pass
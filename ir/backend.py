@@ -0,0 +1,324 @@
+from typing import Dict, List, Optional
+
+from code_generator.code_generator import CodeGenerator
+from ir.ir import Module, Function, BasicBlock, Instruction, VReg, Const, Operand, ADD, MUL, AND, EQ, NE, LT, GT, LE, \
+    GE, PARAM, NEGATED_COMPARE
+from ir.regalloc import LinearScan
+
+# comparison: condition code of signed comparison
+CONDITION_CODES = {EQ: "e", NE: "ne", LT: "l", GT: "g", LE: "le", GE: "ge"}
+
+# arch: registers used by backend
+REGISTERS = {
+    32: {"acc": "eax", "scratch": "ecx", "rem": "edx", "bp": "ebp", "sp": "esp"},
+    64: {"acc": "rax", "scratch": "rcx", "rem": "rdx", "bp": "rbp", "sp": "rsp"},
+}
+
+# arch: registers for virtual registers, functions save the ones they use, so values in them survive calls
+# and code of program changes only eax, ecx and edx
+ALLOCATABLE_REGISTERS = {
+    32: ("ebx", "esi", "edi"),
+    64: ("rbx", "rsi", "rdi", "r8", "r9", "r10", "r11", "r12", "r13", "r14", "r15"),
+}
+
+# register: its lower 32 bits
+LOW_DWORD = {
+    "eax": "eax", "ebx": "ebx", "esi": "esi", "edi": "edi",
+    "rax": "eax", "rbx": "ebx", "rsi": "esi", "rdi": "edi",
+    **{f"r{i}": f"r{i}d" for i in range(8, 16)},
+}
+
+COMMUTATIVE_OPS = (ADD, MUL, AND)
+# factors of multiplication emitted as lea with scaled index
+LEA_FACTORS = (3, 5, 9)
+
+
+class Backend:
+    """
+    Lowers IR module to assembler of the given arch, code is native and is not converted by CodeGenerator.
+    Each virtual register has a location: machine register given by LinearScan if allocate_registers is set,
+    otherwise frame slot [ebp - word * n], parameters are kept in the slots of arguments pushed by caller.
+    Locations which are not registers are used directly as memory operands, eax, ecx and edx are scratch.
+    Calling convention is the same as of Interpreter: arguments are pushed in reverse order, callee pops them,
+    result is returned in eax
+    """
+
+    def __init__(self, arch: int, allocate_registers: bool = False):
+        self.arch = arch
+        self.word = arch // 8
+        self.regs = REGISTERS[arch]
+        self.size_ptr = "DWORD PTR" if arch == 32 else "QWORD PTR"
+        self.allocator = LinearScan(ALLOCATABLE_REGISTERS[arch]) if allocate_registers else None
+        self.code_generator = CodeGenerator()
+        self.code_generator.arch = arch
+        # register: location of register in current function
+        self.locations: Dict[VReg, str] = {}
+        self._next_label: Optional[str] = None
+        self._func_label = ""
+
+    def emit(self, module: Module) -> CodeGenerator:
+        for item in module.items:
+            if isinstance(item, Function):
+                self.emit_function(item)
+            else:
+                self._emit_call(item)
+        return self.code_generator
+
+    def _add(self, code: str) -> None:
+        self.code_generator.add(code)
+
+    def emit_function(self, function: Function) -> None:
+        func_label = self.code_generator.func_label_wrapper(function.name)
+        self._func_label = func_label
+        if self.allocator is not None:
+            self.locations = self.allocator.allocate(function)
+        saved_registers = sorted(set(self.locations.values()), key=ALLOCATABLE_REGISTERS[self.arch].index)
+        frame_size = self._allocate_frame(function)
+
+        self._add(f"jmp {func_label}_end")
+        self._add(f"{func_label}:")
+        self._add(f"push {self.regs['bp']}")
+        self._add(f"mov {self.regs['bp']}, {self.regs['sp']}")
+        if frame_size:
+            self._add(f"sub {self.regs['sp']}, {frame_size}")
+        for register in saved_registers:
+            self._add(f"push {register}")
+
+        for index, block in enumerate(function.blocks):
+            self._next_label = function.blocks[index + 1].label if index + 1 < len(function.blocks) else None
+            self._emit_block(block, index == 0)
+
+        self._add(f"{func_label}_pre_end:")
+        for register in reversed(saved_registers):
+            self._add(f"pop {register}")
+        self._add(f"mov {self.regs['sp']}, {self.regs['bp']}")
+        self._add(f"pop {self.regs['bp']}")
+        self._add(f"ret {len(function.params) * self.word if function.params else ''}")
+        self._add(f"{func_label}_end:")
+        self.locations = {}
+
+    def _allocate_frame(self, function: Function) -> int:
+        """
+        Places parameters without register to their argument slots and other registers without location
+        to frame slots, returns size of frame
+        """
+        slots = 0
+        for instruction in function.instructions():
+            if instruction.op == PARAM and instruction.dest not in self.locations:
+                self.locations[instruction.dest] = self._argument_slot(instruction.args[0].value)
+        for instruction in function.instructions():
+            dest = instruction.dest
+            if dest is not None and dest not in self.locations:
+                slots += 1
+                self.locations[dest] = f"[{self.regs['bp']} - {slots * self.word}]"
+        return slots * self.word
+
+    def _argument_slot(self, index: int) -> str:
+        # return address and saved ebp are above the arguments
+        return f"[{self.regs['bp']} + {(index + 2) * self.word}]"
+
+    def _label(self, label: str) -> str:
+        return f"{self._func_label}_{label}"
+
+    def _emit_block(self, block: BasicBlock, entry: bool) -> None:
+        if not entry:
+            self._add(f"{self._label(block.label)}:")
+        for instruction in block.instructions:
+            getattr(self, f"_emit_{instruction.op}")(instruction)
+
+    @staticmethod
+    def _is_memory(location: str) -> bool:
+        return location.startswith("[")
+
+    @staticmethod
+    def _is_immediate(location: str) -> bool:
+        return location[0] == "-" or location[0].isdigit()
+
+    def _is_register(self, location: str) -> bool:
+        return not self._is_memory(location) and not self._is_immediate(location)
+
+    def _location(self, operand: Operand) -> str:
+        return str(operand.value) if isinstance(operand, Const) else self.locations[operand]
+
+    def _source(self, location: str) -> str:
+        """
+        Returns location as source operand of instruction, immediates which don't fit in 32 bits
+        are loaded to scratch register
+        """
+        if self._is_immediate(location) and not -2 ** 31 <= int(location) < 2 ** 31:
+            self._add(f"mov {self.regs['scratch']}, {location}")
+            return self.regs["scratch"]
+        return location
+
+    def _sized(self, location: str) -> str:
+        # size of memory operand is written if the other operand is not a register
+        return f"{self.size_ptr} {location}" if self._is_memory(location) else location
+
+    def _move(self, dest: str, source: str) -> None:
+        if dest == source:
+            return
+        if self._is_register(dest):
+            self._add(f"mov {dest}, {source}")
+        elif self._is_memory(source):
+            self._add(f"mov {self.regs['acc']}, {source}")
+            self._add(f"mov {dest}, {self.regs['acc']}")
+        elif self._is_immediate(source):
+            self._add(f"mov {self._sized(dest)}, {self._source(source)}")
+        else:
+            self._add(f"mov {dest}, {source}")
+
+    def _emit_mov(self, instruction: Instruction) -> None:
+        self._move(self.locations[instruction.dest], self._location(instruction.args[0]))
+
+    def _emit_param(self, instruction: Instruction) -> None:
+        self._move(self.locations[instruction.dest], self._argument_slot(instruction.args[0].value))
+
+    def _emit_binary(self, instruction: Instruction, code: str) -> None:
+        dest = self.locations[instruction.dest]
+        left, right = instruction.args
+        if instruction.op in COMMUTATIVE_OPS and (
+                isinstance(left, Const) and not isinstance(right, Const) or self._location(right) == dest):
+            left, right = right, left
+        left, right = self._location(left), self._location(right)
+        # result is computed in place if it doesn't overwrite the right operand
+        target = dest if self._is_register(dest) and dest != right else self.regs["acc"]
+        if code == "imul" and self._is_immediate(right) and not self._is_immediate(left) and \
+                -2 ** 31 <= int(right) < 2 ** 31:
+            self._add(f"imul {target}, {left}, {right}")
+        else:
+            self._move(target, left)
+            self._add(f"{code} {target}, {self._source(right)}")
+        self._move(dest, target)
+
+    def _emit_add(self, instruction: Instruction) -> None:
+        self._emit_binary(instruction, "add")
+
+    def _emit_sub(self, instruction: Instruction) -> None:
+        self._emit_binary(instruction, "sub")
+
+    def _emit_mul(self, instruction: Instruction) -> None:
+        left, right = instruction.args
+        if isinstance(left, Const):
+            left, right = right, left
+        # operand in memory is multiplied by imul, which reads it directly
+        if isinstance(left, Const) or not isinstance(right, Const) or right.value not in LEA_FACTORS or \
+                not self._is_register(self._location(left)):
+            self._emit_binary(instruction, "imul")
+            return
+        dest, source = self.locations[instruction.dest], self._location(left)
+        target = dest if self._is_register(dest) else self.regs["acc"]
+        self._add(f"lea {target}, [{source} + {source} * {right.value - 1}]")
+        self._move(dest, target)
+
+    def _emit_shl(self, instruction: Instruction) -> None:
+        self._emit_binary(instruction, "shl")
+
+    def _emit_sar(self, instruction: Instruction) -> None:
+        self._emit_binary(instruction, "sar")
+
+    def _emit_shr(self, instruction: Instruction) -> None:
+        self._emit_binary(instruction, "shr")
+
+    def _emit_and(self, instruction: Instruction) -> None:
+        self._emit_binary(instruction, "and")
+
+    def _emit_mulhi(self, instruction: Instruction) -> None:
+        # one operand imul stores the high half of the product to edx
+        left, right = map(self._location, instruction.args)
+        self._move(self.regs["acc"], left)
+        if self._is_immediate(right):
+            self._add(f"mov {self.regs['scratch']}, {right}")
+            right = self.regs["scratch"]
+        self._add(f"imul {self._sized(right)}")
+        self._move(self.locations[instruction.dest], self.regs["rem"])
+
+    def _emit_division(self, instruction: Instruction, result: str) -> None:
+        left, right = map(self._location, instruction.args)
+        self._move(self.regs["acc"], left)
+        if self._is_immediate(right):
+            self._add(f"mov {self.regs['scratch']}, {right}")
+            right = self.regs["scratch"]
+        self._add("cdq" if self.arch == 32 else "cqo")
+        self._add(f"idiv {self._sized(right)}")
+        self._move(self.locations[instruction.dest], result)
+
+    def _emit_div(self, instruction: Instruction) -> None:
+        self._emit_division(instruction, self.regs["acc"])
+
+    def _emit_mod(self, instruction: Instruction) -> None:
+        self._emit_division(instruction, self.regs["rem"])
+
+    def _emit_neg(self, instruction: Instruction) -> None:
+        dest = self.locations[instruction.dest]
+        source = self._location(instruction.args[0])
+        if self._is_register(dest) or dest == source:
+            self._move(dest, source)
+            self._add(f"neg {self._sized(dest)}")
+        else:
+            self._move(self.regs["acc"], source)
+            self._add(f"neg {self.regs['acc']}")
+            self._move(dest, self.regs["acc"])
+
+    def _emit_compare(self, instruction: Instruction) -> None:
+        self._compare(*instruction.args)
+        self._add(f"set{CONDITION_CODES[instruction.op]} al")
+        dest = self.locations[instruction.dest]
+        # writing of 32 bit register clears the upper half of 64 bit one
+        if self._is_register(dest):
+            self._add(f"movzx {LOW_DWORD[dest]}, al")
+        else:
+            self._add("movzx eax, al")
+            self._move(dest, self.regs["acc"])
+
+    _emit_eq = _emit_ne = _emit_lt = _emit_gt = _emit_le = _emit_ge = _emit_compare
+
+    def _emit_select(self, instruction: Instruction) -> None:
+        dest = self.locations[instruction.dest]
+        left, right, if_true, if_false = instruction.args
+        self._compare(left, right)
+        if_true, if_false = self._location(if_true), self._location(if_false)
+        # moves after the comparison don't change its flags
+        target = dest if self._is_register(dest) and dest != if_true else self.regs["acc"]
+        self._move(target, if_false)
+        if self._is_immediate(if_true):
+            self._add(f"mov {self.regs['scratch']}, {if_true}")
+            if_true = self.regs["scratch"]
+        self._add(f"cmov{CONDITION_CODES[instruction.cond]} {target}, {if_true}")
+        self._move(dest, target)
+
+    def _compare(self, left: Operand, right: Operand) -> None:
+        left, right = self._location(left), self._location(right)
+        if self._is_immediate(left) or self._is_memory(left) and not self._is_register(right):
+            self._move(self.regs["acc"], left)
+            left = self.regs["acc"]
+        self._add(f"cmp {left}, {self._source(right)}")
+
+    def _emit_call(self, instruction: Instruction) -> None:
+        for arg in reversed(instruction.args):
+            location = self._source(self._location(arg))
+            self._add(f"push {self._sized(location)}")
+        self._add(f"call {self.code_generator.func_label_wrapper(instruction.callee)}")
+        if instruction.dest is not None:
+            self._move(self.locations[instruction.dest], self.regs["acc"])
+
+    def _jump(self, label: str) -> None:
+        if label != self._next_label:
+            self._add(f"jmp {self._label(label)}")
+
+    def _emit_jmp(self, instruction: Instruction) -> None:
+        self._jump(instruction.targets[0])
+
+    def _emit_br(self, instruction: Instruction) -> None:
+        true_label, false_label = instruction.targets
+        self._compare(*instruction.args)
+        if true_label == self._next_label:
+            # jump if condition is false and fall through to the next block otherwise
+            self._add(f"j{CONDITION_CODES[NEGATED_COMPARE[instruction.cond]]} {self._label(false_label)}")
+            return
+        self._add(f"j{CONDITION_CODES[instruction.cond]} {self._label(true_label)}")
+        self._jump(false_label)
+
+    def _emit_ret(self, instruction: Instruction) -> None:
+        self._move(self.regs["acc"], self._location(instruction.args[0]))
+        if self._next_label is not None:
+            self._add(f"jmp {self._func_label}_pre_end")
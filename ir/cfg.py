@@ -0,0 +1,129 @@
+from collections import Counter
+from typing import Dict, List, Set
+
+from ir.ir import Function, VReg, CALL, JMP
+
+
+def predecessors_count(function: Function) -> Counter:
+    """
+    Returns counter of label: count of jumps to the block
+    """
+    return Counter(target for block in function.blocks for target in block.successors())
+
+
+def predecessors(function: Function) -> Dict[str, List[str]]:
+    """
+    Returns label: labels of blocks which jump to the block
+    """
+    result: Dict[str, List[str]] = {block.label: [] for block in function.blocks}
+    for block in function.blocks:
+        for target in block.successors():
+            result[target].append(block.label)
+    return result
+
+
+def reachable_labels(function: Function) -> Set[str]:
+    block_map = function.block_map()
+    reached = {function.blocks[0].label}
+    stack = [function.blocks[0].label]
+    while stack:
+        for target in block_map[stack.pop()].successors():
+            if target not in reached:
+                reached.add(target)
+                stack.append(target)
+    return reached
+
+
+def remove_unreachable_blocks(function: Function) -> bool:
+    reached = reachable_labels(function)
+    if len(reached) == len(function.blocks):
+        return False
+    function.blocks = [block for block in function.blocks if block.label in reached]
+    return True
+
+
+def merge_blocks(function: Function) -> bool:
+    """
+    Appends block to the block which jumps to it, if it is the only jump to the block
+    """
+    changed = False
+    counts = predecessors_count(function)
+    block_map = function.block_map()
+    entry = function.blocks[0].label
+    merged: Set[str] = set()
+    for block in function.blocks:
+        if block.label in merged:
+            continue
+        terminator = block.terminator
+        while terminator.op == JMP and terminator.targets[0] != entry and counts[terminator.targets[0]] == 1 \
+                and terminator.targets[0] != block.label:
+            successor = block_map[terminator.targets[0]]
+            block.instructions[-1:] = successor.instructions
+            merged.add(successor.label)
+            terminator = block.terminator
+            changed = True
+    if changed:
+        function.blocks = [block for block in function.blocks if block.label not in merged]
+    return changed
+
+
+def remove_unused_definitions(function: Function) -> bool:
+    """
+    Removes instructions whose results are never used, calls are kept for their side effects
+    """
+    changed = False
+    while True:
+        used: Set[VReg] = {arg for instruction in function.instructions() for arg in instruction.uses()}
+        removed = False
+        for block in function.blocks:
+            instructions = [instruction for instruction in block.instructions
+                            if instruction.dest is None or instruction.dest in used or instruction.op == CALL]
+            if len(instructions) != len(block.instructions):
+                block.instructions = instructions
+                removed = True
+        if not removed:
+            return changed
+        changed = True
+
+
+def dominators(function: Function) -> Dict[str, Set[str]]:
+    """
+    Returns label: labels of blocks which dominate the block, including itself, for blocks reachable from entry
+    """
+    reached = reachable_labels(function)
+    preds = predecessors(function)
+    labels = [block.label for block in function.blocks if block.label in reached]
+    entry = labels[0]
+    result: Dict[str, Set[str]] = {label: set(labels) for label in labels}
+    result[entry] = {entry}
+    changed = True
+    while changed:
+        changed = False
+        for label in labels[1:]:
+            dominating = set.intersection(*(result[pred] for pred in preds[label] if pred in reached)) | {label}
+            if dominating != result[label]:
+                result[label] = dominating
+                changed = True
+    return result
+
+
+def natural_loops(function: Function) -> Dict[str, Set[str]]:
+    """
+    Returns label of loop header: labels of blocks of the loop, including the header. Block jumps back to
+    the header of loop if the header dominates it, loops of all back edges to the same header are merged
+    """
+    dominating = dominators(function)
+    preds = predecessors(function)
+    loops: Dict[str, Set[str]] = {}
+    for block in function.blocks:
+        for header in block.successors():
+            if header not in dominating.get(block.label, ()):
+                continue
+            loop = loops.setdefault(header, {header})
+            stack = [block.label]
+            while stack:
+                label = stack.pop()
+                if label not in loop:
+                    loop.add(label)
+                    stack.extend(preds[label])
+    return loops
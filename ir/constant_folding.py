@@ -0,0 +1,141 @@
+from typing import Dict, List, Optional
+
+from ir.ir import Function, Instruction, VReg, Const, Operand, MOV, ADD, SUB, MUL, DIV, MOD, NEG, SHL, SAR, SHR, AND, \
+    MULHI, EQ, NE, LT, GT, LE, GE, SELECT, JMP, BR
+from ir.passes import Pass
+from ir.cfg import merge_blocks, remove_unreachable_blocks, remove_unused_definitions
+
+
+def wrap(value: int, bits: int) -> int:
+    """
+    Returns value truncated to signed integer of bits width, as it is kept in register
+    """
+    half = 1 << (bits - 1)
+    return (value + half) % (1 << bits) - half
+
+
+def truncating_div(left: int, right: int) -> int:
+    """
+    Division rounded towards zero, as idiv and C
+    """
+    quotient = abs(left) // abs(right)
+    return quotient if (left < 0) == (right < 0) else -quotient
+
+
+def evaluate(op: str, args: List[int], bits: int) -> Optional[int]:
+    """
+    Returns value of operation on constants, None if it should be left for runtime (division by zero and overflow
+    of division trap in idiv)
+    """
+    if op == NEG:
+        return wrap(-args[0], bits)
+    left, right = args
+    if op in (DIV, MOD):
+        if right == 0 or (left == -(1 << (bits - 1)) and right == -1):
+            return None
+        quotient = truncating_div(left, right)
+        # remainder has the sign of the dividend
+        return wrap(quotient if op == DIV else left - right * quotient, bits)
+    return COMPUTE[op](left, right, bits)
+
+
+# operation: value of operation on constants of bits width
+COMPUTE = {
+    ADD: lambda left, right, bits: wrap(left + right, bits),
+    SUB: lambda left, right, bits: wrap(left - right, bits),
+    MUL: lambda left, right, bits: wrap(left * right, bits),
+    SHL: lambda left, right, bits: wrap(left << right, bits),
+    SAR: lambda left, right, bits: left >> right,
+    SHR: lambda left, right, bits: wrap((left % (1 << bits)) >> right, bits),
+    AND: lambda left, right, bits: wrap(left & right, bits),
+    MULHI: lambda left, right, bits: wrap((left * right) >> bits, bits),
+    EQ: lambda left, right, bits: int(left == right),
+    NE: lambda left, right, bits: int(left != right),
+    LT: lambda left, right, bits: int(left < right),
+    GT: lambda left, right, bits: int(left > right),
+    LE: lambda left, right, bits: int(left <= right),
+    GE: lambda left, right, bits: int(left >= right),
+}
+
+FOLDABLE_OPS = set(COMPUTE) | {DIV, MOD, NEG}
+
+
+class ConstantFolding(Pass):
+    """
+    Evaluates operations on constants at compile time and propagates registers which hold known constants
+    through straight line code of each block. Branches on constants become jumps, so blocks which are not
+    reachable anymore are removed and chains of blocks are merged, which gives longer straight line code for
+    the next round. Definitions which are not used anymore are removed. Reports count of removed instructions
+    """
+
+    name = "constant-folding"
+    report = "{} instructions removed"
+
+    def __init__(self, bits: int = 32):
+        self.bits = bits
+
+    def run(self, function: Function) -> int:
+        count = sum(len(block.instructions) for block in function.blocks)
+        changed = True
+        while changed:
+            changed = False
+            for block in function.blocks:
+                changed |= self._fold_block(block.instructions)
+            changed |= remove_unreachable_blocks(function)
+            changed |= merge_blocks(function)
+            changed |= remove_unused_definitions(function)
+        return count - sum(len(block.instructions) for block in function.blocks)
+
+    def _fold_block(self, instructions: List[Instruction]) -> bool:
+        changed = False
+        # register: its constant value at the current instruction
+        known: Dict[VReg, Const] = {}
+        for index, instruction in enumerate(instructions):
+            args = [known.get(arg, arg) if isinstance(arg, VReg) else arg for arg in instruction.args]
+            if args != instruction.args:
+                instruction.args = args
+                changed = True
+
+            folded = self._fold(instruction)
+            if folded is not None:
+                instructions[index] = instruction = folded
+                changed = True
+
+            dest = instruction.dest
+            if dest is not None:
+                if instruction.op == MOV and isinstance(instruction.args[0], Const):
+                    known[dest] = instruction.args[0]
+                else:
+                    known.pop(dest, None)
+        return changed
+
+    def _fold(self, instruction: Instruction) -> Optional[Instruction]:
+        """
+        Returns instruction which replaces instruction with constant operands, None if it can't be folded
+        """
+        op = instruction.op
+        if op == BR:
+            if instruction.targets[0] == instruction.targets[1]:
+                return Instruction(JMP, targets=instruction.targets[:1])
+            if not all(isinstance(arg, Const) for arg in instruction.args):
+                return None
+            taken = evaluate(instruction.cond, self._values(instruction.args), self.bits)
+            return Instruction(JMP, targets=[instruction.targets[0 if taken else 1]])
+
+        if op == SELECT:
+            left, right, if_true, if_false = instruction.args
+            if not isinstance(left, Const) or not isinstance(right, Const):
+                return None
+            taken = evaluate(instruction.cond, self._values([left, right]), self.bits)
+            return Instruction(MOV, instruction.dest, [if_true if taken else if_false])
+
+        if op not in FOLDABLE_OPS or not all(isinstance(arg, Const) for arg in instruction.args):
+            return None
+        value = evaluate(op, self._values(instruction.args), self.bits)
+        if value is None:
+            return None
+        return Instruction(MOV, instruction.dest, [Const(value)])
+
+    def _values(self, args: List[Operand]) -> List[int]:
+        # constants of source which don't fit are truncated when they are loaded to register
+        return [wrap(arg.value, self.bits) for arg in args]
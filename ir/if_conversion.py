@@ -0,0 +1,97 @@
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from ir.cfg import merge_blocks, predecessors_count, remove_unreachable_blocks
+from ir.ir import Function, BasicBlock, Instruction, VReg, Const, Operand, MOV, ADD, SUB, MUL, NEG, SHL, SAR, SHR, \
+    AND, MULHI, SELECT, JMP, BR, COMPARE_OPS, NEGATED_COMPARE
+from ir.passes import Pass
+
+# operations of branches which are computed on both paths, they have no side effects and don't trap
+SPECULATED_OPS = (MOV, ADD, SUB, MUL, NEG, SHL, SAR, SHR, AND, MULHI, SELECT) + COMPARE_OPS
+# max count of instructions of a branch before its assignment
+MAX_BRANCH_SIZE = 4
+
+
+class IfConversion(Pass):
+    """
+    Replaces if/else whose branches only compute a value and assign it to the same register with select
+    of the value, which is emitted as conditional move, so data dependent conditions cost no mispredicted
+    branches. Both branches are computed before the select, so they must be short, have no side effects
+    and not trap, and their temporaries must not be used elsewhere. Select of 1 and 0 is the comparison itself
+    """
+
+    name = "if-conversion"
+    report = "{} branches replaced with selects"
+
+    def run(self, function: Function) -> int:
+        count = 0
+        while True:
+            block_map, jumps = function.block_map(), predecessors_count(function)
+            if not any(self._convert(function, block, block_map, jumps) for block in function.blocks):
+                return count
+            count += 1
+            # branches are not reachable anymore, the block is merged with the end of if/else
+            remove_unreachable_blocks(function)
+            merge_blocks(function)
+
+    def _convert(self, function: Function, block: BasicBlock, block_map: Dict[str, BasicBlock],
+                 jumps: Counter) -> bool:
+        """
+        Replaces if/else which starts with branch of block with select, returns True if it is replaced
+        """
+        branch = block.terminator
+        if branch is None or branch.op != BR or branch.targets[0] == branch.targets[1] or \
+                block.label in branch.targets:
+            return False
+        then_block, else_block = (block_map.get(target) for target in branch.targets)
+        if then_block is None or else_block is None:
+            return False
+        then_code, else_code = self._branch_code(then_block, jumps), self._branch_code(else_block, jumps)
+        if then_code is None or else_code is None:
+            return False
+        then_assignment, else_assignment = then_code[-2], else_code[-2]
+        end = then_code[-1].targets[0]
+        if else_code[-1].targets[0] != end or then_assignment.dest is not else_assignment.dest or \
+                end in branch.targets:
+            return False
+        temporaries = {instruction.dest for instruction in then_code[:-2] + else_code[:-2]}
+        if then_assignment.dest in temporaries or \
+                self._used_outside(function, temporaries, (then_block.label, else_block.label)):
+            return False
+
+        block.instructions[-1:] = then_code[:-2] + else_code[:-2] + [
+            self._select(branch, then_assignment.dest, then_assignment.args[0], else_assignment.args[0]),
+            Instruction(JMP, targets=[end]),
+        ]
+        return True
+
+    @staticmethod
+    def _branch_code(block: BasicBlock, jumps: Counter) -> Optional[List[Instruction]]:
+        """
+        Returns instructions of branch block if it has the only jump to it, computes value of temporaries
+        by speculated operations, moves it to a register and jumps to the end of if/else, otherwise None
+        """
+        instructions = block.instructions
+        if jumps[block.label] != 1 or len(instructions) < 2 or len(instructions) > MAX_BRANCH_SIZE + 2:
+            return None
+        *code, assignment, jump = instructions
+        if jump.op != JMP or assignment.op != MOV:
+            return None
+        if any(instruction.op not in SPECULATED_OPS or instruction.dest.name is not None for instruction in code):
+            return None
+        return instructions
+
+    @staticmethod
+    def _used_outside(function: Function, registers: Set[VReg], labels: Tuple[str, str]) -> bool:
+        return bool(registers) and any(use in registers for block in function.blocks if block.label not in labels
+                                       for instruction in block.instructions for use in instruction.uses())
+
+    @staticmethod
+    def _select(branch: Instruction, dest: VReg, if_true: Operand, if_false: Operand) -> Instruction:
+        if if_true == if_false:
+            return Instruction(MOV, dest, [if_true])
+        if if_true == Const(1) and if_false == Const(0):
+            return Instruction(branch.cond, dest, list(branch.args))
+        if if_true == Const(0) and if_false == Const(1):
+            return Instruction(NEGATED_COMPARE[branch.cond], dest, list(branch.args))
+        return Instruction(SELECT, dest, branch.args + [if_true, if_false], cond=branch.cond)
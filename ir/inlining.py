@@ -0,0 +1,151 @@
+from collections import Counter
+from typing import Dict, List, Set
+
+from ir.ir import Module, Function, BasicBlock, Instruction, VReg, Operand, MOV, PARAM, CALL, JMP, RET
+from ir.passes import Pass
+
+# max count of instructions of inlined function, without its params
+INLINE_THRESHOLD = 24
+
+
+def recursive_functions(functions: Dict[str, Function]) -> Set[str]:
+    """
+    Returns names of functions which may call themselves through calls of other functions of module
+    """
+    calls = {name: {instruction.callee for instruction in function.instructions() if instruction.op == CALL}
+             for name, function in functions.items()}
+    recursive = set()
+    for name in functions:
+        stack = list(calls[name])
+        visited = set()
+        while stack:
+            callee = stack.pop()
+            if callee == name:
+                recursive.add(name)
+                break
+            if callee in visited or callee not in calls:
+                continue
+            visited.add(callee)
+            stack.extend(calls[callee])
+    return recursive
+
+
+class Inlining(Pass):
+    """
+    Replaces calls of small functions of module with copies of their bodies. Function is inlined if it is
+    not recursive and has at most threshold instructions. Params of the copy are moves of call arguments,
+    each return moves its value to the result of call and jumps to the block which continues the caller
+    after the call. Copies are made of callee bodies as they are before the pass, so calls in the inlined
+    copy are not inlined again and code grows linearly with depth of calls. Inlined functions are reported
+    with count of their inlined calls
+    """
+
+    name = "inlining"
+    report = "{} calls inlined"
+
+    def __init__(self, threshold: int = INLINE_THRESHOLD):
+        self.threshold = threshold
+        # name: copy of function which can be inlined, made before calls are inlined into it
+        self.callees: Dict[str, Function] = {}
+        self.inlined: Counter = Counter()
+
+    def start(self, module: Module) -> None:
+        self.inlined = Counter()
+        functions: Dict[str, Function] = {}
+        defined_twice = set()
+        for function in module.functions:
+            if function.name in functions:
+                defined_twice.add(function.name)
+            functions[function.name] = function
+        recursive = recursive_functions(functions)
+        self.callees = {name: self._snapshot(function) for name, function in functions.items()
+                        if name not in recursive and name not in defined_twice and
+                        sum(instruction.op != PARAM for instruction in function.instructions()) <= self.threshold}
+
+    @staticmethod
+    def _snapshot(function: Function) -> Function:
+        """
+        Returns copy of blocks and instructions of function, which are not changed by passes run on function
+        """
+        snapshot = Function(function.name, function.params)
+        for block in function.blocks:
+            snapshot_block = BasicBlock(block.label)
+            snapshot_block.instructions = [
+                Instruction(instruction.op, instruction.dest, list(instruction.args), list(instruction.targets),
+                            instruction.cond, instruction.callee)
+                for instruction in block.instructions
+            ]
+            snapshot.blocks.append(snapshot_block)
+        return snapshot
+
+    def details(self) -> Dict[str, int]:
+        return dict(self.inlined)
+
+    def run(self, function: Function) -> int:
+        count = 0
+        index = 0
+        while index < len(function.blocks):
+            block = function.blocks[index]
+            position = next((i for i, instruction in enumerate(block.instructions) if self._inlinable(instruction)),
+                            None)
+            if position is None:
+                index += 1
+                continue
+            # the next block to look for calls is the continuation of the caller, after the inlined blocks
+            index += self._inline(function, index, position) + 1
+            count += 1
+        return count
+
+    def _inlinable(self, instruction: Instruction) -> bool:
+        callee = self.callees.get(instruction.callee) if instruction.op == CALL else None
+        return callee is not None and len(callee.params) == len(instruction.args)
+
+    def _inline(self, function: Function, index: int, position: int) -> int:
+        """
+        Inlines call at position of block with index, returns count of inserted blocks of the callee
+        """
+        block = function.blocks[index]
+        call = block.instructions[position]
+        callee = self.callees[call.callee]
+        self.inlined[callee.name] += 1
+
+        continuation = function.new_block(f"{callee.name}_end")
+        continuation.instructions = block.instructions[position + 1:]
+        labels = {callee_block.label: function.new_block(f"{callee.name}_{callee_block.label}")
+                  for callee_block in callee.blocks}
+        block.instructions = block.instructions[:position]
+        block.instructions.append(Instruction(JMP, targets=[labels[callee.blocks[0].label].label]))
+
+        registers: Dict[VReg, VReg] = {}
+
+        def copy(operand: Operand) -> Operand:
+            if not isinstance(operand, VReg):
+                return operand
+            if operand not in registers:
+                name = f"{callee.name}.{operand.name}" if operand.name is not None else None
+                registers[operand] = function.new_vreg(name)
+            return registers[operand]
+
+        blocks: List[BasicBlock] = []
+        for callee_block in callee.blocks:
+            new_block = labels[callee_block.label]
+            for instruction in callee_block.instructions:
+                if instruction.op == PARAM:
+                    new_block.instructions.append(Instruction(MOV, copy(instruction.dest),
+                                                              [call.args[instruction.args[0].value]]))
+                elif instruction.op == RET:
+                    if call.dest is not None:
+                        new_block.instructions.append(Instruction(MOV, call.dest, [copy(instruction.args[0])]))
+                    new_block.instructions.append(Instruction(JMP, targets=[continuation.label]))
+                else:
+                    new_block.instructions.append(Instruction(
+                        instruction.op,
+                        copy(instruction.dest) if instruction.dest is not None else None,
+                        [copy(arg) for arg in instruction.args],
+                        [labels[target].label for target in instruction.targets],
+                        instruction.cond,
+                        instruction.callee,
+                    ))
+            blocks.append(new_block)
+        function.blocks[index + 1:index + 1] = blocks + [continuation]
+        return len(blocks)
@@ -0,0 +1,189 @@
+from typing import Dict, Iterator, List, Optional, Union
+
+# opcodes, dest = op args...
+MOV = "mov"
+ADD = "add"
+SUB = "sub"
+MUL = "mul"
+DIV = "div"  # truncating signed division, as idiv
+MOD = "mod"  # remainder of truncating signed division, has the sign of the dividend
+NEG = "neg"
+SHL = "shl"  # shift left by constant
+SAR = "sar"  # arithmetic shift right by constant
+SHR = "shr"  # logical shift right by constant
+AND = "and"
+MULHI = "mulhi"  # high word of signed double word product
+EQ = "eq"
+NE = "ne"
+LT = "lt"
+GT = "gt"
+LE = "le"
+GE = "ge"
+PARAM = "param"  # dest = argument with index args[0]
+CALL = "call"  # dest = callee(args...), dest may be None
+SELECT = "select"  # dest = args[2] if args[0] <cond> args[1], else args[3]
+# terminators
+JMP = "jmp"  # jump to targets[0]
+BR = "br"  # jump to targets[0] if args[0] <cond> args[1], else to targets[1]
+RET = "ret"  # return args[0]
+
+BINARY_OPS = (ADD, SUB, MUL, DIV, MOD, SHL, SAR, SHR, AND, MULHI)
+COMPARE_OPS = (EQ, NE, LT, GT, LE, GE)
+TERMINATORS = (JMP, BR, RET)
+
+# comparison: comparison with swapped operands
+SWAPPED_COMPARE = {EQ: EQ, NE: NE, LT: GT, GT: LT, LE: GE, GE: LE}
+# comparison: negated comparison
+NEGATED_COMPARE = {EQ: NE, NE: EQ, LT: GE, GE: LT, GT: LE, LE: GT}
+
+
+class VReg:
+    """
+    Virtual register, named for source variables and numbered for temporaries.
+    Registers are compared by identity, each function has its own registers
+    """
+
+    __slots__ = ("id", "name")
+
+    def __init__(self, id: int, name: Optional[str] = None):
+        self.id = id
+        self.name = name
+
+    def __repr__(self):
+        return f"%{self.name}" if self.name is not None else f"%t{self.id}"
+
+
+class Const:
+    __slots__ = ("value",)
+
+    def __init__(self, value: int):
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, Const) and other.value == self.value
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __repr__(self):
+        return str(self.value)
+
+
+Operand = Union[VReg, Const]
+
+
+class Instruction:
+    """
+    Three address instruction. Terminators keep labels of target blocks in targets,
+    br and select keep their comparison in cond, call keeps name of called function in callee
+    """
+
+    __slots__ = ("op", "dest", "args", "targets", "cond", "callee")
+
+    def __init__(self, op: str, dest: Optional[VReg] = None, args: Optional[List[Operand]] = None,
+                 targets: Optional[List[str]] = None, cond: Optional[str] = None, callee: Optional[str] = None):
+        self.op = op
+        self.dest = dest
+        self.args = args if args is not None else []
+        self.targets = targets if targets is not None else []
+        self.cond = cond
+        self.callee = callee
+
+    def is_terminator(self) -> bool:
+        return self.op in TERMINATORS
+
+    def uses(self) -> Iterator[VReg]:
+        return (arg for arg in self.args if isinstance(arg, VReg))
+
+    def __repr__(self):
+        args = ", ".join(map(repr, self.args))
+        if self.op == JMP:
+            return f"jmp {self.targets[0]}"
+        if self.op == BR:
+            return f"br {self.cond} {args} ? {self.targets[0]} : {self.targets[1]}"
+        if self.op == CALL:
+            text = f"call {self.callee}({args})"
+        elif self.op == SELECT:
+            left, right, if_true, if_false = self.args
+            text = f"select {self.cond} {left!r}, {right!r} ? {if_true!r} : {if_false!r}"
+        else:
+            text = f"{self.op} {args}"
+        return f"{self.dest!r} = {text}" if self.dest is not None else text
+
+
+class BasicBlock:
+    """
+    Straight line instructions, the last one is a terminator
+    """
+
+    __slots__ = ("label", "instructions")
+
+    def __init__(self, label: str):
+        self.label = label
+        self.instructions: List[Instruction] = []
+
+    @property
+    def terminator(self) -> Optional[Instruction]:
+        if self.instructions and self.instructions[-1].is_terminator():
+            return self.instructions[-1]
+        return None
+
+    def successors(self) -> List[str]:
+        terminator = self.terminator
+        return terminator.targets if terminator is not None else []
+
+    def __repr__(self):
+        return "\n".join([f"  {self.label}:"] + [f"    {instruction!r}" for instruction in self.instructions])
+
+
+class Function:
+    """
+    Function of IR, the first block is the entry block
+    """
+
+    def __init__(self, name: str, params: List[str]):
+        self.name = name
+        self.params = params
+        self.blocks: List[BasicBlock] = []
+        # name: register of source variable
+        self.variables: Dict[str, VReg] = {}
+        self._vregs_count = 0
+        self._labels_count = 0
+
+    def new_vreg(self, name: Optional[str] = None) -> VReg:
+        self._vregs_count += 1
+        return VReg(self._vregs_count, name)
+
+    def new_block(self, hint: str) -> BasicBlock:
+        """
+        Creates block with unique label made of hint, block is not added to the function
+        """
+        self._labels_count += 1
+        return BasicBlock(f"{hint}_{self._labels_count}")
+
+    def block_map(self) -> Dict[str, BasicBlock]:
+        return {block.label: block for block in self.blocks}
+
+    def instructions(self) -> Iterator[Instruction]:
+        for block in self.blocks:
+            yield from block.instructions
+
+    def __repr__(self):
+        return "\n".join([f"function {self.name}({', '.join(self.params)}):"] + list(map(repr, self.blocks)))
+
+
+class Module:
+    """
+    Program in IR: functions and top level calls in the order of the source.
+    Top level calls have only constant arguments, the result of the last one is the result of program
+    """
+
+    def __init__(self):
+        self.items: List[Union[Function, Instruction]] = []
+
+    @property
+    def functions(self) -> List[Function]:
+        return [item for item in self.items if isinstance(item, Function)]
+
+    def __repr__(self):
+        return "\n\n".join(map(repr, self.items)) + "\n"
@@ -0,0 +1,89 @@
+from collections import Counter
+from typing import List, Set
+
+from ir.cfg import merge_blocks, natural_loops
+from ir.ir import Function, Instruction, VReg, MOV, ADD, SUB, MUL, NEG, SHL, SAR, SHR, AND, MULHI, SELECT, JMP, \
+    COMPARE_OPS
+from ir.passes import Pass
+from ir.regalloc import liveness
+
+# operations which can't trap and have no side effects, division traps on zero, so it is never hoisted
+HOISTABLE_OPS = (MOV, ADD, SUB, MUL, NEG, SHL, SAR, SHR, AND, MULHI, SELECT) + COMPARE_OPS
+
+
+class LoopInvariantCodeMotion(Pass):
+    """
+    Moves instructions whose operands don't change in loop to a preheader block, which is run once before
+    the loop. Instruction is invariant if its operands are constants or registers which are not assigned in
+    the loop or are assigned by hoisted instructions. Its result must be assigned only by it in the loop and
+    must not be live at the start of the loop or after its exits, so it has the same value in the loop
+    and the loop may be run zero times. Inner loops are processed first, so instructions may be hoisted
+    through several preheaders, empty preheaders are merged with blocks which jump to them
+    """
+
+    name = "loop-invariant-code-motion"
+    report = "{} instructions hoisted"
+
+    def run(self, function: Function) -> int:
+        # instructions hoisted from inner loops may be hoisted again from outer ones
+        hoisted_ids: Set[int] = set()
+        loops = sorted(natural_loops(function).items(), key=lambda loop: len(loop[1]))
+        for header, loop in loops:
+            if header == function.blocks[0].label:
+                continue
+            hoisted = self._hoist(function, header, loop)
+            if hoisted:
+                preheader = self._add_preheader(function, header, loop, hoisted)
+                # preheader of inner loop is inside of outer loops
+                for other_header, other_loop in loops:
+                    if other_header != header and header in other_loop:
+                        other_loop.add(preheader)
+                hoisted_ids.update(map(id, hoisted))
+        if hoisted_ids:
+            # preheaders left empty by hoisting from outer loops
+            merge_blocks(function)
+        return len(hoisted_ids)
+
+    @staticmethod
+    def _hoist(function: Function, header: str, loop: Set[str]) -> List[Instruction]:
+        """
+        Removes invariant instructions from blocks of loop, returns them in order of execution
+        """
+        live_in = liveness(function)
+        blocks = [block for block in function.blocks if block.label in loop]
+        exits = {target for block in blocks for target in block.successors() if target not in loop}
+        # registers which may not be assigned before the loop
+        live: Set[VReg] = live_in[header].union(*(live_in[label] for label in exits))
+        assignments = Counter(instruction.dest for block in blocks for instruction in block.instructions
+                              if instruction.dest is not None)
+
+        hoisted: List[Instruction] = []
+        changed = True
+        while changed:
+            changed = False
+            for block in blocks:
+                kept = []
+                for instruction in block.instructions:
+                    if instruction.op in HOISTABLE_OPS and assignments[instruction.dest] == 1 and \
+                            instruction.dest not in live and not any(assignments[arg] for arg in instruction.uses()):
+                        hoisted.append(instruction)
+                        assignments[instruction.dest] = 0
+                        changed = True
+                    else:
+                        kept.append(instruction)
+                block.instructions = kept
+        return hoisted
+
+    @staticmethod
+    def _add_preheader(function: Function, header: str, loop: Set[str], hoisted: List[Instruction]) -> str:
+        """
+        Inserts block with hoisted instructions before header, jumps to header from outside of loop go to it
+        """
+        preheader = function.new_block("preheader")
+        preheader.instructions = hoisted + [Instruction(JMP, targets=[header])]
+        for block in function.blocks:
+            if block.label not in loop:
+                terminator = block.terminator
+                terminator.targets = [preheader.label if target == header else target for target in terminator.targets]
+        function.blocks.insert(next(i for i, block in enumerate(function.blocks) if block.label == header), preheader)
+        return preheader.label
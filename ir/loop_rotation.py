@@ -0,0 +1,38 @@
+from ir.cfg import natural_loops
+from ir.ir import Function, Instruction, JMP, BR
+from ir.passes import Pass
+
+# max count of instructions of loop test, which is copied to the end of each iteration
+MAX_TEST_SIZE = 8
+
+
+class LoopRotation(Pass):
+    """
+    Moves test of while loop to the bottom: jumps back to the loop header are replaced with a copy of its test,
+    which branches to the body or leaves the loop, so an iteration runs one branch instead of the test and
+    the jump back. The header is left as the guard, which is run once before the first iteration.
+    Header is rotated if it ends with branch to the loop and out of it and its test is short
+    """
+
+    name = "loop-rotation"
+    report = "{} loops rotated"
+
+    def run(self, function: Function) -> int:
+        count = 0
+        block_map = function.block_map()
+        for header, loop in natural_loops(function).items():
+            test = block_map[header].instructions
+            branch = test[-1]
+            if branch.op != BR or len(test) > MAX_TEST_SIZE or \
+                    sum(target in loop for target in branch.targets) != 1:
+                continue
+            latches = [block_map[label] for label in loop
+                       if block_map[label].terminator.op == JMP and block_map[label].terminator.targets == [header]]
+            for latch in latches:
+                latch.instructions[-1:] = [
+                    Instruction(instruction.op, instruction.dest, list(instruction.args), list(instruction.targets),
+                                instruction.cond, instruction.callee)
+                    for instruction in test
+                ]
+            count += bool(latches)
+        return count
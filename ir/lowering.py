@@ -0,0 +1,301 @@
+from typing import List, Optional, Type
+
+from exceptions.my_exceptions import NoVisitMethodException, NoSuchVariableException, InvalidSyntaxException
+from ir.ir import Module, Function, BasicBlock, Instruction, VReg, Const, Operand, MOV, ADD, SUB, MUL, DIV, MOD, \
+    NEG, EQ, NE, LT, GT, LE, GE, PARAM, CALL, JMP, BR, RET
+from lexer.my_token import Token
+from my_parser.AST import AST, ProgramAST, FunctionAST, FunctionCallAST, StatementsListAST, AssignExpAST, IdAST, \
+    CondStatementAST, WhileStatementAST, BreakStatementAST, ContinueStatementAST, ReturnStatementAST, BinOpAST, \
+    CompOpAST, UnOpAST, NumAST, DecimalAST, BinaryAST, HexAST, StringAST
+
+
+class Lowering:
+    """
+    Lowers ProgramAST to IR Module.
+    Source variables become named virtual registers of their function, values of expressions are
+    kept in temporary registers. Conditions of if/while branch on value != 0, or is short circuit
+    """
+
+    # operation: opcode
+    OPS = {
+        Token.OPERATIONS["PLUS"]: ADD,
+        Token.OPERATIONS["MINUS"]: SUB,
+        Token.OPERATIONS["MUL"]: MUL,
+        Token.OPERATIONS["DIV"]: DIV,
+        Token.OPERATIONS["MOD"]: MOD,
+        Token.OPERATIONS["EQ"]: EQ,
+        Token.OPERATIONS["NEQ"]: NE,
+        Token.OPERATIONS["LS"]: LT,
+        Token.OPERATIONS["GR"]: GT,
+        Token.OPERATIONS["LSE"]: LE,
+        Token.OPERATIONS["GRE"]: GE,
+    }
+
+    def __init__(self, ast: ProgramAST):
+        self.ast = ast
+        self.module = Module()
+        self.function: Optional[Function] = None
+        self.block: Optional[BasicBlock] = None
+        # (continue target, break target) of enclosing loops
+        self.loops: List[tuple] = []
+
+    def lower(self) -> Module:
+        self._visit(self.ast)
+        return self.module
+
+    def _visit_exception(self, node) -> None:
+        raise NoVisitMethodException(f"No _visit_{type(node).__name__} method")
+
+    def _visit(self, node: Type[AST]):
+        method_name = "_visit_" + type(node).__name__
+        visitor = getattr(self, method_name, self._visit_exception)
+        return visitor(node)
+
+    def _emit(self, instruction: Instruction) -> Instruction:
+        if self.block is None:
+            # code after return, break or continue is not reachable
+            self._start_block(self.function.new_block("dead"))
+        self.block.instructions.append(instruction)
+        return instruction
+
+    def _start_block(self, block: BasicBlock) -> None:
+        """
+        Appends block to the function, the current block falls through to it if it has no terminator
+        """
+        if self.block is not None and self.block.terminator is None:
+            self.block.instructions.append(Instruction(JMP, targets=[block.label]))
+        self.function.blocks.append(block)
+        self.block = block
+
+    def _jump(self, block: BasicBlock) -> None:
+        if self.block is not None:
+            self._emit(Instruction(JMP, targets=[block.label]))
+
+    def _terminate(self, instruction: Instruction) -> None:
+        """
+        Emits terminator, statements after it are emitted to a new block which is not reachable
+        """
+        self._emit(instruction)
+        self.block = None
+
+    def _visit_ProgramAST(self, node: ProgramAST) -> None:
+        for statement in node.hl_statements:
+            if isinstance(statement, FunctionAST):
+                self.module.items.append(self._visit(statement))
+            else:
+                # top level calls have no function, only constant arguments are allowed
+                self.module.items.append(Instruction(
+                    CALL, args=[self._call_arg(arg) for arg in statement.args or []], callee=statement.func_id.value
+                ))
+
+    def _visit_FunctionAST(self, node: FunctionAST) -> Function:
+        function = Function(node.func_id.value, [arg.value for arg in node.func_args])
+        self.function = function
+        self.block = None
+        self._start_block(function.new_block("entry"))
+        for index, name in enumerate(function.params):
+            function.variables[name] = function.new_vreg(name)
+            self._emit(Instruction(PARAM, function.variables[name], [Const(index)]))
+
+        self._visit(node.statement_list)
+        # function without return at the end returns 0
+        if self.block is not None and self.block.terminator is None:
+            self._emit(Instruction(RET, args=[Const(0)]))
+
+        self.function = None
+        self.block = None
+        return function
+
+    def _visit_StatementsListAST(self, node: StatementsListAST) -> None:
+        for child in node.children:
+            self._visit(child)
+
+    def _visit_AssignExpAST(self, node: AssignExpAST) -> None:
+        value = self._expression(node.exp)
+        var_id = node.var_id.value
+        variable = self.function.variables.get(var_id)
+        if variable is None:
+            variable = self.function.variables[var_id] = self.function.new_vreg(var_id)
+        self._emit(Instruction(MOV, variable, [value]))
+
+    def _visit_CondStatementAST(self, node: CondStatementAST) -> None:
+        then_block = self.function.new_block("if_then")
+        else_block = self.function.new_block("if_else")
+        end_block = self.function.new_block("if_end")
+
+        self._branch(node.cond, then_block, else_block)
+        self._start_block(then_block)
+        self._visit(node.node_if)
+        self._jump(end_block)
+        self._start_block(else_block)
+        self._visit(node.node_else)
+        self._start_block(end_block)
+
+    def _visit_WhileStatementAST(self, node: WhileStatementAST) -> None:
+        cond_block = self.function.new_block("while_cond")
+        body_block = self.function.new_block("while_body")
+        end_block = self.function.new_block("while_end")
+
+        self._start_block(cond_block)
+        self._branch(node.cond, body_block, end_block)
+        self._start_block(body_block)
+        self.loops.append((cond_block.label, end_block.label))
+        self._visit(node.while_body)
+        self.loops.pop()
+        self._jump(cond_block)
+        self._start_block(end_block)
+
+    def _visit_BreakStatementAST(self, node: BreakStatementAST) -> None:
+        if not self.loops:
+            raise InvalidSyntaxException("Statement break should be used inside of a loop")
+        self._terminate(Instruction(JMP, targets=[self.loops[-1][1]]))
+
+    def _visit_ContinueStatementAST(self, node: ContinueStatementAST) -> None:
+        if not self.loops:
+            raise InvalidSyntaxException("Statement continue should be used inside of a loop")
+        self._terminate(Instruction(JMP, targets=[self.loops[-1][0]]))
+
+    def _visit_ReturnStatementAST(self, node: ReturnStatementAST) -> None:
+        self._terminate(Instruction(RET, args=[self._expression(node.exp)]))
+
+    def _branch(self, cond: Type[AST], true_block: BasicBlock, false_block: BasicBlock) -> None:
+        """
+        Emits jump to true_block if value of cond is not 0, otherwise to false_block.
+        Conditions are lowered for control flow, 0/1 value is not computed: comparison becomes br with its
+        operation, or jumps to true_block if its left operand is true, otherwise evaluates the right one
+        in a new block, negation is true if its operand is. Chains of or are walked with explicit stack
+        """
+        # (condition, label if true, label if false, block which is started before condition)
+        stack: List[tuple] = [(cond, true_block.label, false_block.label, None)]
+        while stack:
+            node, true_label, false_label, block = stack.pop()
+            if block is not None:
+                self._start_block(block)
+
+            if isinstance(node, (BinOpAST, CompOpAST)) and node.op.value == Token.OPERATIONS["OR"]:
+                right_block = self.function.new_block("or_right")
+                stack.append((node.right, true_label, false_label, right_block))
+                stack.append((node.left, true_label, right_block.label, None))
+
+            elif isinstance(node, UnOpAST):
+                stack.append((node.right, true_label, false_label, None))
+
+            elif isinstance(node, CompOpAST):
+                left, right = self._expression(node.left), self._expression(node.right)
+                self._emit(Instruction(BR, args=[left, right], targets=[true_label, false_label],
+                                       cond=self.OPS[node.op.value]))
+
+            else:
+                value = self._expression(node)
+                self._emit(Instruction(BR, args=[value, Const(0)], targets=[true_label, false_label], cond=NE))
+
+    def _expression(self, node: Type[AST]) -> Operand:
+        """
+        Lowers expression tree in post order with explicit stack, returns operand with its value.
+        Stack contains nodes and callbacks, which are called with values of operands
+        """
+        values: List[Operand] = []
+        stack = [node]
+        while stack:
+            item = stack.pop()
+            if callable(item):
+                item(values)
+
+            elif isinstance(item, (BinOpAST, CompOpAST)):
+                if item.op.value == Token.OPERATIONS["OR"]:
+                    self._logical_or(item, stack)
+                    continue
+                stack.append(self._binary_callback(self.OPS[item.op.value]))
+                stack.append(item.right)
+                stack.append(item.left)
+
+            elif isinstance(item, UnOpAST):
+                stack.append(self._negation_callback)
+                stack.append(item.right)
+
+            else:
+                values.append(self._visit(item))
+
+        return values.pop()
+
+    def _binary_callback(self, op: str):
+        def emit(values: List[Operand]) -> None:
+            right = values.pop()
+            left = values.pop()
+            dest = self.function.new_vreg()
+            self._emit(Instruction(op, dest, [left, right]))
+            values.append(dest)
+        return emit
+
+    def _negation_callback(self, values: List[Operand]) -> None:
+        dest = self.function.new_vreg()
+        self._emit(Instruction(NEG, dest, [values.pop()]))
+        values.append(dest)
+
+    def _logical_or(self, node: BinOpAST, stack: list) -> None:
+        """
+        Pushes work of short circuit or: right operand is evaluated only if the left one is 0.
+        The result is 1 if any operand is not 0, otherwise 0
+        """
+        dest = self.function.new_vreg()
+        right_block = self.function.new_block("or_right")
+        true_block = self.function.new_block("or_true")
+        end_block = self.function.new_block("or_end")
+
+        def after_left(values: List[Operand]) -> None:
+            self._emit(Instruction(BR, args=[values.pop(), Const(0)], targets=[true_block.label, right_block.label],
+                                   cond=NE))
+            self._start_block(right_block)
+
+        def after_right(values: List[Operand]) -> None:
+            self._emit(Instruction(NE, dest, [values.pop(), Const(0)]))
+            self._emit(Instruction(JMP, targets=[end_block.label]))
+            self._start_block(true_block)
+            self._emit(Instruction(MOV, dest, [Const(1)]))
+            self._start_block(end_block)
+            values.append(dest)
+
+        stack.append(after_right)
+        stack.append(node.right)
+        stack.append(after_left)
+        stack.append(node.left)
+
+    def _visit_FunctionCallAST(self, node: FunctionCallAST) -> VReg:
+        dest = self.function.new_vreg()
+        self._emit(Instruction(CALL, dest, [self._call_arg(arg) for arg in node.args or []],
+                               callee=node.func_id.value))
+        return dest
+
+    def _call_arg(self, token: Token) -> Operand:
+        if token.tok_type == Token.ID:
+            return self._variable(token.value)
+        return Const(self._number(token.tok_type, token.value))
+
+    def _variable(self, var_id: str) -> VReg:
+        variable = self.function.variables.get(var_id) if self.function is not None else None
+        if variable is None:
+            raise NoSuchVariableException(f"No such variable {var_id}")
+        return variable
+
+    def _visit_IdAST(self, node: IdAST) -> VReg:
+        return self._variable(node.var_id)
+
+    def _visit_DecimalAST(self, node: NumAST) -> Const:
+        return Const(self._number(Token.NUMBER_DECIMAL, node.value))
+
+    def _visit_BinaryAST(self, node: NumAST) -> Const:
+        return Const(self._number(Token.NUMBER_BINARY, node.value))
+
+    def _visit_HexAST(self, node: NumAST) -> Const:
+        return Const(self._number(Token.NUMBER_HEX, node.value))
+
+    def _visit_StringAST(self, node: StringAST) -> Const:
+        # strings have no value in generated code
+        return Const(0)
+
+    @staticmethod
+    def _number(tok_type, value: str) -> int:
+        if tok_type == Token.NUMBER_DECIMAL:
+            # assembler reads decimal numbers with leading zero as octal
+            return int(value, 8) if len(value) > 1 and value[0] == "0" else int(value)
+        return int(value, 0)
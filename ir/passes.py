@@ -0,0 +1,82 @@
+from typing import Dict, List
+
+from exceptions.my_exceptions import InvalidIRException
+from ir.ir import Module, Function
+
+
+class Pass:
+    """
+    Optimisation pass, which transforms one function in place
+    """
+
+    name = "pass"
+    # line of compile report, formatted with count of changes
+    report = "{} changes"
+
+    def start(self, module: Module) -> None:
+        """
+        Called before the pass runs on functions of module, passes which need other functions look at them here
+        """
+
+    def run(self, function: Function) -> int:
+        """
+        Returns count of changes made in function, it is reported by PassManager
+        """
+        raise NotImplementedError
+
+    def details(self) -> Dict[str, int]:
+        """
+        Returns counts of changes by their subject, they are reported after the count of all changes
+        """
+        return {}
+
+
+class PassManager:
+    """
+    Runs passes on each function of module in the given order. IR is verified before the first pass
+    and after each pass, so broken pass is reported by its name
+    """
+
+    def __init__(self, passes: List[Pass], verify: bool = True):
+        self.passes = passes
+        self.verify = verify
+
+    def run(self, module: Module) -> Dict[str, int]:
+        """
+        Returns count of changes made by each pass
+        """
+        stats = {ir_pass.name: 0 for ir_pass in self.passes}
+        for ir_pass in self.passes:
+            ir_pass.start(module)
+        for function in module.functions:
+            if self.verify:
+                verify_function(function, "lowering")
+            for ir_pass in self.passes:
+                stats[ir_pass.name] += ir_pass.run(function)
+                if self.verify:
+                    verify_function(function, ir_pass.name)
+        for ir_pass in self.passes:
+            stats.update((f"{ir_pass.name} {subject}", count) for subject, count in ir_pass.details().items())
+        return stats
+
+
+def verify_function(function: Function, after: str = "") -> None:
+    """
+    Checks that function has entry block, each block ends with the only terminator and jumps to existing blocks
+    """
+    where = f" after {after}" if after else ""
+    if not function.blocks:
+        raise InvalidIRException(f"Function {function.name} has no blocks{where}")
+    labels = set()
+    for block in function.blocks:
+        if block.label in labels:
+            raise InvalidIRException(f"Block {block.label} of {function.name} is defined twice{where}")
+        labels.add(block.label)
+    for block in function.blocks:
+        if block.terminator is None:
+            raise InvalidIRException(f"Block {block.label} of {function.name} has no terminator{where}")
+        if any(instruction.is_terminator() for instruction in block.instructions[:-1]):
+            raise InvalidIRException(f"Block {block.label} of {function.name} has terminator in the middle{where}")
+        for target in block.successors():
+            if target not in labels:
+                raise InvalidIRException(f"Block {block.label} of {function.name} jumps to unknown {target}{where}")
@@ -0,0 +1,121 @@
+from typing import Dict, List, Optional
+
+from code_generator.code_generator import CodeGenerator
+from code_generator.interpeter import Interpreter
+from code_generator.peephole import Peephole
+from ir.backend import Backend
+from ir.constant_folding import ConstantFolding
+from ir.if_conversion import IfConversion
+from ir.inlining import Inlining, INLINE_THRESHOLD
+from ir.ir import Module
+from ir.licm import LoopInvariantCodeMotion
+from ir.loop_rotation import LoopRotation
+from ir.lowering import Lowering
+from ir.passes import Pass, PassManager
+from ir.reachability import Reachability, REMOVED_KINDS
+from ir.strength_reduction import StrengthReduction
+from ir.tail_calls import TailCallElimination
+from ir.unrolling import LoopUnrolling, UNROLL_FACTOR, UNROLLED_KINDS
+from my_parser.AST import ProgramAST
+
+# ir: tree is lowered to IR, optimised and emitted by backend, direct: Interpreter emits code from tree
+CODEGENS = ("ir", "direct")
+# 0: no optimisation, each virtual register is kept in frame slot,
+# 1: optimisation passes, register allocation and peephole optimisation of emitted code, loops have the test
+# at the bottom, 2: as 1, counted loops are unrolled, function entries and loop heads are aligned to LOOP_ALIGNMENT
+OPT_LEVELS = (0, 1, 2)
+# log2 of alignment of function entries and loop heads in bytes
+LOOP_ALIGNMENT = 4
+
+
+def default_passes(arch: int, opt_level: int = 0, inline_threshold: int = INLINE_THRESHOLD) -> List[Pass]:
+    if opt_level == 0:
+        return []
+    return [Inlining(inline_threshold), TailCallElimination(), ConstantFolding(arch), StrengthReduction(arch),
+            IfConversion(), LoopInvariantCodeMotion(), LoopRotation()]
+
+
+class Pipeline:
+    """
+    Code generation from program tree for arch. With ir codegen the module of the last generate call is kept
+    in module. Counts of changes made by passes and hits of peephole rules are kept in stats, direct codegen
+    is optimised only by peephole and by removal of unreachable code from tree, which both codegens share.
+    Tree is the whole program unless whole_program is unset, then its functions are never removed.
+    Functions of at most inline_threshold instructions are inlined by default passes, counted loops are unrolled
+    by unroll_factor
+    """
+
+    def __init__(self, arch: int, codegen: str = "ir", passes: Optional[List[Pass]] = None, opt_level: int = 0,
+                 whole_program: bool = True, inline_threshold: int = INLINE_THRESHOLD,
+                 unroll_factor: int = UNROLL_FACTOR):
+        if codegen not in CODEGENS:
+            raise ValueError(f"Unknown codegen {codegen}, expected one of {', '.join(CODEGENS)}")
+        self.arch = arch
+        self.codegen = codegen
+        self.opt_level = opt_level
+        self.whole_program = whole_program
+        self.unroll_factor = unroll_factor
+        self.passes = default_passes(arch, opt_level, inline_threshold) if passes is None else passes
+        self.module: Optional[Module] = None
+        self.stats: Dict[str, int] = {}
+
+    @property
+    def native(self) -> bool:
+        """
+        True if generated code is native for arch, otherwise it is 32 bit code converted when it is written
+        """
+        return self.codegen == "ir" or self.opt_level >= 1
+
+    def generate(self, ast: ProgramAST) -> CodeGenerator:
+        stats = {}
+        if self.opt_level >= 1:
+            reachability = Reachability(self.arch, self.whole_program)
+            ast = reachability.run(ast)
+            stats.update((f"{reachability.name} {kind}", count) for kind, count in reachability.stats.items())
+        if self.opt_level >= 2:
+            unrolling = LoopUnrolling(self.arch, self.unroll_factor)
+            ast = unrolling.run(ast)
+            stats.update((f"{unrolling.name} {kind}", count) for kind, count in unrolling.stats.items())
+
+        if self.codegen == "direct":
+            interpreter = Interpreter(ast, tail_calls=self.opt_level >= 1, rotate_loops=self.opt_level >= 1,
+                                      conditional_moves=self.opt_level >= 1)
+            interpreter._visit(ast)
+            code_generator = interpreter.code_generator
+        else:
+            self.module = Lowering(ast).lower()
+            stats.update(PassManager(self.passes).run(self.module))
+            code_generator = Backend(self.arch, allocate_registers=self.opt_level >= 1).emit(self.module)
+        self.stats = stats
+
+        if self.opt_level >= 1:
+            code_generator.to_native(self.arch)
+            peephole = Peephole()
+            code_generator.generated_code = peephole.run(code_generator.generated_code)
+            self.stats.update((f"peephole {name}", hits) for name, hits in peephole.hits.items())
+        if self.opt_level >= 2:
+            code_generator.align_labels(LOOP_ALIGNMENT)
+        return code_generator
+
+    def report(self, stats: Optional[Dict[str, int]] = None) -> List[str]:
+        """
+        Returns lines of compile report with changes made by each pass, of the last generate call by default
+        """
+        stats = self.stats if stats is None else stats
+        lines = []
+        if self.opt_level >= 1:
+            counts = {kind: stats.get(f"{Reachability.name} {kind}", 0) for kind in REMOVED_KINDS}
+            lines.append(f"{Reachability.name}: {Reachability.report.format(**counts)}")
+        if self.opt_level >= 2:
+            counts = {kind: stats.get(f"{LoopUnrolling.name} {kind}", 0) for kind in UNROLLED_KINDS}
+            lines.append(f"{LoopUnrolling.name}: {LoopUnrolling.report.format(**counts)}")
+        if self.codegen == "ir":
+            for ir_pass in self.passes:
+                lines.append(f"{ir_pass.name}: {ir_pass.report.format(stats.get(ir_pass.name, 0))}")
+                # changes by their subject
+                lines.extend(f"{name}: {count}" for name, count in sorted(stats.items())
+                             if name.startswith(f"{ir_pass.name} "))
+        if self.opt_level >= 1:
+            lines.extend(f"peephole {rule.name}: {stats.get(f'peephole {rule.name}', 0)} hits"
+                         for rule in Peephole().rules)
+        return lines
@@ -0,0 +1,160 @@
+from typing import Dict, List, Optional, Set, Tuple, Type
+
+from ir.constant_folding import evaluate, wrap
+from ir.ir import NEG
+from ir.lowering import Lowering
+from lexer.my_token import Token
+from my_parser.AST import AST, ProgramAST, FunctionAST, FunctionCallAST, StatementsListAST, \
+    CondStatementAST, WhileStatementAST, BreakStatementAST, ContinueStatementAST, ReturnStatementAST, BinOpAST, \
+    CompOpAST, UnOpAST, DecimalAST, BinaryAST, HexAST, iter_statements
+
+# number node: type of its token
+NUMBER_TOKENS = {DecimalAST: Token.NUMBER_DECIMAL, BinaryAST: Token.NUMBER_BINARY, HexAST: Token.NUMBER_HEX}
+
+# statements after which the rest of their statement list is never executed
+JUMP_STATEMENTS = (ReturnStatementAST, BreakStatementAST, ContinueStatementAST)
+
+# kinds of code counted in stats of Reachability
+REMOVED_KINDS = ("functions", "statements", "branches")
+
+
+def constant_value(node: Type[AST], bits: int) -> Optional[int]:
+    """
+    Returns value of expression made of numbers and operations on them, None if it is not constant.
+    Expression is evaluated in post order with explicit stack, operations are (opcode,) items
+    """
+    values: List[int] = []
+    stack: list = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, tuple):
+            op = item[0]
+            if op == NEG:
+                values.append(evaluate(NEG, [values.pop()], bits))
+                continue
+            right, left = values.pop(), values.pop()
+            value = int(bool(left or right)) if op == Token.OPERATIONS["OR"] else evaluate(op, [left, right], bits)
+            if value is None:
+                return None
+            values.append(value)
+        elif isinstance(item, UnOpAST):
+            stack.append((NEG,))
+            stack.append(item.right)
+        elif isinstance(item, (BinOpAST, CompOpAST)):
+            op = item.op.value
+            stack.append((op if op == Token.OPERATIONS["OR"] else Lowering.OPS[op],))
+            stack.append(item.right)
+            stack.append(item.left)
+        else:
+            token_type = next((NUMBER_TOKENS[base] for base in NUMBER_TOKENS if isinstance(item, base)), None)
+            if token_type is None:
+                return None
+            values.append(wrap(Lowering._number(token_type, item.value), bits))
+    return values[0]
+
+
+def called_functions(node: AST) -> Set[str]:
+    """
+    Returns names of functions called in statements and expressions of node
+    """
+    return {item.func_id.value for item in iter_statements(node, with_expressions=True)
+            if isinstance(item, FunctionCallAST)}
+
+
+class Reachability:
+    """
+    Removes code of program tree which is never executed, before code generation by either codegen:
+    functions which are not reachable in call graph from top level calls, statements after return,
+    break and continue, branches of if and loops whose conditions are constant.
+    Changed statement lists and their parents are new nodes, the rest of tree is shared with the given one,
+    so tree of arena views can be pruned too. Without whole_program the tree is a part of program,
+    whose functions may be called from other parts, so all of them are kept
+    """
+
+    name = "reachability"
+    report = "{functions} functions, {statements} statements, {branches} branches removed"
+
+    def __init__(self, bits: int = 32, whole_program: bool = True):
+        self.bits = bits
+        self.whole_program = whole_program
+        # kind of removed code: count
+        self.stats: Dict[str, int] = dict.fromkeys(REMOVED_KINDS, 0)
+
+    def run(self, program: ProgramAST) -> ProgramAST:
+        functions = [node for node in program.hl_statements if isinstance(node, FunctionAST)]
+        reachable = self._reachable_functions(program, functions) if self.whole_program else None
+        hl_statements = []
+        for node in program.hl_statements:
+            if not isinstance(node, FunctionAST):
+                hl_statements.append(node)
+            elif reachable is None or node.func_id.value in reachable:
+                body, _ = self._prune(node.statement_list)
+                hl_statements.append(node if body is node.statement_list else
+                                     FunctionAST(node.func_id, body, node.func_args))
+            else:
+                self.stats["functions"] += 1
+        return ProgramAST(hl_statements)
+
+    @staticmethod
+    def _reachable_functions(program: ProgramAST, functions: List[FunctionAST]) -> Set[str]:
+        # name: functions called by function of the name, there may be several definitions of it
+        calls: Dict[str, Set[str]] = {}
+        for function in functions:
+            calls.setdefault(function.func_id.value, set()).update(called_functions(function))
+        reachable = {node.func_id.value for node in program.hl_statements if isinstance(node, FunctionCallAST)}
+        stack = list(reachable)
+        while stack:
+            for callee in calls.get(stack.pop(), ()):
+                if callee not in reachable:
+                    reachable.add(callee)
+                    stack.append(callee)
+        return reachable
+
+    def _prune(self, node: StatementsListAST) -> Tuple[StatementsListAST, bool]:
+        """
+        Returns statement list without unreachable statements, and whether its execution never reaches its end
+        """
+        children = []
+        changed = False
+        terminates = False
+        for index, child in enumerate(node.children):
+            pruned, terminates = self._prune_statement(child)
+            changed = changed or pruned is not child
+            if pruned is not None:
+                children.extend(pruned.children if isinstance(pruned, StatementsListAST) else [pruned])
+            if terminates:
+                removed = len(node.children) - index - 1
+                self.stats["statements"] += removed
+                changed = changed or removed > 0
+                break
+        return (StatementsListAST(children) if changed else node), terminates
+
+    def _prune_statement(self, node: Type[AST]) -> Tuple[Optional[Type[AST]], bool]:
+        """
+        Returns statement without unreachable code, None if it is removed, or statement list which replaces it,
+        and whether its execution never reaches the next statement
+        """
+        if isinstance(node, JUMP_STATEMENTS):
+            return node, True
+
+        if isinstance(node, CondStatementAST):
+            value = constant_value(node.cond, self.bits)
+            if value is not None:
+                self.stats["branches"] += 1
+                branch = node.node_if if value else node.node_else
+                return self._prune(branch) if branch is not None else (None, False)
+            node_if, if_terminates = self._prune(node.node_if)
+            node_else, else_terminates = self._prune(node.node_else) if node.node_else is not None else (None, False)
+            if node_if is not node.node_if or node_else is not node.node_else:
+                node = CondStatementAST(node.cond, node_if, node_else)
+            return node, if_terminates and else_terminates
+
+        if isinstance(node, WhileStatementAST):
+            if constant_value(node.cond, self.bits) == 0:
+                self.stats["branches"] += 1
+                return None, False
+            body, _ = self._prune(node.while_body)
+            # loop is left by break, even if its condition is constant
+            return (node if body is node.while_body else WhileStatementAST(node.cond, body)), False
+
+        return node, False
@@ -0,0 +1,125 @@
+from typing import Dict, List, Sequence, Set
+
+from ir.ir import Function, VReg
+
+
+class LiveInterval:
+    """
+    Positions from the first definition to the last use of register, instructions are numbered in block order,
+    uses of instruction k are at 2k and its definition is at 2k + 1
+    """
+
+    __slots__ = ("vreg", "start", "end")
+
+    def __init__(self, vreg: VReg, start: int, end: int):
+        self.vreg = vreg
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"{self.vreg!r}[{self.start}, {self.end}]"
+
+
+def liveness(function: Function) -> Dict[str, Set[VReg]]:
+    """
+    Returns label: registers live at the start of block
+    """
+    block_map = function.block_map()
+    uses: Dict[str, Set[VReg]] = {}
+    defs: Dict[str, Set[VReg]] = {}
+    for block in function.blocks:
+        block_uses, block_defs = uses[block.label], defs[block.label] = set(), set()
+        for instruction in block.instructions:
+            block_uses.update(arg for arg in instruction.uses() if arg not in block_defs)
+            if instruction.dest is not None:
+                block_defs.add(instruction.dest)
+
+    live_in: Dict[str, Set[VReg]] = {label: set() for label in block_map}
+    changed = True
+    while changed:
+        changed = False
+        for block in reversed(function.blocks):
+            live_out = set().union(*(live_in[target] for target in block.successors()))
+            block_live_in = uses[block.label] | (live_out - defs[block.label])
+            if block_live_in != live_in[block.label]:
+                live_in[block.label] = block_live_in
+                changed = True
+    return live_in
+
+
+def live_intervals(function: Function) -> List[LiveInterval]:
+    """
+    Returns intervals of registers sorted by start. Register live at the start or the end of block is live
+    in the whole block, so intervals are conservative for registers which are assigned more than once
+    """
+    live_in = liveness(function)
+    intervals: Dict[VReg, LiveInterval] = {}
+
+    def extend(vreg: VReg, position: int) -> None:
+        interval = intervals.get(vreg)
+        if interval is None:
+            intervals[vreg] = LiveInterval(vreg, position, position)
+        else:
+            interval.start = min(interval.start, position)
+            interval.end = max(interval.end, position)
+
+    position = 0
+    for block in function.blocks:
+        start = position
+        for instruction in block.instructions:
+            for arg in instruction.uses():
+                extend(arg, position)
+            if instruction.dest is not None:
+                extend(instruction.dest, position + 1)
+            position += 2
+        for vreg in live_in[block.label]:
+            extend(vreg, start)
+        for vreg in set().union(*(live_in[target] for target in block.successors())):
+            extend(vreg, position - 1)
+    return sorted(intervals.values(), key=lambda interval: interval.start)
+
+
+class LinearScan:
+    """
+    Linear scan register allocation. Intervals are visited by start, registers of intervals which ended
+    are freed, when there is no free register the interval which ends last is spilled.
+    Spilled registers are not in the result, backend keeps them in frame slots
+    """
+
+    def __init__(self, registers: Sequence[str]):
+        self.registers = registers
+        self.spilled = 0
+
+    def allocate(self, function: Function) -> Dict[VReg, str]:
+        """
+        Returns virtual register: machine register
+        """
+        self.spilled = 0
+        result: Dict[VReg, str] = {}
+        free = list(reversed(self.registers))
+        # intervals which hold register, sorted by end
+        active: List[LiveInterval] = []
+        for interval in live_intervals(function):
+            while active and active[0].end < interval.start:
+                free.append(result[active.pop(0).vreg])
+
+            if free:
+                result[interval.vreg] = free.pop()
+                self._activate(active, interval)
+                continue
+
+            self.spilled += 1
+            last = active[-1]
+            if last.end > interval.end:
+                # register of interval which lives longer is given to the current one
+                result[interval.vreg] = result.pop(last.vreg)
+                active.pop()
+                self._activate(active, interval)
+        return result
+
+    @staticmethod
+    def _activate(active: List[LiveInterval], interval: LiveInterval) -> None:
+        index = len(active)
+        while index and active[index - 1].end > interval.end:
+            index -= 1
+        active.insert(index, interval)
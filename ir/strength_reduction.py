@@ -0,0 +1,176 @@
+from typing import List, Optional, Tuple
+
+from ir.constant_folding import wrap
+from ir.ir import Function, Instruction, VReg, Const, Operand, MOV, ADD, SUB, MUL, DIV, MOD, NEG, SHL, SAR, SHR, \
+    AND, MULHI
+from ir.passes import Pass
+
+
+def magic_number(divisor: int, bits: int) -> Tuple[int, int]:
+    """
+    Returns signed magic multiplier and shift of division by divisor, whose absolute value is at least 2
+    and is not a power of 2 (Hacker's Delight, 10-4)
+    """
+    two_w = 1 << (bits - 1)
+    absolute = abs(divisor)
+    t = two_w + (1 if divisor < 0 else 0)
+    # absolute value of nc
+    anc = t - 1 - t % absolute
+    p = bits - 1
+    q1, r1 = divmod(two_w, anc)
+    q2, r2 = divmod(two_w, absolute)
+    while True:
+        p += 1
+        q1, r1 = 2 * q1, 2 * r1
+        if r1 >= anc:
+            q1, r1 = q1 + 1, r1 - anc
+        q2, r2 = 2 * q2, 2 * r2
+        if r2 >= absolute:
+            q2, r2 = q2 + 1, r2 - absolute
+        delta = absolute - r2
+        if not (q1 < delta or q1 == delta and r1 == 0):
+            break
+    multiplier = wrap(q2 + 1, bits)
+    return (-multiplier if divisor < 0 else multiplier), p - bits
+
+
+def power_of_two(value: int) -> Optional[int]:
+    """
+    Returns k if abs(value) is 2 ** k, otherwise None
+    """
+    value = abs(value)
+    return value.bit_length() - 1 if value and value & (value - 1) == 0 else None
+
+
+class StrengthReduction(Pass):
+    """
+    Replaces multiplication, division and modulo by constants with cheaper operations of bits wide words:
+    multiplication by powers of 2 with shifts (by 3, 5 and 9 it is left for lea of backend), signed division
+    and modulo by powers of 2 with shifts and masks with fix-up of negative dividends, so they are rounded
+    towards zero as idiv, division and modulo by other constants with multiplication by magic number
+    """
+
+    name = "strength-reduction"
+    report = "{} operations reduced"
+
+    def __init__(self, bits: int = 32):
+        self.bits = bits
+
+    def run(self, function: Function) -> int:
+        count = 0
+        for block in function.blocks:
+            instructions: List[Instruction] = []
+            for instruction in block.instructions:
+                reduced = self._reduce(function, instruction)
+                if reduced is None:
+                    instructions.append(instruction)
+                else:
+                    instructions.extend(reduced)
+                    count += 1
+            block.instructions = instructions
+        return count
+
+    def _reduce(self, function: Function, instruction: Instruction) -> Optional[List[Instruction]]:
+        if instruction.op not in (MUL, DIV, MOD):
+            return None
+        left, right = instruction.args
+        if instruction.op == MUL and isinstance(left, Const):
+            left, right = right, left
+        if not isinstance(left, VReg) or not isinstance(right, Const):
+            return None
+
+        divisor = wrap(right.value, self.bits)
+        code = _Code(function)
+        if instruction.op == MUL:
+            self._multiply(code, instruction.dest, left, divisor)
+        elif divisor == 0:
+            # division by zero is left for runtime
+            return None
+        elif instruction.op == DIV:
+            self._divide(code, instruction.dest, left, divisor)
+        else:
+            self._modulo(code, instruction.dest, left, divisor)
+        return code.instructions or None
+
+    def _multiply(self, code: "_Code", dest: VReg, value: VReg, factor: int) -> None:
+        shift = power_of_two(factor)
+        if factor == 0:
+            code.emit(MOV, [Const(0)], dest)
+        elif factor == 1:
+            code.emit(MOV, [value], dest)
+        elif factor == -1:
+            code.emit(NEG, [value], dest)
+        elif shift is not None:
+            if factor > 0:
+                code.emit(SHL, [value, Const(shift)], dest)
+            else:
+                code.emit(NEG, [code.emit(SHL, [value, Const(shift)])], dest)
+
+    def _divide(self, code: "_Code", dest: Optional[VReg], value: VReg, divisor: int) -> VReg:
+        """
+        Emits truncating division, result is stored to dest or to a new register, which is returned
+        """
+        if divisor == 1:
+            return code.emit(MOV, [value], dest)
+        if divisor == -1:
+            return code.emit(NEG, [value], dest)
+
+        shift = power_of_two(divisor)
+        if shift is not None:
+            # negative dividend is biased by 2 ** shift - 1, so shift rounds it towards zero
+            biased = code.emit(ADD, [value, self._bias(code, value, shift)])
+            if divisor > 0:
+                return code.emit(SAR, [biased, Const(shift)], dest)
+            return code.emit(NEG, [code.emit(SAR, [biased, Const(shift)])], dest)
+
+        multiplier, shift = magic_number(divisor, self.bits)
+        quotient = code.emit(MULHI, [value, Const(multiplier)])
+        if divisor > 0 and multiplier < 0:
+            quotient = code.emit(ADD, [quotient, value])
+        elif divisor < 0 and multiplier > 0:
+            quotient = code.emit(SUB, [quotient, value])
+        if shift:
+            quotient = code.emit(SAR, [quotient, Const(shift)])
+        # negative quotient is rounded down, 1 is added to round it towards zero
+        sign = code.emit(SHR, [quotient, Const(self.bits - 1)])
+        return code.emit(ADD, [quotient, sign], dest)
+
+    def _modulo(self, code: "_Code", dest: VReg, value: VReg, divisor: int) -> None:
+        if divisor in (1, -1):
+            code.emit(MOV, [Const(0)], dest)
+            return
+
+        shift = power_of_two(divisor)
+        if shift is not None and shift < self.bits - 1:
+            # remainder has the sign of the dividend: low bits of biased dividend minus the bias
+            bias = self._bias(code, value, shift)
+            masked = code.emit(AND, [code.emit(ADD, [value, bias]), Const((1 << shift) - 1)])
+            code.emit(SUB, [masked, bias], dest)
+            return
+
+        quotient = self._divide(code, None, value, divisor)
+        code.emit(SUB, [value, code.emit(MUL, [quotient, Const(divisor)])], dest)
+
+    def _bias(self, code: "_Code", value: VReg, shift: int) -> Operand:
+        """
+        Emits 2 ** shift - 1 if value is negative, otherwise 0
+        """
+        if shift == 1:
+            return code.emit(SHR, [value, Const(self.bits - 1)])
+        sign = code.emit(SAR, [value, Const(self.bits - 1)])
+        return code.emit(SHR, [sign, Const(self.bits - shift)])
+
+
+class _Code:
+    """
+    Instructions which replace reduced one, results are stored to new registers of function
+    """
+
+    def __init__(self, function: Function):
+        self.function = function
+        self.instructions: List[Instruction] = []
+
+    def emit(self, op: str, args: List[Operand], dest: Optional[VReg] = None) -> VReg:
+        dest = dest if dest is not None else self.function.new_vreg()
+        self.instructions.append(Instruction(op, dest, args))
+        return dest
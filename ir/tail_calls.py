@@ -0,0 +1,65 @@
+from typing import Dict, Optional
+
+from ir.ir import Function, BasicBlock, Instruction, VReg, MOV, PARAM, CALL, JMP, RET
+from ir.passes import Pass
+
+
+class TailCallElimination(Pass):
+    """
+    Replaces calls of function by itself, whose result is returned right away, with a jump to the start of its
+    body. Arguments of the call are copied to temporaries first and then to the registers of params, as they may
+    be computed from params, so the function runs as a loop in one stack frame. The entry block keeps params
+    and jumps to the body, which is split from it on the first tail call
+    """
+
+    name = "tail-call-elimination"
+    report = "{} tail calls replaced with jumps"
+
+    def run(self, function: Function) -> int:
+        count = 0
+        body: Optional[BasicBlock] = None
+        for block in list(function.blocks):
+            if not self._is_tail_call(function, block):
+                continue
+            if body is None:
+                body = self._split_entry(function)
+                if block is function.blocks[0]:
+                    block = body
+            call = block.instructions[-2]
+            params = self._params(function)
+            copies = [function.new_vreg() for _ in call.args]
+            block.instructions[-2:] = \
+                [Instruction(MOV, copy, [arg]) for copy, arg in zip(copies, call.args)] + \
+                [Instruction(MOV, params[index], [copy]) for index, copy in enumerate(copies) if index in params] + \
+                [Instruction(JMP, targets=[body.label])]
+            count += 1
+        return count
+
+    @staticmethod
+    def _is_tail_call(function: Function, block: BasicBlock) -> bool:
+        if len(block.instructions) < 2:
+            return False
+        call, ret = block.instructions[-2:]
+        return call.op == CALL and call.callee == function.name and len(call.args) == len(function.params) and \
+            ret.op == RET and call.dest is not None and ret.args[0] is call.dest
+
+    @staticmethod
+    def _params(function: Function) -> Dict[int, VReg]:
+        """
+        Returns registers of params by their index, unused params may have no register
+        """
+        return {instruction.args[0].value: instruction.dest for instruction in function.blocks[0].instructions
+                if instruction.op == PARAM}
+
+    @staticmethod
+    def _split_entry(function: Function) -> BasicBlock:
+        """
+        Moves instructions of entry block after its params to a new block, which becomes target of tail calls
+        """
+        entry = function.blocks[0]
+        body = function.new_block("body")
+        params = [instruction for instruction in entry.instructions if instruction.op == PARAM]
+        body.instructions = [instruction for instruction in entry.instructions if instruction.op != PARAM]
+        entry.instructions = params + [Instruction(JMP, targets=[body.label])]
+        function.blocks.insert(1, body)
+        return body
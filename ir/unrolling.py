@@ -0,0 +1,230 @@
+from typing import Dict, List, Optional, Set, Tuple, Type
+
+from ir.constant_folding import evaluate, wrap
+from ir.lowering import Lowering
+from ir.reachability import constant_value
+from lexer.my_token import Token
+from my_parser.AST import AST, ProgramAST, FunctionAST, StatementsListAST, AssignExpAST, CondStatementAST, \
+    WhileStatementAST, BreakStatementAST, ContinueStatementAST, ReturnStatementAST, IdAST, BinOpAST, CompOpAST, \
+    DecimalAST, iter_statements
+
+# copies of loop body in the unrolled loop, 1 disables unrolling
+UNROLL_FACTOR = 4
+# max count of tree nodes in body of unrolled loop
+MAX_BODY_SIZE = 40
+# max trip count of fully unrolled loop
+MAX_FULL_TRIPS = 8
+
+# comparison of loop condition: sign of step of induction variable which reaches the bound
+STEP_SIGNS = {"<": 1, "<=": 1, ">": -1, ">=": -1}
+
+# kinds of loops counted in stats of LoopUnrolling
+UNROLLED_KINDS = ("unrolled", "fully unrolled")
+
+
+def tree_size(node: AST) -> int:
+    """
+    Returns count of statement and expression nodes of tree
+    """
+    return sum(1 for _ in iter_statements(node, with_expressions=True))
+
+
+def assigned_variables(node: AST) -> Set[str]:
+    """
+    Returns names of variables assigned in statements of node
+    """
+    return {item.var_id.value for item in iter_statements(node) if isinstance(item, AssignExpAST)}
+
+
+def is_simple_loop_body(node: StatementsListAST) -> bool:
+    """
+    Returns True if body has no nested loops and no break and continue, so it is left only by the loop test
+    and by return
+    """
+    return not any(isinstance(item, (WhileStatementAST, BreakStatementAST, ContinueStatementAST))
+                   for item in iter_statements(node))
+
+
+class LoopUnrolling:
+    """
+    Unrolls counted loops of program tree, before code generation by either codegen. Counted loop is an innermost
+    loop without break and continue, whose test compares induction variable with a bound, which is a constant
+    or a variable not assigned in the loop, and whose body steps induction variable by a constant on each path
+    which reaches its end: by its last statement, or by both branches of its last if, where a branch may return
+    instead. Body of unrolled loop is factor copies of the body, it runs while at least factor iterations are
+    left, remaining iterations run in the original loop after it. Loop whose trip count is known from constant
+    start and bound is replaced with copies of its body if it is small. Copies share the nodes of the body
+    """
+
+    name = "loop-unrolling"
+    report = "{unrolled} loops unrolled, {fully unrolled} loops fully unrolled"
+
+    def __init__(self, bits: int = 32, factor: int = UNROLL_FACTOR):
+        self.bits = bits
+        self.factor = factor
+        # kind of unrolled loop: count
+        self.stats: Dict[str, int] = dict.fromkeys(UNROLLED_KINDS, 0)
+
+    def run(self, program: ProgramAST) -> ProgramAST:
+        hl_statements = []
+        for node in program.hl_statements:
+            if isinstance(node, FunctionAST):
+                body = self._unroll(node.statement_list)
+                node = node if body is node.statement_list else FunctionAST(node.func_id, body, node.func_args)
+            hl_statements.append(node)
+        return ProgramAST(hl_statements)
+
+    def _unroll(self, node: StatementsListAST) -> StatementsListAST:
+        """
+        Returns statement list with unrolled loops, new node only if it is changed
+        """
+        children = []
+        changed = False
+        for child in node.children:
+            unrolled = self._unroll_statement(child, children)
+            changed = changed or unrolled is not child
+            children.extend(unrolled.children if isinstance(unrolled, StatementsListAST) else [unrolled])
+        return StatementsListAST(children) if changed else node
+
+    def _unroll_statement(self, node: Type[AST], previous: List[Type[AST]]) -> Type[AST]:
+        """
+        Returns statement with unrolled loops, or statement list which replaces it. Previous statements
+        of its list give start value of induction variable
+        """
+        if isinstance(node, CondStatementAST):
+            node_if, node_else = self._unroll(node.node_if), self._unroll(node.node_else)
+            if node_if is node.node_if and node_else is node.node_else:
+                return node
+            return CondStatementAST(node.cond, node_if, node_else)
+
+        if not isinstance(node, WhileStatementAST):
+            return node
+        body = self._unroll(node.while_body)
+        loop = node if body is node.while_body else WhileStatementAST(node.cond, body)
+        counted = self._counted_loop(loop) if self.factor > 1 else None
+        if counted is None:
+            return loop
+        variable, bound, step = counted
+
+        trips = self._trip_count(loop, variable, bound, step, previous)
+        if trips is not None and trips <= MAX_FULL_TRIPS and trips * tree_size(body) <= MAX_BODY_SIZE * self.factor:
+            self.stats["fully unrolled"] += 1
+            return StatementsListAST([body] * trips)
+        if tree_size(body) > MAX_BODY_SIZE:
+            return loop
+        return self._partially_unrolled(loop, variable, bound, step)
+
+    def _counted_loop(self, node: WhileStatementAST) -> Optional[Tuple[str, Type[AST], int]]:
+        """
+        Returns induction variable, bound and step of counted loop, None if loop is not counted
+        """
+        cond = node.cond
+        if not isinstance(cond, CompOpAST) or cond.op.value not in STEP_SIGNS or not isinstance(cond.left, IdAST):
+            return None
+        variable = cond.left.var_id
+        if not is_simple_loop_body(node.while_body):
+            return None
+        if isinstance(cond.right, IdAST):
+            if cond.right.var_id == variable or cond.right.var_id in assigned_variables(node.while_body):
+                return None
+        elif constant_value(cond.right, self.bits) is None:
+            return None
+        step = self._step(node.while_body, variable)
+        if step is None or step * STEP_SIGNS[cond.op.value] <= 0:
+            return None
+        return variable, cond.right, step
+
+    def _step(self, node: StatementsListAST, variable: str) -> Optional[int]:
+        """
+        Returns constant which statement list adds to variable on each path which reaches its end,
+        None if variable is changed in another way
+        """
+        if not node.children:
+            return None
+        *statements, last = node.children
+        if any(variable in assigned_variables(statement) for statement in statements):
+            return None
+        if isinstance(last, AssignExpAST):
+            return self._step_value(last, variable)
+        if not isinstance(last, CondStatementAST):
+            return None
+        steps = {self._step(branch, variable) for branch in (last.node_if, last.node_else)
+                 if not self._returns(branch)}
+        return steps.pop() if len(steps) == 1 else None
+
+    def _step_value(self, node: AssignExpAST, variable: str) -> Optional[int]:
+        """
+        Returns constant of assignment variable = variable + constant, variable = variable - constant
+        or variable = constant + variable, None for other assignments
+        """
+        exp = node.exp
+        if node.var_id.value != variable or not isinstance(exp, BinOpAST) or exp.op.value not in "+-":
+            return None
+        if isinstance(exp.left, IdAST) and exp.left.var_id == variable:
+            value = constant_value(exp.right, self.bits)
+            if value is not None and exp.op.value == "-":
+                value = wrap(-value, self.bits)
+            return value
+        if isinstance(exp.right, IdAST) and exp.right.var_id == variable and exp.op.value == "+":
+            return constant_value(exp.left, self.bits)
+        return None
+
+    @staticmethod
+    def _returns(node: StatementsListAST) -> bool:
+        return bool(node.children) and isinstance(node.children[-1], ReturnStatementAST)
+
+    def _trip_count(self, node: WhileStatementAST, variable: str, bound: Type[AST], step: int,
+                    previous: List[Type[AST]]) -> Optional[int]:
+        """
+        Returns count of iterations of loop, None if it is not known or is larger than MAX_FULL_TRIPS.
+        Start value is the constant assigned to variable by the nearest previous statement which assigns it
+        """
+        bound_value = constant_value(bound, self.bits)
+        if bound_value is None:
+            return None
+        start = None
+        for statement in reversed(previous):
+            if variable in assigned_variables(statement):
+                if isinstance(statement, AssignExpAST):
+                    start = constant_value(statement.exp, self.bits)
+                break
+        if start is None:
+            return None
+        compare = Lowering.OPS[node.cond.op.value]
+        trips = 0
+        while evaluate(compare, [start, bound_value], self.bits):
+            trips += 1
+            if trips > MAX_FULL_TRIPS:
+                return None
+            start = wrap(start + step, self.bits)
+        return trips
+
+    def _partially_unrolled(self, node: WhileStatementAST, variable: str, bound: Type[AST],
+                            step: int) -> StatementsListAST:
+        """
+        Returns unrolled loop followed by the original loop for the remaining iterations. Unrolled loop compares
+        variable with bound moved back by the steps of all copies but the first, so each copy starts
+        with variable which passes the test. If bound is a variable, unrolled loop is guarded by comparison
+        of bound, which keeps the moved bound from overflow
+        """
+        distance = step * (self.factor - 1)
+        half = 1 << (self.bits - 1)
+        limit = -half + distance if step > 0 else half - 1 + distance
+        bound_value = constant_value(bound, self.bits)
+        if bound_value is not None:
+            if (bound_value < limit) if step > 0 else (bound_value > limit):
+                return StatementsListAST([node])
+            moved_bound = self._number(bound_value - distance)
+        else:
+            moved_bound = BinOpAST(bound, Token("-", Token.OPERATION), self._number(distance))
+        unrolled = WhileStatementAST(CompOpAST(IdAST(variable), node.cond.op, moved_bound),
+                                     StatementsListAST([node.while_body] * self.factor))
+        if bound_value is None:
+            guard = CompOpAST(bound, Token(">=" if step > 0 else "<=", Token.OPERATION), self._number(limit))
+            unrolled = CondStatementAST(guard, StatementsListAST([unrolled]), StatementsListAST([]))
+        self.stats["unrolled"] += 1
+        return StatementsListAST([unrolled, node])
+
+    @staticmethod
+    def _number(value: int) -> DecimalAST:
+        return DecimalAST(Token(str(value), Token.NUMBER_DECIMAL))
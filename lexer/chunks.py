@@ -0,0 +1,25 @@
+import re
+from typing import Iterator
+
+from common.types import TextChunk
+
+# start of a top level line, which is not blank or comment only
+TOP_LEVEL_RE = re.compile(r"^(?=[^\s#])", re.MULTILINE)
+
+
+def top_level_chunks(text: str) -> Iterator[TextChunk]:
+    """
+    Splits text at top level lines, each chunk is a function definition with its body or a top level call,
+    followed by blank and comment lines. Chunks can be lexed and parsed independently of each other
+    """
+    starts = [match.start() for match in TOP_LEVEL_RE.finditer(text)]
+    if not starts or starts[0]:
+        # blank lines at the start, or indented lines which are a syntax error, stay in the first chunk
+        starts.insert(0, 0)
+    row = 1
+    previous = 0
+    for start, end in zip(starts, starts[1:] + [len(text)]):
+        row += text.count("\n", previous, start)
+        previous = start
+        yield TextChunk(row, start, end)
+
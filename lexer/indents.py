@@ -0,0 +1,21 @@
+from typing import List
+
+from exceptions.my_exceptions import InvalidSyntaxException
+
+
+def update_indents(indents: List[int], width: int, row: int) -> int:
+    """
+    Updates stack of indentation widths with the indentation of a new logical line.
+    Returns 1 if one INDENT token should be emitted, -n if n DEDENT tokens should be emitted, 0 otherwise
+    """
+    if width > indents[-1]:
+        indents.append(width)
+        return 1
+
+    dedents_count = 0
+    while width < indents[-1]:
+        indents.pop()
+        dedents_count += 1
+    if width != indents[-1]:
+        raise InvalidSyntaxException(f"Unindent does not match any outer indentation level in row={row}")
+    return -dedents_count
@@ -1,24 +1,40 @@
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
 from exceptions.my_exceptions import EOF, InvalidSyntaxException
 from exceptions.my_exceptions import UnrecognizedTokenException
+from lexer.indents import update_indents
 from lexer.my_token import Token
+from lexer.source import SourceBuffer, source_to_text
+from lexer.table_lexer import TableLexer
+from lexer.token_table import TokenTable
 import re
 
 
 class Lexer:
     """
-    Returns list of tokens
+    Returns list of tokens (get_tokens) or lazily yields them one by one (iter_tokens)
+    engine "table" tokenizes text with the single pass TableLexer, engine "char" walks text char by char,
+    both engines produce the same tokens. Rows are counted from first_row
     """
 
-    def __init__(self, text):
-        self.text = text
+    ENGINES = ("table", "char")
+
+    def __init__(self, text: SourceBuffer, engine="table", first_row: int = 1):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown lexer engine {engine}, should be one of {self.ENGINES}")
+        self.engine = engine
+        # table engine scans bytes and memory mapped files in place, char engine needs decoded text
+        self.text = text if engine == "table" else source_to_text(text)
         self.pos = 0
-        self.cur_char: str = text[self.pos]
+        self.cur_char: str = self.text[self.pos] if engine == "char" and self.text else EOF
 
-        self.row = 1  # row in which token is located
+        self.first_row = first_row
+        self.row = first_row  # row in which token is located
         self.row_pos = 0  # position in row
 
+        self.indents = [0]  # widths of opened indentation levels
+        self.line_start_end = 0  # position after indentation of the last logical line
+
     def _set_next_char(self):
         self.pos += 1
         if self.pos < len(self.text):
@@ -105,25 +121,44 @@ class Lexer:
             self._skip_whitespace()
         return res
 
-    def _get_special_symbols(self):
-        res = self.text[self.pos]
-        self._set_next_char()
-        res += self.cur_char
-        self._set_next_char()
-        if res == "\\r":
-            return None
-        return res
+    def _skip_blank_lines(self) -> None:
+        """
+        Skips lines which contain only spaces and comments, stops at the first char of a non-blank line
+        """
+        while True:
+            end = self.pos
+            while end < len(self.text) and self.text[end] in " \r":
+                end += 1
+            if end < len(self.text) and self.text[end] == "#":
+                end = self.text.find("\n", end)
+                end = end if end != -1 else len(self.text)
+            if end < len(self.text) and self.text[end] != "\n":
+                return
+
+            while self.pos < end:
+                self._set_next_char()
+            if end == len(self.text):
+                return
+            # skipping \n of the blank line
+            self._set_next_char()
+            self.row += 1
+            self.row_pos = 0
 
     def handle_indents(self) -> List[Token]:
-        # todo move indent var to global level
-        tab_size = 4
-        indent = " " * tab_size
-        indents_ls = []
-        while self.text[self.pos: self.pos + tab_size] == indent:
-            indents_ls.append(Token(self.text[self.pos: self.pos + tab_size], Token.SLASH_T, (self.row, self.row_pos)))
-            self.pos += tab_size
-            self.cur_char = self.text[self.pos]
-        return indents_ls
+        """
+        Skips blank lines, measures indentation of the next logical line and returns INDENT/DEDENT tokens
+        """
+        self._skip_blank_lines()
+        width = 0
+        while self.cur_char == " ":
+            width += 1
+            self._set_next_char()
+        self.line_start_end = self.pos
+
+        change = update_indents(self.indents, width, self.row)
+        if change > 0:
+            return [Token(" " * width, Token.INDENT, (self.row, 0))]
+        return [Token("", Token.DEDENT, (self.row, 0)) for _ in range(-change)]
 
     def _process_comp_operations(self):
         lexeme_with_next_char = self.cur_char + self.text[self.pos + 1]
@@ -150,7 +185,7 @@ class Lexer:
 
     def _process_comment(self):
         self._set_next_char()
-        while self.cur_char != "\\" or not self._is_next_char("n"):
+        while self.cur_char != "\n" and self.cur_char != EOF:
             self._set_next_char()
 
     def _process_assign_operations(self):
@@ -175,7 +210,7 @@ class Lexer:
             tok_type = Token.COMMA
         elif lexeme in Token.ASSIGNS.values():
             tok_type = Token.ASSIGN
-        elif lexeme == "\\n":
+        elif lexeme == "\n":
             tok_type = Token.SLASH_N
             self.row_pos = 0
             self.row += 1
@@ -211,63 +246,89 @@ class Lexer:
 
         return Token(lexeme, tok_type, (self.row, self.row_pos))
 
-    def get_tokens(self):
-        tokens_list: List[Token] = []
+    def get_tokens(self) -> List[Token]:
+        if self.engine == "table":
+            return TableLexer(self.text, self.first_row).get_tokens()
+        return list(self._iter_tokens_char_by_char())
+
+    def get_token_table(self) -> TokenTable:
+        """
+        Returns tokens in the compact columnar TokenTable, it is always built by the table engine
+        """
+        return TableLexer(self.text, self.first_row).get_token_table()
+
+    def iter_tokens(self) -> Iterator[Token]:
+        if self.engine == "table":
+            return TableLexer(self.text, self.first_row).iter_tokens()
+        return self._iter_tokens_char_by_char()
+
+    def _iter_tokens_char_by_char(self) -> Iterator[Token]:
+        yield from self.handle_indents()
         while self.cur_char != EOF:
             if self.cur_char.isalpha() or self.cur_char == "_":
                 # processing letters
                 word = self._get_word()
                 token = self._get_token(word)
-                tokens_list.append(token)
+                yield token
             elif self.cur_char == "\"":
                 string = self._get_string()
                 token = self._get_token(string)
-                tokens_list.append(token)
+                yield token
             elif self.cur_char.isdigit():
                 number = self._get_multi_digit_num()
                 token = self._get_token(number)
-                tokens_list.append(token)
-            elif self.cur_char == "\\":  # just normal \
-                symbols = self._get_special_symbols()
-                if symbols:
-                    token = self._get_token(symbols)
-                    tokens_list.append(token)
+                yield token
+            elif self.cur_char == "\n":
+                self._set_next_char()
+                token = self._get_token("\n")
+                yield token
+                yield from self.handle_indents()
+            elif self.cur_char == "\r":
+                self._set_next_char()
             elif self.cur_char == "(":
                 token = self._get_token("(")
-                tokens_list.append(token)
+                yield token
                 self._set_next_char()
             elif self.cur_char == ")":
                 token = self._get_token(")")
-                tokens_list.append(token)
+                yield token
                 self._set_next_char()
             elif self.cur_char == ":":
                 token = self._get_token(":")
-                tokens_list.append(token)
+                yield token
                 self._set_next_char()
             elif self.cur_char == ",":
                 token = self._get_token(",")
-                tokens_list.append(token)
+                yield token
                 self._set_next_char()
             elif self.cur_char in ("=", "!", ">", "<"):
                 token = self._process_comp_operations()
                 if token is not None:
-                    tokens_list.append(token)
+                    yield token
                     self._set_next_char()
                 if token is None and self.cur_char == "=":
                     token = self._get_token("=")
-                    tokens_list.append(token)
+                    yield token
                     self._set_next_char()
+                elif token is None:
+                    raise UnrecognizedTokenException(f"Unrecognized token: {self.cur_char}")
             elif self.cur_char in Token.OPERATIONS.values():
                 token = self._process_assign_operations()
-                tokens_list.append(token)
+                yield token
                 self._set_next_char()
             elif self.cur_char == "#":
                 self._process_comment()
             elif self.cur_char == " ":
-                indents = self.handle_indents()
-                if indents:
-                    tokens_list.extend(indents)
-                else:
-                    self._skip_whitespace()
-
-        return tokens_list
+                self._skip_whitespace()
+            else:
+                raise UnrecognizedTokenException(
+                    f"Unrecognized token: {self.cur_char!r} in row={self.row}, pos={self.row_pos}"
+                )
+
+        # closing the last logical line (with empty SLASH_N, as there is no newline in text)
+        # and all opened indentation levels
+        if self.line_start_end != len(self.text):
+            self.row += 1
+            yield Token("", Token.SLASH_N, (self.row, 0))
+        for _ in self.indents[1:]:
+            yield Token("", Token.DEDENT, (self.row, 0))
@@ -1,22 +1,47 @@
+from enum import IntEnum
 from typing import Tuple
 
 
+class TokenKind(IntEnum):
+    """
+    Interned token types, checks of token type are integer compares
+    """
+    L_BRACKET = 1
+    R_BRACKET = 2
+    COLON = 3
+    COMMA = 4
+    BUILTIN_WORD = 5  # char sequence which corresponds to any BUILTIN_WORD
+    OPERATION = 6  # char sequence which corresponds to any OPERATION
+    ID = 7  # char sequence which not corresponds to any BUILTIN_WORD or OPERATION
+    SLASH_N = 8  # end of logical line, blank and comment only lines don't produce it
+    ASSIGN = 10
+    NUMBER_HEX = 11
+    NUMBER_DECIMAL = 12
+    NUMBER_BINARY = 13
+    STRING = 14  # char sequence in ""
+    INDENT = 15  # indentation of a line is deeper than indentation of the previous one
+    DEDENT = 16  # one per closed indentation level
+
+
 class Token:
+    __slots__ = ("value", "tok_type", "pos")
+
     # token types
-    L_BRACKET = "L_BRACKET"
-    R_BRACKET = "R_BRACKET"
-    COLON = "COLON"
-    COMMA = "COMMA"
-    BUILTIN_WORD = "BUILTIN_WORD"  # char sequence which corresponds to any BUILTIN_WORD
-    OPERATION = "OPERATION"  # char sequence which corresponds to any OPERATION
-    ID = "ID"  # char sequence which not corresponds to any BUILTIN_WORD or OPERATION
-    SLASH_N = "SLASH_N"
-    SLASH_T = "SLASH_T"
-    ASSIGN = "ASSIGN"
-    NUMBER_HEX = "NUMBER_HEX"
-    NUMBER_DECIMAL = "NUMBER_DECIMAL"
-    NUMBER_BINARY = "NUMBER_BINARY"
-    STRING = "STRING"  # char sequence in ""
+    L_BRACKET = TokenKind.L_BRACKET
+    R_BRACKET = TokenKind.R_BRACKET
+    COLON = TokenKind.COLON
+    COMMA = TokenKind.COMMA
+    BUILTIN_WORD = TokenKind.BUILTIN_WORD
+    OPERATION = TokenKind.OPERATION
+    ID = TokenKind.ID
+    SLASH_N = TokenKind.SLASH_N
+    ASSIGN = TokenKind.ASSIGN
+    NUMBER_HEX = TokenKind.NUMBER_HEX
+    NUMBER_DECIMAL = TokenKind.NUMBER_DECIMAL
+    NUMBER_BINARY = TokenKind.NUMBER_BINARY
+    STRING = TokenKind.STRING
+    INDENT = TokenKind.INDENT
+    DEDENT = TokenKind.DEDENT
 
     # token values
     BUILTIN_WORDS = {
@@ -50,7 +75,7 @@ class Token:
         "ASSIGN_SUM": "+=",
     }
 
-    def __init__(self, value, tok_type, pos: Tuple[int, int] = None):
+    def __init__(self, value, tok_type: TokenKind, pos: Tuple[int, int] = None):
         self.value = value
         self.tok_type = tok_type
 
@@ -58,4 +83,4 @@ class Token:
         self.pos = pos
 
     def __repr__(self):
-        return f'Token(tok_type={self.tok_type}, value={repr(self.value)}, pos=({self.pos}))'
+        return f'Token(tok_type={self.tok_type.name}, value={repr(self.value)}, pos=({self.pos}))'
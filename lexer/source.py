@@ -0,0 +1,48 @@
+import mmap
+import os
+from contextlib import contextmanager
+from typing import Iterator, Union
+
+# program text: decoded str, or raw utf-8 bytes/memory mapped file which TableLexer scans without copying
+SourceBuffer = Union[str, bytes, mmap.mmap]
+
+
+def load_source(path: str, use_mmap: bool = True) -> SourceBuffer:
+    """
+    Loads program source from file once.
+    With use_mmap the file is memory mapped and lexed directly from the mapping, otherwise
+    it is read and decoded as utf-8 in one go. Newlines are kept as they are (\\n or \\r\\n).
+    Memory mapped file should be closed by the caller, open_source does it on exit
+    """
+    if not use_mmap:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return f.read()
+
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # empty files can't be mapped
+            return b""
+        # mapping stays valid after the file is closed
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+@contextmanager
+def open_source(path: str, use_mmap: bool = True) -> Iterator[SourceBuffer]:
+    """
+    Loads program source as load_source, memory mapped file is closed on exit
+    """
+    source = load_source(path, use_mmap)
+    try:
+        yield source
+    finally:
+        if isinstance(source, mmap.mmap):
+            source.close()
+
+
+def source_to_text(source: SourceBuffer) -> str:
+    """
+    Returns source as str, decoding bytes and memory mapped files as utf-8
+    """
+    if isinstance(source, str):
+        return source
+    return str(memoryview(source), "utf-8")
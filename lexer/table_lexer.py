@@ -0,0 +1,194 @@
+from typing import Dict, Iterator, List, Tuple
+import re
+
+from exceptions.my_exceptions import UnrecognizedTokenException
+from lexer.indents import update_indents
+from lexer.my_token import Token, TokenKind
+from lexer.source import SourceBuffer
+from lexer.token_table import TokenTable
+
+
+class TableLexer:
+    """
+    Single pass tokenizer driven by one compiled master regex and precomputed lookup tables.
+    Produces exactly the same token stream (values, types and positions) as the char by char Lexer.
+    Indentation is tracked with a stack, deeper line produces INDENT token, each closed level produces
+    DEDENT token, blank and comment only lines produce no tokens at all.
+    Text may be str or utf-8 bytes/memory mapped file, which is scanned in place (positions in row
+    are counted in chars for both). Rows are counted from first_row, so part of a file can be lexed
+    with rows of the whole file
+    """
+
+    # lines which contain only spaces and comments, the last one may end with the end of text
+    BLANK_LINES = r"(?:[ \r]*(?:#[^\n]*)?(?:\n|\Z))*"
+
+    # alternatives start with distinct chars, so they are ordered by frequency,
+    # except BINARY and HEX which have to be tried before DECIMAL.
+    # NEWLINE consumes following blank lines and indentation of the next logical line
+    MASTER_PATTERN = (
+        r"(?P<SPACES> +)"
+        r"|(?P<WORD>[A-Za-z_]+)"
+        r"|(?P<NEWLINE>\n" + BLANK_LINES + r"(?P<INDENT> *))"
+        r"|(?P<PUNCT>[():,])"
+        r"|(?P<OP2>==|!=|>=|<=|\*=|\+=)"
+        r"|(?P<OP1>[-+/*%<>=])"
+        r"|(?P<BINARY>0b[01]*)"
+        r"|(?P<HEX>0x[0-9a-f]*)"
+        r"|(?P<DECIMAL>[0-9]+) ?"
+        r"|(?P<COMMENT>#[^\n]*)"
+        r"|(?P<STRING>\"[^\"]*\")"
+        r"|(?P<CR>\r)"
+        r"|(?P<ERROR>.)"
+    )
+    MASTER_RE = re.compile(MASTER_PATTERN, re.DOTALL)
+    # the same automaton for utf-8 bytes and memory mapped files, lexemes are decoded one by one
+    MASTER_RE_BYTES = re.compile(MASTER_PATTERN.encode("ascii"), re.DOTALL)
+
+    # blank lines and indentation at the start of text
+    START_PATTERN = BLANK_LINES + r"(?P<INDENT> *)"
+    START_RE = re.compile(START_PATTERN)
+    START_RE_BYTES = re.compile(START_PATTERN.encode("ascii"))
+
+    # lexeme: token type, for every lexeme which has a fixed spelling
+    LEXEME_TYPES: Dict[str, TokenKind] = {
+        "(": Token.L_BRACKET,
+        ")": Token.R_BRACKET,
+        ":": Token.COLON,
+        ",": Token.COMMA,
+        **{value: Token.OPERATION for value in Token.OPERATIONS.values()},
+        **{value: Token.ASSIGN for value in Token.ASSIGNS.values()},
+    }
+
+    # word: token type, words which are not in this table are ids
+    WORD_TYPES: Dict[str, TokenKind] = {
+        Token.OPERATIONS["OR"]: Token.OPERATION,
+        **{value: Token.BUILTIN_WORD for value in Token.BUILTIN_WORDS.values()},
+    }
+
+    def __init__(self, text: SourceBuffer, first_row: int = 1):
+        self.text = text
+        self.first_row = first_row
+
+    def get_tokens(self) -> List[Token]:
+        return list(self.iter_tokens())
+
+    def iter_tokens(self) -> Iterator[Token]:
+        text = self.text
+        if isinstance(text, str):
+            for kind, start, length, row, col in self._scan_tokens():
+                yield Token(text[start:start + length], kind, (row, col))
+        else:
+            for kind, start, length, row, col in self._scan_tokens():
+                yield Token(str(text[start:start + length], "utf-8"), kind, (row, col))
+
+    def get_token_table(self) -> TokenTable:
+        """
+        Returns tokens in the columnar TokenTable, token values are not created at all
+        """
+        table = TokenTable(self.text)
+        add = table.append
+        for token in self._scan_tokens():
+            add(*token)
+        return table
+
+    @staticmethod
+    def _decode(lexeme: bytes) -> str:
+        return lexeme.decode("utf-8")
+
+    @staticmethod
+    def _is_narrow_row(text: SourceBuffer, row_start: int) -> bool:
+        """
+        Returns True if offsets in row are positions of chars, it is False only for utf-8 rows with multibyte chars
+        """
+        if isinstance(text, str):
+            return True
+        row_end = text.find(b"\n", row_start)
+        return text[row_start:row_end if row_end != -1 else len(text)].isascii()
+
+    @staticmethod
+    def _column(text: SourceBuffer, row_start: int, offset: int) -> int:
+        """
+        Returns position in row of byte offset in utf-8 text
+        """
+        return len(str(text[row_start:offset], "utf-8"))
+
+    def _scan_tokens(self) -> Iterator[Tuple[TokenKind, int, int, int, int]]:
+        """
+        Yields kind, offset and length of lexeme in text, row and position in row of each token.
+        Lexemes of DEDENT tokens and of SLASH_N token which closes the last line without newline are empty
+        """
+        text = self.text
+        if isinstance(text, str):
+            start_match = self.START_RE.match(text)
+            matches = self.MASTER_RE.finditer(text, start_match.end())
+            decode, newline = str, "\n"
+        else:
+            start_match = self.START_RE_BYTES.match(text)
+            matches = self.MASTER_RE_BYTES.finditer(text, start_match.end())
+            decode, newline = self._decode, b"\n"
+        lexeme_types = self.LEXEME_TYPES
+        word_types = self.WORD_TYPES
+
+        row = self.first_row + start_match.group().count(newline)
+        # offset of the first char of the current row
+        row_start = start_match.start("INDENT")
+        # end of the last NEWLINE match, if text doesn't end there the last logical line is not closed
+        newline_end = start_match.end()
+        # row has only one byte chars, so offsets in it are positions in row
+        narrow = self._is_narrow_row(text, row_start)
+        # widths of opened indentation levels
+        indents = [0]
+        if newline_end != row_start:
+            update_indents(indents, newline_end - row_start, row)
+            yield Token.INDENT, row_start, newline_end - row_start, row, 0
+
+        for match in matches:
+            kind = match.lastgroup
+            start, end = match.span()
+
+            # kind of token, length of its lexeme and offset which gives its position in row
+            if kind == "WORD":
+                token_kind, length, offset = word_types.get(decode(match.group()), Token.ID), end - start, end
+            elif kind == "SPACES" or kind == "COMMENT" or kind == "CR":
+                continue
+            elif kind == "NEWLINE":
+                yield Token.SLASH_N, start, 1, row + 1, 0
+                row += match.group().count(newline)
+                row_start = match.start("INDENT")
+                narrow = self._is_narrow_row(text, row_start)
+                newline_end = end
+                width = end - row_start
+                if width != indents[-1]:
+                    change = update_indents(indents, width, row)
+                    if change > 0:
+                        yield Token.INDENT, row_start, width, row, 0
+                    for _ in range(-change):
+                        yield Token.DEDENT, end, 0, row, 0
+                continue
+            elif kind == "DECIMAL":
+                # trailing space is matched, but it is not a part of the lexeme
+                token_kind, length, offset = Token.NUMBER_DECIMAL, match.end(kind) - start, end
+            elif kind == "PUNCT" or kind == "OP1":
+                token_kind, length, offset = lexeme_types[decode(match.group())], 1, start
+            elif kind == "OP2":
+                token_kind, length, offset = lexeme_types[decode(match.group())], 2, start + 1
+            elif kind == "BINARY":
+                token_kind, length, offset = Token.NUMBER_BINARY, end - start, end
+            elif kind == "HEX":
+                token_kind, length, offset = Token.NUMBER_HEX, end - start, end
+            elif kind == "STRING":
+                token_kind, length, offset = Token.STRING, end - start, end
+            else:
+                col = start - row_start if narrow else self._column(text, row_start, start)
+                raise UnrecognizedTokenException(f"Unrecognized token: {match.group()!r} in row={row}, pos={col}")
+            col = offset - row_start if narrow else self._column(text, row_start, offset)
+            yield token_kind, start, length, row, col
+
+        # closing the last logical line (with empty SLASH_N, as there is no newline in text)
+        # and all opened indentation levels
+        end = len(text)
+        if newline_end != end:
+            row += 1
+            yield Token.SLASH_N, end, 0, row, 0
+        for _ in indents[1:]:
+            yield Token.DEDENT, end, 0, row, 0
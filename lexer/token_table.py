@@ -0,0 +1,63 @@
+from array import array
+from typing import Iterator, Tuple
+
+from lexer.my_token import Token, TokenKind
+from lexer.source import SourceBuffer
+
+
+class TokenTable:
+    """
+    Struct of arrays token storage.
+    Token kinds, lexeme offsets/lengths and positions are kept in typed arrays (~17 bytes per token),
+    values are sliced from the source only when a token is requested.
+    Iterating over the table materialises tokens one by one, so it can be passed to Parser directly
+    """
+
+    __slots__ = ("source", "kinds", "starts", "lengths", "rows", "cols")
+
+    # index: TokenKind, faster than calling TokenKind(kind) for each token
+    _KINDS = tuple(TokenKind(i) if i in {kind.value for kind in TokenKind} else None
+                   for i in range(max(TokenKind) + 1))
+
+    def __init__(self, source: SourceBuffer):
+        self.source = source
+        self.kinds = array("B")
+        self.starts = array("I")  # offset of lexeme in source
+        self.lengths = array("I")  # length of lexeme in source
+        self.rows = array("I")
+        self.cols = array("I")  # position in row
+
+    def append(self, kind: TokenKind, start: int, length: int, row: int, col: int) -> None:
+        self.kinds.append(kind)
+        self.starts.append(start)
+        self.lengths.append(length)
+        self.rows.append(row)
+        self.cols.append(col)
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def kind(self, index: int) -> TokenKind:
+        return self._KINDS[self.kinds[index]]
+
+    def value(self, index: int) -> str:
+        start = self.starts[index]
+        value = self.source[start: start + self.lengths[index]]
+        return value if isinstance(value, str) else value.decode("utf-8")
+
+    def pos(self, index: int) -> Tuple[int, int]:
+        return self.rows[index], self.cols[index]
+
+    def __getitem__(self, index: int) -> Token:
+        return Token(self.value(index), self.kind(index), self.pos(index))
+
+    def __iter__(self) -> Iterator[Token]:
+        for index in range(len(self.kinds)):
+            yield self[index]
+
+    def memory_size(self) -> int:
+        """
+        Returns count of bytes used by the token arrays (source is not counted)
+        """
+        return sum(column.itemsize * len(column)
+                   for column in (self.kinds, self.starts, self.lengths, self.rows, self.cols))
@@ -1,14 +1,28 @@
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 
 from lexer.my_token import Token
 
 
 class AST:
+    """
+    Base of tree nodes. Nodes declare their attributes in __slots__, so they have no per instance dict
+    """
+    __slots__ = ()
+
+    @classmethod
+    def fields(cls) -> Tuple[str, ...]:
+        """
+        Returns names of node attributes declared in __slots__ of the node class and its bases
+        """
+        return tuple(name for klass in reversed(cls.__mro__) for name in klass.__dict__.get("__slots__", ()))
+
     def prettyAST(self, depth=0):
         pass
 
 
 class NumAST(AST):
+    __slots__ = ("token", "value")
+
     def __init__(self, token: Token):
         self.token = token
         self.value = token.value
@@ -18,11 +32,15 @@ class NumAST(AST):
 
 
 class ProgramAST(AST):
+    __slots__ = ("hl_statements",)
+
     def __init__(self, hl_statements):  # high level statements
         self.hl_statements = hl_statements
 
 
 class FunctionAST(AST):
+    __slots__ = ("func_id", "statement_list", "func_args")
+
     def __init__(self, func_id, statement_list, func_args: List[Token]):
         self.func_id = func_id
         self.statement_list = statement_list
@@ -30,12 +48,16 @@ class FunctionAST(AST):
 
 
 class FunctionCallAST(AST):
+    __slots__ = ("func_id", "args")
+
     def __init__(self, func_id, args: Optional[List[Token]] = None):
         self.func_id = func_id
         self.args = args
 
 
 class StatementsListAST(AST):
+    __slots__ = ("children",)
+
     def __init__(self, children):
         self.children = children
 
@@ -45,6 +67,8 @@ class StatementsListAST(AST):
 
 
 class AssignExpAST(AST):
+    __slots__ = ("var_id", "exp")
+
     def __init__(self, var_id: Token, exp):
         self.var_id = var_id
         self.exp = exp
@@ -62,6 +86,8 @@ class AssignExpAST(AST):
 
 
 class CondStatementAST(AST):
+    __slots__ = ("cond", "node_if", "node_else")
+
     def __init__(self, cond, node_if, node_else):
         self.cond = cond
         self.node_if = node_if
@@ -78,6 +104,8 @@ class CondStatementAST(AST):
 
 
 class WhileStatementAST(AST):
+    __slots__ = ("cond", "while_body")
+
     def __init__(self, cond, while_body):
         self.cond = cond
         self.while_body = while_body
@@ -87,6 +115,8 @@ class WhileStatementAST(AST):
 
 
 class BreakStatementAST(AST):
+    __slots__ = ()
+
     def __init__(self):
         pass
 
@@ -95,6 +125,8 @@ class BreakStatementAST(AST):
 
 
 class ContinueStatementAST(AST):
+    __slots__ = ()
+
     def __init__(self):
         pass
 
@@ -103,6 +135,8 @@ class ContinueStatementAST(AST):
 
 
 class ReturnStatementAST(AST):
+    __slots__ = ("exp",)
+
     def __init__(self, exp):
         self.exp = exp
 
@@ -111,6 +145,8 @@ class ReturnStatementAST(AST):
 
 
 class IdAST(AST):
+    __slots__ = ("var_id",)
+
     def __init__(self, var_id: str):
         self.var_id = var_id
 
@@ -122,6 +158,8 @@ class IdAST(AST):
 
 
 class BinOpAST(AST):
+    __slots__ = ("left", "op", "right")
+
     def __init__(self, left, op: Token, right):
         self.left: NumAST = left
         self.op = op
@@ -141,6 +179,8 @@ class BinOpAST(AST):
 
 
 class CompOpAST(AST):
+    __slots__ = ("left", "op", "right")
+
     def __init__(self, left, op: Token, right):
         self.left = left
         self.op = op
@@ -154,6 +194,8 @@ class CompOpAST(AST):
 
 
 class UnOpAST(AST):
+    __slots__ = ("op", "right")
+
     def __init__(self, op: Token, right):
         self.op = op
         self.right: NumAST = right
@@ -168,6 +210,8 @@ class UnOpAST(AST):
 
 
 class DecimalAST(NumAST):
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         super(DecimalAST, self).__init__(*args, **kwargs)
 
@@ -179,6 +223,8 @@ class DecimalAST(NumAST):
 
 
 class BinaryAST(NumAST):
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         super(BinaryAST, self).__init__(*args, **kwargs)
 
@@ -190,6 +236,8 @@ class BinaryAST(NumAST):
 
 
 class HexAST(NumAST):
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         super(HexAST, self).__init__(*args, **kwargs)
 
@@ -201,9 +249,44 @@ class HexAST(NumAST):
 
 
 class StringAST(AST):
+    __slots__ = ("token", "value")
+
     def __init__(self, token: Token):
         self.token = token
         self.value = token.value
 
     def __repr__(self):
         return f"StringASTNode({self.token}, {self.value})"
+
+
+def iter_statements(node: AST, with_expressions: bool = False) -> Iterator[AST]:
+    """
+    Yields node and statements in it in pre order and in order of text, with explicit stack, so trees
+    of any depth can be walked. With with_expressions nodes of expressions are yielded as well
+    """
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        yield item
+        # children are pushed in reverse order, so they are yielded in order of text
+        if isinstance(item, StatementsListAST):
+            stack.extend(reversed(item.children))
+        elif isinstance(item, FunctionAST):
+            stack.append(item.statement_list)
+        elif isinstance(item, CondStatementAST):
+            stack.extend((item.node_else, item.node_if))
+            if with_expressions:
+                stack.append(item.cond)
+        elif isinstance(item, WhileStatementAST):
+            stack.append(item.while_body)
+            if with_expressions:
+                stack.append(item.cond)
+        elif not with_expressions:
+            continue
+        elif isinstance(item, (AssignExpAST, ReturnStatementAST)):
+            if item.exp is not None:
+                stack.append(item.exp)
+        elif isinstance(item, (BinOpAST, CompOpAST)):
+            stack.extend((item.right, item.left))
+        elif isinstance(item, UnOpAST):
+            stack.append(item.right)
@@ -0,0 +1,240 @@
+from array import array
+from typing import Dict, List, Optional, Tuple, Type
+
+from lexer.my_token import Token, TokenKind
+from my_parser.AST import AST, StringAST, DecimalAST, BinOpAST, UnOpAST, AssignExpAST, StatementsListAST, IdAST, \
+    CondStatementAST, FunctionAST, FunctionCallAST, ProgramAST, WhileStatementAST, BreakStatementAST, \
+    ContinueStatementAST, ReturnStatementAST, CompOpAST, BinaryAST, HexAST
+
+# kinds of node fields
+NODE = 0  # index of node
+NODES = 1  # list of nodes
+TOKEN = 2  # index of token in token columns
+TOKENS = 3  # list of tokens
+STRING = 4  # index of interned string
+
+# node type: (field name, field kind) in order of node constructor arguments
+LAYOUTS: Dict[Type[AST], Tuple[Tuple[str, int], ...]] = {
+    ProgramAST: (("hl_statements", NODES),),
+    FunctionAST: (("func_id", TOKEN), ("statement_list", NODE), ("func_args", TOKENS)),
+    FunctionCallAST: (("func_id", TOKEN), ("args", TOKENS)),
+    StatementsListAST: (("children", NODES),),
+    AssignExpAST: (("var_id", TOKEN), ("exp", NODE)),
+    CondStatementAST: (("cond", NODE), ("node_if", NODE), ("node_else", NODE)),
+    WhileStatementAST: (("cond", NODE), ("while_body", NODE)),
+    BreakStatementAST: (),
+    ContinueStatementAST: (),
+    ReturnStatementAST: (("exp", NODE),),
+    IdAST: (("var_id", STRING),),
+    BinOpAST: (("left", NODE), ("op", TOKEN), ("right", NODE)),
+    CompOpAST: (("left", NODE), ("op", TOKEN), ("right", NODE)),
+    UnOpAST: (("op", TOKEN), ("right", NODE)),
+    # value of number and string nodes is the value of their token
+    DecimalAST: (("token", TOKEN),),
+    BinaryAST: (("token", TOKEN),),
+    HexAST: (("token", TOKEN),),
+    StringAST: (("token", TOKEN),),
+}
+
+
+class ASTArena:
+    """
+    Flat tree storage in parallel typed arrays.
+    Node i has kind kinds[i] (index in NODE_TYPES) and its fields are refs[starts[i]:starts[i] + len(layout)],
+    -1 stands for None. Lists are stored in lists as count followed by items, tokens are stored in token
+    columns with interned values, so no AST or Token objects are kept alive.
+    view(index) returns thin view object, which is an instance of the node class and decodes fields
+    on access, so the tree can be passed to Interpreter as it is
+    """
+
+    __slots__ = ("kinds", "starts", "refs", "lists", "token_values", "token_kinds", "token_rows", "token_cols",
+                 "strings", "_string_ids")
+
+    NODE_TYPES: Tuple[Type[AST], ...] = tuple(LAYOUTS)
+    # node type: (kind, kinds of fields)
+    _TYPE_INFO: Dict[Type[AST], Tuple[int, Tuple[int, ...]]] = {
+        node_type: (kind, tuple(field_kind for _, field_kind in LAYOUTS[node_type]))
+        for kind, node_type in enumerate(NODE_TYPES)
+    }
+    # index: TokenKind
+    _TOKEN_KINDS = tuple(TokenKind(i) if i in {kind.value for kind in TokenKind} else None
+                         for i in range(max(TokenKind) + 1))
+
+    def __init__(self):
+        self.kinds = array("B")
+        self.starts = array("I")  # offset of node fields in refs
+        self.refs = array("i")
+        self.lists = array("i")  # count of items followed by items, for each list field
+        self.token_values = array("I")  # index in strings
+        self.token_kinds = array("B")
+        self.token_rows = array("I")  # 0 for tokens without position
+        self.token_cols = array("I")
+        self.strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+
+    @classmethod
+    def from_tree(cls, tree: AST) -> Tuple["ASTArena", int]:
+        """
+        Copies tree of node objects to a new arena, returns arena and index of the root node
+        """
+        arena = cls()
+        return arena, arena.add_tree(tree)
+
+    @classmethod
+    def of_tree(cls, tree: AST) -> Tuple["ASTArena", int]:
+        """
+        Returns arena and index of the root node of tree, which is the arena of the view itself
+        if tree is arena view, otherwise a copy made by from_tree
+        """
+        if isinstance(tree, _VIEW_TYPES):
+            return tree._arena, tree._index
+        return cls.from_tree(tree)
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def add(self, node_type: Type[AST], *args) -> int:
+        """
+        Adds node built from the same arguments as node_type constructor, but with indices of nodes
+        instead of nodes. Returns index of the new node
+        """
+        index = len(self.kinds)
+        kind, field_kinds = self._TYPE_INFO[node_type]
+        self.kinds.append(kind)
+        refs = self.refs
+        self.starts.append(len(refs))
+        encode = self._encode
+        # node indices are stored as they are, other fields are encoded
+        refs.extend([-1 if value is None else value if field_kind == NODE else encode(field_kind, value)
+                     for field_kind, value in zip(field_kinds, args)])
+        if len(args) < len(field_kinds):
+            # omitted optional arguments
+            refs.extend([-1] * (len(field_kinds) - len(args)))
+        return index
+
+    def add_tree(self, tree: AST) -> int:
+        """
+        Adds tree of node objects in pre order with explicit stack, returns index of the root node
+        """
+        root = len(self.kinds)
+        # (node, array and position in it which should be set to index of the node)
+        stack: List[Tuple[AST, Optional[array], int]] = [(tree, None, 0)]
+        while stack:
+            node, refs, ref = stack.pop()
+            if refs is not None:
+                refs[ref] = len(self.kinds)
+            # views of other arenas are copied as nodes of their base node class
+            node_type = next(base for base in type(node).__mro__ if base in LAYOUTS)
+            layout = LAYOUTS[node_type]
+            values = [getattr(node, name) for name, _ in layout]
+            # child nodes are added later, lists of them are added with -1 placeholders
+            args = [None if kind == NODE else [-1] * len(value) if kind == NODES and value is not None else value
+                    for (_, kind), value in zip(layout, values)]
+            start = self.starts[self.add(node_type, *args)]
+            for position, ((_, kind), value) in reversed(list(enumerate(zip(layout, values)))):
+                if value is None:
+                    continue
+                if kind == NODE:
+                    stack.append((value, self.refs, start + position))
+                elif kind == NODES:
+                    items_start = self.refs[start + position] + 1
+                    stack.extend((item, self.lists, items_start + i) for i, item in reversed(list(enumerate(value))))
+        return root
+
+    def view(self, index: int) -> AST:
+        return _VIEW_TYPES[self.kinds[index]](self, index)
+
+    def memory_size(self) -> int:
+        """
+        Returns count of bytes used by arrays of the arena and interned strings
+        """
+        columns = (self.kinds, self.starts, self.refs, self.lists, self.token_values, self.token_kinds,
+                   self.token_rows, self.token_cols)
+        return sum(column.itemsize * len(column) for column in columns) + sum(map(len, self.strings))
+
+    def _encode(self, field_kind: int, value) -> int:
+        if field_kind == TOKEN:
+            return self._add_token(value)
+        if field_kind == STRING:
+            return self._intern(value)
+        offset = len(self.lists)
+        self.lists.append(len(value))
+        self.lists.extend(value if field_kind == NODES else map(self._add_token, value))
+        return offset
+
+    def _intern(self, string: str) -> int:
+        string_id = self._string_ids.get(string)
+        if string_id is None:
+            string_id = self._string_ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    def _add_token(self, token: Token) -> int:
+        index = len(self.token_kinds)
+        string_id = self._string_ids.get(token.value)
+        self.token_values.append(self._intern(token.value) if string_id is None else string_id)
+        self.token_kinds.append(token.tok_type)
+        row, col = token.pos or (0, 0)
+        self.token_rows.append(row)
+        self.token_cols.append(col)
+        return index
+
+    def _decode(self, field_kind: int, ref: int):
+        if ref < 0:
+            return None
+        if field_kind == NODE:
+            return self.view(ref)
+        if field_kind == TOKEN:
+            return self._token(ref)
+        if field_kind == STRING:
+            return self.strings[ref]
+        items = self.lists[ref + 1: ref + 1 + self.lists[ref]]
+        decode = self.view if field_kind == NODES else self._token
+        return [decode(item) for item in items]
+
+    def _token(self, index: int) -> Token:
+        row = self.token_rows[index]
+        pos = (row, self.token_cols[index]) if row else None
+        return Token(self.strings[self.token_values[index]], self._TOKEN_KINDS[self.token_kinds[index]], pos)
+
+
+def _field_property(field_kind: int, position: int) -> property:
+    def get(view):
+        arena = view._arena
+        return arena._decode(field_kind, arena.refs[arena.starts[view._index] + position])
+    return property(get)
+
+
+def _token_value_property(position: int) -> property:
+    def get(view):
+        arena = view._arena
+        token = arena.refs[arena.starts[view._index] + position]
+        return arena.strings[arena.token_values[token]]
+    return property(get)
+
+
+def _view_init(view, arena: ASTArena, index: int) -> None:
+    view._arena = arena
+    view._index = index
+
+
+def _make_view_type(node_type: Type[AST]) -> type:
+    """
+    Returns subclass of node_type with the same name, whose fields are read from arena,
+    so visitors which dispatch on class name or use isinstance work with views unchanged
+    """
+    layout = LAYOUTS[node_type]
+    namespace = {
+        "__slots__": ("_arena", "_index"),
+        "__init__": _view_init,
+        "fields": classmethod(lambda cls: node_type.fields()),
+    }
+    for position, (name, field_kind) in enumerate(layout):
+        namespace[name] = _field_property(field_kind, position)
+        if name == "token":
+            namespace["value"] = _token_value_property(position)
+    return type(node_type.__name__, (node_type,), namespace)
+
+
+# node kind: view type
+_VIEW_TYPES = tuple(_make_view_type(node_type) for node_type in ASTArena.NODE_TYPES)
@@ -1,86 +1,124 @@
-from typing import List, Type
+from typing import Iterable, List, Optional, Tuple, Type
 
 from my_parser.AST import AST, StringAST, DecimalAST, BinOpAST, UnOpAST, AssignExpAST, StatementsListAST, IdAST, \
     CondStatementAST, FunctionAST, FunctionCallAST, ProgramAST, WhileStatementAST, BreakStatementAST, \
     ContinueStatementAST, ReturnStatementAST, CompOpAST, BinaryAST, HexAST
 from exceptions.my_exceptions import InvalidSyntaxException, EOF
 from lexer.my_token import Token
+from my_parser.ast_arena import ASTArena
+from my_parser.token_stream import TokenStream
 
 
 class Parser:
     """
-    program: func_expr* | func_call
-    func_expr: DEF WORD L_BRACKET R_BRACKET COLON SLASH_N statement_list
+    program: (func_expr | func_call SLASH_N | SLASH_N)*
+    func_expr: DEF WORD L_BRACKET R_BRACKET COLON statement_list
     func_call: ID L_BRACKET top_level_exp (COMMA top_level_exp)* R_BRACKET
-    statement_list: statement | statement SLASH_N SLASH_T* statement_list
-    statement: assignment_statement | RETURN top_level_exp | conditional_statement
-    | while_statement
+    statement_list: SLASH_N INDENT statement+ DEDENT
+    statement: simple_statement SLASH_N | conditional_statement | while_statement
+    simple_statement: assignment_statement | RETURN top_level_exp | BREAK | CONTINUE
     assignment_statement: ID ("=" | "*=") top_level_exp
-    conditional_statement:
-    IF top_level_exp COLON SLASH_N statement_list SLASH_T* ELSE COLON SLASH_N statement_list
+    conditional_statement: IF top_level_exp COLON statement_list ELSE COLON statement_list
+    while_statement: WHILE top_level_exp COLON statement_list
 
     ========================== arithmetical expressions ===========================
-    top_level_exp: exp_or
-    exp_or: exp_comp (OR exp_comp)* | exp_comp
-    exp_comp: exp ((EQ | NEQ | GR | LS | GRE | LSE) exp)* | exp
-    exp: term ((MINUS | PLUS) term)* | term
-    term: factor ((DIV | MUL | MOD) factor)* | factor
-    factor: L_BRACKET top_level_exp R_BRACKET | unary_op | number | STRING | ID
-    number: DECIMAL | BINARY
+    top_level_exp: func_call | binary_exp
+    binary_exp: factor (binary_op factor)*, binary operations from the lowest precedence:
+        OR
+        EQ | NEQ | GR | LS | GRE | LSE
+        MINUS | PLUS
+        DIV | MUL | MOD
+    factor: L_BRACKET top_level_exp R_BRACKET | unary_op | atom
     unary_op: MINUS factor
+    atom: number | STRING | ID
+    number: DECIMAL | BINARY | HEX
     """
 
-    def __init__(self, tokens_list):
-        self.tokens_list: List[Token] = tokens_list
-        self.pos = 0
+    # operation: precedence, higher precedence binds tighter
+    BINARY_PRECEDENCE = {
+        Token.OPERATIONS["OR"]: 1,
+        Token.OPERATIONS["EQ"]: 2,
+        Token.OPERATIONS["NEQ"]: 2,
+        Token.OPERATIONS["GR"]: 2,
+        Token.OPERATIONS["LS"]: 2,
+        Token.OPERATIONS["GRE"]: 2,
+        Token.OPERATIONS["LSE"]: 2,
+        Token.OPERATIONS["MINUS"]: 3,
+        Token.OPERATIONS["PLUS"]: 3,
+        Token.OPERATIONS["DIV"]: 4,
+        Token.OPERATIONS["MUL"]: 4,
+        Token.OPERATIONS["MOD"]: 4,
+    }
+    # precedences of operations which are not binary, lower than any binary precedence
+    UNARY = 0
+    BRACKET = -1
+
+    # precedence: node of operation
+    BINARY_NODES = {
+        1: BinOpAST,
+        2: CompOpAST,
+        3: BinOpAST,
+        4: BinOpAST,
+    }
+
+    def __init__(self, tokens: Iterable[Token], arena: Optional[ASTArena] = None):
+        # tokens may be a list or a lazy generator (Lexer.iter_tokens), in both cases they are pulled
+        # through the TokenStream lookahead buffer
+        self.tokens = TokenStream(tokens)
         # set current token to the first token taken from the input
-        self.current_token = self.tokens_list[self.pos]
+        self.current_token = self.tokens.peek()
+        # with arena nodes are stored in its arrays instead of node objects
+        self.arena = arena
 
     def parse(self) -> ProgramAST:
-        return self._program()
+        """
+        Returns tree of node objects, or view of the root node when nodes are stored in arena
+        """
+        root = self._program()
+        if self.arena is not None:
+            return self.arena.view(root)
+        return root
+
+    def _node(self, node_type: Type[AST], *args):
+        """
+        Creates node object, or adds node to arena and returns its index
+        """
+        if self.arena is None:
+            return node_type(*args)
+        return self.arena.add(node_type, *args)
 
     def _program(self) -> ProgramAST:
         """
-        program: function_exr * | function_call
+        program: (func_expr | func_call SLASH_N | SLASH_N)*
         """
-        nesting = 0
         hl_statements = list()  # high level statements
 
-        hl_statements.append(self._func_expr(nesting))
-
-        while self._is_specific_token(Token.SLASH_N) or self._is_specific_token(Token.SLASH_T):
-            self._check(self.current_token.tok_type)
-
-        # if self._is_specific_token(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["DEF"]):
-        #     hl_statements.append(self._func_expr(nesting))
-        #
-        # while self._is_specific_token(Token.SLASH_N) or self._is_specific_token(Token.SLASH_T):
-        #     self._check(self.current_token.tok_type)
-        #
-        # if self._is_specific_token(Token.ID):
-        #     hl_statements.append(self._func_call())
         while self.current_token != EOF:
-            if self._is_specific_token(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["DEF"]):
-                hl_statements.append(self._func_expr(nesting))
-
-            if self._is_specific_token(Token.ID):
+            if self._is_specific_token(Token.SLASH_N):
+                self._check(Token.SLASH_N)
+            elif self._is_specific_token(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["DEF"]):
+                hl_statements.append(self._func_expr())
+            elif self._is_specific_token(Token.ID):
                 hl_statements.append(self._func_call())
+                self._check(Token.SLASH_N)
+            else:
+                raise InvalidSyntaxException(
+                    f"Token {self.current_token.value} "
+                    f"in row={self.current_token.pos[0]}, pos={self.current_token.pos[1]} "
+                    f"should not be here"
+                )
 
-            while self._is_specific_token(Token.SLASH_N) or self._is_specific_token(Token.SLASH_T):
-                self._check(self.current_token.tok_type)
-
-        node = ProgramAST(hl_statements)
+        node = self._node(ProgramAST, hl_statements)
 
         return node
 
-    def _func_expr(self, nesting: int) -> FunctionAST:
+    def _func_expr(self) -> FunctionAST:
         """
-        main_func_expr: DEF WORD L_BRACKET R_BRACKET COLON SLASH_N statement_list
+        func_expr: DEF WORD L_BRACKET R_BRACKET COLON statement_list
         """
         func_id = None  # func_id won't be None anyway due to raised exceptions in _check methods
         func_args = []
 
-        self._check_indent(nesting)
         self._check(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["DEF"])
 
         if self._is_specific_token(Token.ID):
@@ -106,11 +144,9 @@ class Parser:
 
         # self._check(Token.R_BRACKET)
         self._check(Token.COLON)
-        self._check(Token.SLASH_N)
-        # self._check(Token.SLASH_T)
 
-        statement_list = self._statement_list(nesting + 1)
-        node = FunctionAST(func_id, statement_list, func_args)
+        statement_list = self._statement_list()
+        node = self._node(FunctionAST, func_id, statement_list, func_args)
 
         return node
 
@@ -125,7 +161,7 @@ class Parser:
         self._check(Token.L_BRACKET)
         if self._is_specific_token(Token.R_BRACKET):
             self._check(Token.R_BRACKET)
-            node = FunctionCallAST(func_id)
+            node = self._node(FunctionCallAST, func_id)
         elif self._is_specific_token(Token.ID) \
                 or self._is_specific_token(Token.NUMBER_HEX) \
                 or self._is_specific_token(Token.NUMBER_DECIMAL) \
@@ -144,61 +180,37 @@ class Parser:
                     raise InvalidSyntaxException(f"Here should be variable or number, not {self.current_token}")
 
             self._check(Token.R_BRACKET)
-            node = FunctionCallAST(func_id, arg_list)
+            node = self._node(FunctionCallAST, func_id, arg_list)
 
         if node is None:
             raise InvalidSyntaxException(f"Wrong function call in function {func_id}")
         return node
 
-    def _statement_list(self, nesting: int, is_cycle_body=False) -> Type[AST]:
+    def _statement_list(self, is_cycle_body=False) -> StatementsListAST:
         """
-        statement_list: statement | statement SLASH_N SLASH_T* statement_list
+        statement_list: SLASH_N INDENT statement+ DEDENT
         """
+        self._check(Token.SLASH_N)
+        self._check(Token.INDENT)
+        statements = [self._statement(is_cycle_body)]
+        while not self._is_specific_token(Token.DEDENT):
+            statements.append(self._statement(is_cycle_body))
+        self._check(Token.DEDENT)
 
-        self._check_indent(nesting)
-        statements = [self._statement(nesting, is_cycle_body)]
-        if not self._checkEOF():
-            while self._is_specific_token(Token.SLASH_T) and self._is_in_previous_row():
-                self._check(Token.SLASH_T)
-            if self._is_specific_token(Token.SLASH_N):
-                self._check(Token.SLASH_N)
-
-        # todo set here check end of block
-        if self._end_of_block(nesting):
-            return StatementsListAST(statements)
+        return self._node(StatementsListAST, statements)
 
-        while not self._checkEOF():
-            # handle new line
-            # if self.current_token.tok_type == Token.SLASH_N:
-            while self._is_specific_token(Token.SLASH_N):
-                while self._is_specific_token(Token.SLASH_T):
-                    self._check(Token.SLASH_T)
-                self._check(Token.SLASH_N)
-            if self._checkEOF():
-                break
-            self._check_indent(nesting)
-            if self._checkEOF():
-                break
-            if self._is_statement():
-                statements.append(self._statement(nesting, is_cycle_body))
-                if self._end_of_block(nesting):
-                    if self._is_specific_token(Token.SLASH_N):
-                        self._check(Token.SLASH_N)
-                    break
-        return StatementsListAST(statements)
-
-    def _statement(self, nesting: int, is_cycle_body=False) -> Type[AST]:
+    def _statement(self, is_cycle_body=False) -> Type[AST]:
         """
-        statement: assignment_statement | RETURN top_level_exp | conditional_statement
-        | while_statement
+        statement: simple_statement SLASH_N | conditional_statement | while_statement
+        simple_statement: assignment_statement | RETURN top_level_exp | BREAK | CONTINUE
         """
         node = None
-        if self._is_specific_token(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["RETURN"]):
-            node = self._return_statement()
-        elif self._is_specific_token(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["IF"]):
-            node = self._conditional_statement(nesting, is_cycle_body)
+        if self._is_specific_token(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["IF"]):
+            return self._conditional_statement(is_cycle_body)
         elif self._is_specific_token(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["WHILE"]):
-            node = self._while_statement(nesting)
+            return self._while_statement()
+        elif self._is_specific_token(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["RETURN"]):
+            node = self._return_statement()
         elif is_cycle_body and self._is_specific_token(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["BREAK"]):
             node = self._break_statement()
         elif is_cycle_body and self._is_specific_token(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["CONTINUE"]):
@@ -209,6 +221,7 @@ class Parser:
         if node is None:
             raise InvalidSyntaxException("Not matches with any statement")
 
+        self._check(Token.SLASH_N)
         return node
 
     def _assignment_statement(self) -> AssignExpAST:
@@ -223,231 +236,163 @@ class Parser:
             exp = self._top_level_exp()
         elif self._is_specific_token(Token.ASSIGN, Token.ASSIGNS["ASSIGN_MUL"]):
             self._check(Token.ASSIGN, Token.ASSIGNS["ASSIGN_MUL"])
-            exp = BinOpAST(IdAST(var_id.value), Token("*", Token.OPERATION), self._top_level_exp())
+            exp = self._node(
+                BinOpAST, self._node(IdAST, var_id.value), Token("*", Token.OPERATION), self._top_level_exp()
+            )
         elif self._is_specific_token(Token.ASSIGN, Token.ASSIGNS["ASSIGN_SUM"]):
             self._check(Token.ASSIGN, Token.ASSIGNS["ASSIGN_SUM"])
-            exp = BinOpAST(IdAST(var_id.value), Token("+", Token.OPERATION), self._top_level_exp())
+            exp = self._node(
+                BinOpAST, self._node(IdAST, var_id.value), Token("+", Token.OPERATION), self._top_level_exp()
+            )
         else:
             raise InvalidSyntaxException("Wrong token in factor expression")
 
-        return AssignExpAST(var_id, exp)
+        return self._node(AssignExpAST, var_id, exp)
 
     def _return_statement(self):
         self._check(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["RETURN"])
-        return ReturnStatementAST(exp=self._top_level_exp())
+        return self._node(ReturnStatementAST, self._top_level_exp())
 
-    def _conditional_statement(self, nesting: int, is_cycle_body=False) -> CondStatementAST:
+    def _conditional_statement(self, is_cycle_body=False) -> CondStatementAST:
         """
-        conditional_statement:
-        IF top_level_exp COLON SLASH_N statement_list SLASH_T* ELSE COLON SLASH_N statement_list
+        conditional_statement: IF top_level_exp COLON statement_list ELSE COLON statement_list
         """
         self._check(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["IF"])
         cond_exp = self._top_level_exp()
         self._check(Token.COLON)
-        self._check(Token.SLASH_N)
-        node_if = self._statement_list(nesting + 1, is_cycle_body)
-        if not self._is_specific_token(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["ELSE"]):
-            self._check_indent(nesting)
+        node_if = self._statement_list(is_cycle_body)
         self._check(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["ELSE"])
         self._check(Token.COLON)
-        self._check(Token.SLASH_N)
-        node_else = self._statement_list(nesting + 1, is_cycle_body)
+        node_else = self._statement_list(is_cycle_body)
 
-        return CondStatementAST(cond_exp, node_if, node_else)
+        return self._node(CondStatementAST, cond_exp, node_if, node_else)
 
-    def _while_statement(self, nesting) -> WhileStatementAST:
+    def _while_statement(self) -> WhileStatementAST:
+        """
+        while_statement: WHILE top_level_exp COLON statement_list
+        """
         self._check(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["WHILE"])
         cond_exp = self._top_level_exp()
         self._check(Token.COLON)
-        self._check(Token.SLASH_N)
-        while_body = self._statement_list(nesting + 1, True)
+        while_body = self._statement_list(True)
 
-        return WhileStatementAST(cond_exp, while_body)
+        return self._node(WhileStatementAST, cond_exp, while_body)
 
     def _break_statement(self) -> BreakStatementAST:
         self._check(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["BREAK"])
-        return BreakStatementAST()
+        return self._node(BreakStatementAST)
 
     def _continue_statement(self) -> ContinueStatementAST:
         self._check(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["CONTINUE"])
-        return ContinueStatementAST()
+        return self._node(ContinueStatementAST)
 
     def _top_level_exp(self) -> Type[AST]:
         node = None
         if self._is_specific_token(Token.ID) and self._is_next_specific_token(Token.L_BRACKET):
             node = self._func_call()
         else:
-            node = self._exp_or()
+            node = self._binary_exp()
         return node
 
-    def _exp_or(self) -> Type[AST]:
+    def _binary_exp(self) -> Type[AST]:
         """
-        exp_or: exp_comp (OR exp_comp)* | exp_comp
+        Operator precedence parsing over BINARY_PRECEDENCE with explicit operand and operation stacks,
+        so expressions of any nesting depth are parsed without recursion.
+        All binary operations are left associative, unary minus applies to the factor right after it
+        binary_exp: factor (binary_op factor)*
+        factor: L_BRACKET top_level_exp R_BRACKET | MINUS factor | atom
         """
+        operands: List[AST] = []
+        # (token, precedence), unary minuses and opened brackets have UNARY and BRACKET precedences
+        operations: List[Tuple[Token, int]] = []
+        brackets_count = 0
 
-        if self.current_token == EOF:
-            raise InvalidSyntaxException("End of file")
-
-        node = None
-
-        node = self._exp_comp()
-        token = self.current_token
-        while self.current_token != EOF \
-                and self.current_token.tok_type == Token.OPERATION \
-                and self.current_token.value in (Token.OPERATIONS["OR"],):
-            if token.value == Token.OPERATIONS["OR"]:
-                self._check(Token.OPERATION, Token.OPERATIONS["OR"])
-
-            node = BinOpAST(node, token, self._exp_comp())
+        while True:
+            # prefix part of factor: opened brackets and unary minuses, then the innermost operand
             token = self.current_token
+            while True:
+                if token == EOF:
+                    raise InvalidSyntaxException("End of file")
+                if token.tok_type == Token.L_BRACKET:
+                    self._set_next_token()
+                    if self._is_specific_token(Token.ID) and self._is_next_specific_token(Token.L_BRACKET):
+                        # function call can only be the whole expression in brackets
+                        operands.append(self._func_call())
+                        self._check(Token.R_BRACKET)
+                        break
+                    operations.append((token, self.BRACKET))
+                    brackets_count += 1
+                elif token.tok_type == Token.OPERATION and token.value == Token.OPERATIONS["MINUS"]:
+                    self._set_next_token()
+                    operations.append((token, self.UNARY))
+                else:
+                    operands.append(self._atom())
+                    break
+                token = self.current_token
 
-        if node is None:
-            raise InvalidSyntaxException(
-                f"Wrong token {self.current_token.value} "
-                f"in row={self.current_token.pos[0]}, pos={self.current_token.pos[1]} "
-                f"in exp_or"
-            )
-
-        return node
-
-    def _exp_comp(self) -> Type[AST]:
-        """
-        exp_comp: exp ((EQ | NEQ | GR | LS | GRE | LSE) exp)* | exp
-        """
-
-        if self.current_token == EOF:
-            raise InvalidSyntaxException("End of file")
+            # postfix part of factor: unary minuses before the factor and closing brackets
+            while True:
+                while operations and operations[-1][1] == self.UNARY:
+                    operands.append(self._node(UnOpAST, operations.pop()[0], operands.pop()))
+                if not brackets_count or not self._is_specific_token(Token.R_BRACKET):
+                    break
+                self._reduce(operands, operations, 1)
+                operations.pop()
+                brackets_count -= 1
+                self._set_next_token()
 
-        node = self._expression()
-        token = self.current_token
-        while self.current_token != EOF \
-                and self.current_token.tok_type == Token.OPERATION \
-                and self.current_token.value in (
-                Token.OPERATIONS["EQ"],
-                Token.OPERATIONS["NEQ"],
-                Token.OPERATIONS["GR"],
-                Token.OPERATIONS["LS"],
-                Token.OPERATIONS["GRE"],
-                Token.OPERATIONS["LSE"],
-        ):
-            self._check(token.tok_type)
-
-            node = CompOpAST(node, token, self._expression())
             token = self.current_token
+            precedence = None
+            if token != EOF and token.tok_type == Token.OPERATION:
+                precedence = self.BINARY_PRECEDENCE.get(token.value)
+            if precedence is None:
+                break
+            # reducing operations with the same precedence first makes them left associative
+            self._reduce(operands, operations, precedence)
+            operations.append((token, precedence))
+            self._set_next_token()
 
-        if node is None:
-            raise InvalidSyntaxException(
-                f"Wrong token {self.current_token.value} "
-                f"in row={self.current_token.pos[0]}, pos={self.current_token.pos[1]} "
-                f"in exp_comp"
-            )
+        if brackets_count:
+            self._check(Token.R_BRACKET)
+        self._reduce(operands, operations, 1)
 
-        return node
+        return operands[0]
 
-    def _expression(self) -> Type[AST]:
+    def _reduce(self, operands: List[AST], operations: List[Tuple[Token, int]], min_precedence: int) -> None:
         """
-        exp: term ((MINUS | PLUS) term)* | term
+        Builds nodes of binary operations on top of the stack which have precedence >= min_precedence
         """
+        while operations and operations[-1][1] >= min_precedence:
+            token, precedence = operations.pop()
+            right = operands.pop()
+            operands[-1] = self._node(self.BINARY_NODES[precedence], operands[-1], token, right)
 
-        if self.current_token == EOF:
-            raise InvalidSyntaxException("End of file")
-
-        node = None
-
-        node = self._term()
-        token = self.current_token
-        while self.current_token != EOF \
-                and self.current_token.tok_type == Token.OPERATION \
-                and self.current_token.value in (
-                Token.OPERATIONS["MINUS"], Token.OPERATIONS["PLUS"]):
-            if token.value == Token.OPERATIONS["MINUS"]:
-                self._check(Token.OPERATION, Token.OPERATIONS["MINUS"])
-            elif token.value == Token.OPERATIONS["PLUS"]:
-                self._check(Token.OPERATION, Token.OPERATIONS["PLUS"])
-            node = BinOpAST(node, token, self._term())
-            token = self.current_token
-
-        if node is None:
-            raise InvalidSyntaxException(
-                f"Wrong token {self.current_token.value} "
-                f"in row={self.current_token.pos[0]}, pos={self.current_token.pos[1]} "
-                f"in expression"
-            )
-
-        return node
-
-    def _term(self) -> Type[AST]:
+    def _atom(self) -> Type[AST]:
         """
-        term: factor ((DIV | MUL | MOD) factor)* | factor
+        atom: number | STRING | ID
         """
-        if self.current_token == EOF:
-            raise InvalidSyntaxException("End of file")
-
-        # node = None
-
-        node = self._factor()
         token = self.current_token
-        while self.current_token != EOF \
-                and self.current_token.tok_type == Token.OPERATION \
-                and self.current_token.value in (
-                Token.OPERATIONS["DIV"], Token.OPERATIONS["MUL"], Token.OPERATIONS["MOD"]):
-            if token.value == Token.OPERATIONS["DIV"]:
-                self._check(Token.OPERATION, Token.OPERATIONS["DIV"])
-            elif token.value == Token.OPERATIONS["MUL"]:
-                self._check(Token.OPERATION, Token.OPERATIONS["MUL"])
-            elif token.value == Token.OPERATIONS["MOD"]:
-                self._check(Token.OPERATION, Token.OPERATIONS["MOD"])
-            node = BinOpAST(node, token, self._factor())
-            token = self.current_token
-
-        if node is None:
-            raise InvalidSyntaxException(
-                f"Wrong token {self.current_token.value} "
-                f"in row={self.current_token.pos[0]}, pos={self.current_token.pos[1]} "
-                "in term expression"
-            )
-
-        return node
-
-    def _factor(self) -> Type[AST]:
-        """
-        factor: L_BRACKET top_level_exp R_BRACKET | unary_op | number | STRING | ID
-        """
-        if self.current_token == EOF:
-            raise InvalidSyntaxException("End of file")
-
         node = None
 
-        token = self.current_token
-
-        if token.tok_type == Token.L_BRACKET:
-            self._check(Token.L_BRACKET)
-            node = self._top_level_exp()
-            self._check(Token.R_BRACKET)
-
-        if token.tok_type == Token.OPERATION and token.value == Token.OPERATIONS["MINUS"]:
-            self._check(Token.OPERATION, Token.OPERATIONS["MINUS"])
-            node = UnOpAST(token, self._factor())
-
-        elif token.tok_type == Token.NUMBER_DECIMAL:
+        if token.tok_type == Token.NUMBER_DECIMAL:
             self._check(Token.NUMBER_DECIMAL)
-            node = DecimalAST(token)
+            node = self._node(DecimalAST, token)
 
         elif token.tok_type == Token.NUMBER_BINARY:
             self._check(Token.NUMBER_BINARY)
-            node = BinaryAST(token)
+            node = self._node(BinaryAST, token)
 
         elif token.tok_type == Token.NUMBER_HEX:
             self._check(Token.NUMBER_HEX)
-            node = HexAST(token)
+            node = self._node(HexAST, token)
 
         elif token.tok_type == Token.STRING:
             self._check(Token.STRING)
-            node = StringAST(self.current_token)
+            node = self._node(StringAST, token)
 
         elif token.tok_type == Token.ID:
             self._check(Token.ID)
-            node = IdAST(token.value)
+            node = self._node(IdAST, token.value)
 
         if node is None:
             raise InvalidSyntaxException("Wrong token in factor expression")
@@ -455,11 +400,7 @@ class Parser:
         return node
 
     def _set_next_token(self) -> None:
-        self.pos += 1
-        if self.pos < len(self.tokens_list):
-            self.current_token = self.tokens_list[self.pos]
-        else:
-            self.current_token = EOF
+        self.current_token = self.tokens.advance()
 
     def _checkEOF(self):
         if self.current_token == EOF:
@@ -496,52 +437,5 @@ class Parser:
             return False
 
     def _is_next_specific_token(self, tok_type, value=None) -> bool:
-        next_token = self.tokens_list[self.pos + 1]
+        next_token = self.tokens.peek(1)
         return self._is_specific_token(tok_type, value, next_token)
-
-    def _check_indent(self, nesting: int):
-        for i in range(nesting):
-            self._check(Token.SLASH_T)
-
-    def _is_statement(self) -> bool:
-        if self._is_specific_token(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["RETURN"]) \
-                or self._is_specific_token(Token.ID) \
-                or self._is_specific_token(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["IF"]) \
-                or self._is_specific_token(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["WHILE"]) \
-                or self._is_specific_token(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["BREAK"]) \
-                or self._is_specific_token(Token.BUILTIN_WORD, Token.BUILTIN_WORDS["CONTINUE"]):
-            return True
-        return False
-
-    def _is_in_previous_row(self):
-        token = self.current_token
-        pos_offset = 0
-        while True:
-            while token.tok_type == Token.SLASH_T:
-                pos_offset += 1
-                token = self.tokens_list[self.pos + pos_offset]
-            if token.tok_type == Token.SLASH_N:
-                return True
-            else:
-                return False
-
-    def _end_of_block(self, nesting):
-        if self.current_token == EOF:
-            return True
-        pos = self.pos
-        token = self.tokens_list[pos]
-        # if token.tok_type != Token.SLASH_N:
-        #     return True
-
-        # pos += 1
-        # token = self.tokens_list[pos]
-        if token.tok_type == Token.SLASH_N:
-            pos += 1
-            token = self.tokens_list[pos]
-
-        for i in range(nesting):
-            if token.tok_type != Token.SLASH_T:
-                return True
-            pos += 1
-            token = self.tokens_list[pos]
-        return False
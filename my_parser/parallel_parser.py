@@ -0,0 +1,73 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from lexer.chunks import top_level_chunks
+from lexer.lexer import Lexer
+from lexer.source import SourceBuffer, source_to_text
+from my_parser.AST import ProgramAST
+from my_parser.ast_arena import ASTArena
+from my_parser.my_parser import Parser
+
+
+def _parse_span(span: Tuple[int, str, str]) -> Tuple[ASTArena, int]:
+    """
+    Lexes and parses part of program which starts at row, runs in worker process.
+    Tree is built in arena, which is pickled back as a few flat arrays
+    """
+    row, text, lexer_engine = span
+    arena = ASTArena()
+    tokens = Lexer(text, engine=lexer_engine, first_row=row).iter_tokens()
+    program = Parser(tokens, arena=arena).parse()
+    return arena, program._index
+
+
+class ParallelParser:
+    """
+    Parallel front end. Text is split at top level lines into spans of whole function definitions and
+    top level calls, spans are lexed and parsed in a process pool and their top level statements are
+    stitched into one ProgramAST. Nodes are arena views, token rows are the same as for the whole text
+    """
+
+    # sources shorter than this are parsed in the current process, starting workers takes longer
+    MIN_PARALLEL_SIZE = 256 * 2 ** 10
+    # count of spans per worker, more spans balance load better but cost more pickling
+    SPANS_PER_WORKER = 4
+
+    def __init__(self, text: SourceBuffer, workers: Optional[int] = None, lexer_engine: str = "table"):
+        self.text = source_to_text(text)
+        self.workers = workers or os.cpu_count() or 1
+        self.lexer_engine = lexer_engine
+
+    def parse(self) -> ProgramAST:
+        spans = self._spans()
+        if len(spans) < 2 or self.workers < 2 or len(self.text) < self.MIN_PARALLEL_SIZE:
+            results = map(_parse_span, spans)
+            return self._stitch(results)
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            return self._stitch(executor.map(_parse_span, spans))
+
+    def _spans(self) -> List[Tuple[int, str, str]]:
+        """
+        Groups consecutive top level chunks into spans of about the same size
+        """
+        text = self.text
+        span_size = max(len(text) // (self.workers * self.SPANS_PER_WORKER), 1)
+        spans = []
+        span_row = span_start = None
+        for row, start, end in top_level_chunks(text):
+            if span_start is None:
+                span_row, span_start = row, start
+            if end - span_start >= span_size:
+                spans.append((span_row, text[span_start:end], self.lexer_engine))
+                span_start = None
+        if span_start is not None:
+            spans.append((span_row, text[span_start:], self.lexer_engine))
+        return spans
+
+    @staticmethod
+    def _stitch(results) -> ProgramAST:
+        hl_statements = []
+        for arena, root in results:
+            hl_statements.extend(arena.view(root).hl_statements)
+        return ProgramAST(hl_statements)
@@ -0,0 +1,43 @@
+from collections import deque
+from typing import Deque, Iterable, Union
+
+from exceptions.my_exceptions import EOF
+from lexer.my_token import Token
+
+
+class TokenStream:
+    """
+    Pulls tokens lazily from any iterable of tokens (list or Lexer.iter_tokens generator).
+    Only tokens which were peeked but not consumed yet are kept in the lookahead buffer,
+    so memory used by tokens is bounded by the parser lookahead instead of the source size
+    """
+
+    def __init__(self, tokens: Iterable[Token]):
+        self._tokens = iter(tokens)
+        # tokens after the current one which were peeked but not consumed yet
+        self._lookahead: Deque[Token] = deque()
+        self.current: Union[Token, str] = next(self._tokens, EOF)
+
+    def peek(self, offset: int = 0) -> Union[Token, str]:
+        """
+        Returns token which is offset tokens ahead of the current one, or EOF
+        """
+        if not offset:
+            return self.current
+        lookahead = self._lookahead
+        while len(lookahead) < offset:
+            token = next(self._tokens, EOF)
+            if token is EOF:
+                return EOF
+            lookahead.append(token)
+        return lookahead[offset - 1]
+
+    def advance(self) -> Union[Token, str]:
+        """
+        Drops the current token and returns the next one, or EOF
+        """
+        if self._lookahead:
+            self.current = self._lookahead.popleft()
+        else:
+            self.current = next(self._tokens, EOF)
+        return self.current
@@ -11,20 +11,13 @@ int main()
 	"_func_main:;"
 	"push rbp;"
 	"mov rbp, rsp;"
-	"mov rax, 4;"
-	"push rax;"
-	"mov rax, 2;"
-	"push rax;"
+	"sub rsp, 24;"
+	"mov QWORD PTR [rbp - 8], 4;"
+	"mov QWORD PTR [rbp - 16], 2;"
 	"mov rax, [rbp - 8];"
-	"push rax;"
-	"mov rax, [rbp - 16];"
-	"push rax;"
-	"pop rax;"
-	"pop rbx;"
-	"xor rdx, rdx;"
-	"cqo;"
-	"imul rbx;"
-	"jmp _func_main_pre_end;"
+	"imul rax, [rbp - 16];"
+	"mov [rbp - 24], rax;"
+	"mov rax, [rbp - 24];"
 	"_func_main_pre_end:;"
 	"mov rsp, rbp;"
 	"pop rbp;"
@@ -11,20 +11,18 @@ int main()
 	"_func_main:;"
 	"push rbp;"
 	"mov rbp, rsp;"
+	"sub rsp, 32;"
 	"mov rax, 4;"
 	"neg rax;"
-	"push rax;"
-	"mov rax, 2;"
-	"push rax;"
+	"mov [rbp - 8], rax;"
 	"mov rax, [rbp - 8];"
-	"push rax;"
+	"mov [rbp - 16], rax;"
+	"mov QWORD PTR [rbp - 24], 2;"
 	"mov rax, [rbp - 16];"
-	"push rax;"
-	"pop rbx;"
-	"pop rax;"
 	"cqo;"
-	"idiv rbx;"
-	"jmp _func_main_pre_end;"
+	"idiv QWORD PTR [rbp - 24];"
+	"mov [rbp - 32], rax;"
+	"mov rax, [rbp - 32];"
 	"_func_main_pre_end:;"
 	"mov rsp, rbp;"
 	"pop rbp;"
@@ -11,27 +11,23 @@ int main()
 	"_func_main:;"
 	"push rbp;"
 	"mov rbp, rsp;"
-	"mov rax, 2;"
-	"push rax;"
-	"mov rax, 0;"
-	"push rax;"
+	"sub rsp, 24;"
+	"mov QWORD PTR [rbp - 8], 2;"
+	"mov QWORD PTR [rbp - 16], 0;"
 	"mov rax, [rbp - 8];"
 	"cmp rax, 0;"
-	"je _there_1;"
-	"jmp _end1_1;"
-	"_there_1:;"
+	"jne _func_main_or_true_3;"
+	"_func_main_or_right_2:;"
 	"mov rax, [rbp - 16];"
 	"cmp rax, 0;"
-	"je _end0_1;"
-	"jmp _end1_1;"
-	"_end1_1:;"
-	"mov rax, 1;"
-	"jmp _end_1;"
-	"_end0_1:;"
-	"xor rax, rax;"
-	"jmp _end_1;"
-	"_end_1:;"
-	"jmp _func_main_pre_end;"
+	"setne al;"
+	"movzx eax, al;"
+	"mov [rbp - 24], rax;"
+	"jmp _func_main_or_end_4;"
+	"_func_main_or_true_3:;"
+	"mov QWORD PTR [rbp - 24], 1;"
+	"_func_main_or_end_4:;"
+	"mov rax, [rbp - 24];"
 	"_func_main_pre_end:;"
 	"mov rsp, rbp;"
 	"pop rbp;"
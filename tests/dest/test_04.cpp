@@ -11,28 +11,20 @@ int main()
 	"_func_main:;"
 	"push rbp;"
 	"mov rbp, rsp;"
+	"sub rsp, 40;"
 	"mov rax, 4;"
 	"neg rax;"
-	"push rax;"
-	"mov rax, 2;"
-	"push rax;"
+	"mov [rbp - 8], rax;"
 	"mov rax, [rbp - 8];"
-	"push rax;"
+	"mov [rbp - 16], rax;"
+	"mov QWORD PTR [rbp - 24], 2;"
 	"mov rax, [rbp - 16];"
-	"push rax;"
-	"pop rbx;"
-	"pop rax;"
 	"cqo;"
-	"idiv rbx;"
-	"push rax;"
-	"mov rax, 10;"
-	"push rax;"
-	"pop rax;"
-	"pop rbx;"
-	"xor rdx, rdx;"
-	"cqo;"
-	"imul rbx;"
-	"jmp _func_main_pre_end;"
+	"idiv QWORD PTR [rbp - 24];"
+	"mov [rbp - 32], rax;"
+	"imul rax, [rbp - 32], 10;"
+	"mov [rbp - 40], rax;"
+	"mov rax, [rbp - 40];"
 	"_func_main_pre_end:;"
 	"mov rsp, rbp;"
 	"pop rbp;"
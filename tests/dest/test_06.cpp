@@ -11,21 +11,17 @@ int main()
 	"_func_main:;"
 	"push rbp;"
 	"mov rbp, rsp;"
+	"sub rsp, 32;"
 	"mov rax, 10000;"
 	"neg rax;"
-	"push rax;"
-	"mov rax, 1234;"
-	"push rax;"
+	"mov [rbp - 8], rax;"
 	"mov rax, [rbp - 8];"
-	"push rax;"
+	"mov [rbp - 16], rax;"
+	"mov QWORD PTR [rbp - 24], 1234;"
 	"mov rax, [rbp - 16];"
-	"push rax;"
-	"pop rax;"
-	"pop rbx;"
-	"xor rdx, rdx;"
-	"cqo;"
-	"imul rbx;"
-	"jmp _func_main_pre_end;"
+	"imul rax, [rbp - 24];"
+	"mov [rbp - 32], rax;"
+	"mov rax, [rbp - 32];"
 	"_func_main_pre_end:;"
 	"mov rsp, rbp;"
 	"pop rbp;"
@@ -11,48 +11,30 @@ int main()
 	"_func_main:;"
 	"push rbp;"
 	"mov rbp, rsp;"
+	"sub rsp, 56;"
 	"mov rax, 100;"
-	"push rax;"
-	"mov rax, 10;"
-	"push rax;"
-	"pop rax;"
-	"pop rbx;"
-	"add rax, rbx;"
-	"push rax;"
-	"mov rax, 12;"
-	"push rax;"
-	"pop rbx;"
-	"pop rax;"
-	"sub rax, rbx;"
-	"push rax;"
+	"add rax, 10;"
+	"mov [rbp - 8], rax;"
+	"mov rax, [rbp - 8];"
+	"sub rax, 12;"
+	"mov [rbp - 16], rax;"
 	"mov rax, 14;"
-	"push rax;"
-	"mov rax, 2;"
-	"push rax;"
-	"pop rbx;"
-	"pop rax;"
+	"mov rcx, 2;"
 	"cqo;"
-	"idiv rbx;"
-	"push rax;"
-	"pop rax;"
-	"pop rbx;"
-	"add rax, rbx;"
-	"push rax;"
+	"idiv rcx;"
+	"mov [rbp - 24], rax;"
+	"mov rax, [rbp - 16];"
+	"add rax, [rbp - 24];"
+	"mov [rbp - 32], rax;"
 	"mov rax, 10;"
 	"neg rax;"
-	"push rax;"
-	"mov rax, 3;"
-	"push rax;"
-	"pop rax;"
-	"pop rbx;"
-	"xor rdx, rdx;"
-	"cqo;"
-	"imul rbx;"
-	"push rax;"
-	"pop rbx;"
-	"pop rax;"
-	"sub rax, rbx;"
-	"jmp _func_main_pre_end;"
+	"mov [rbp - 40], rax;"
+	"imul rax, [rbp - 40], 3;"
+	"mov [rbp - 48], rax;"
+	"mov rax, [rbp - 32];"
+	"sub rax, [rbp - 48];"
+	"mov [rbp - 56], rax;"
+	"mov rax, [rbp - 56];"
 	"_func_main_pre_end:;"
 	"mov rsp, rbp;"
 	"pop rbp;"
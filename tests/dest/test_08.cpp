@@ -11,28 +11,22 @@ int main()
 	"_func_main:;"
 	"push rbp;"
 	"mov rbp, rsp;"
+	"sub rsp, 32;"
 	"mov rax, 10;"
 	"neg rax;"
-	"push rax;"
-	"mov rax, 5;"
-	"push rax;"
-	"pop rbx;"
-	"pop rax;"
-	"sub rax, rbx;"
-	"push rax;"
+	"mov [rbp - 8], rax;"
+	"mov rax, [rbp - 8];"
+	"sub rax, 5;"
+	"mov [rbp - 16], rax;"
 	"mov rax, 7;"
-	"push rax;"
-	"mov rax, 2;"
-	"push rax;"
-	"pop rbx;"
-	"pop rax;"
+	"mov rcx, 2;"
 	"cqo;"
-	"idiv rbx;"
-	"push rax;"
-	"pop rax;"
-	"pop rbx;"
-	"add rax, rbx;"
-	"jmp _func_main_pre_end;"
+	"idiv rcx;"
+	"mov [rbp - 24], rax;"
+	"mov rax, [rbp - 16];"
+	"add rax, [rbp - 24];"
+	"mov [rbp - 32], rax;"
+	"mov rax, [rbp - 32];"
 	"_func_main_pre_end:;"
 	"mov rsp, rbp;"
 	"pop rbp;"
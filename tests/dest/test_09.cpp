@@ -11,36 +11,22 @@ int main()
 	"_func_main:;"
 	"push rbp;"
 	"mov rbp, rsp;"
-	"mov rax, 12;"
-	"push rax;"
+	"sub rsp, 16;"
+	"mov QWORD PTR [rbp - 8], 12;"
 	"mov rax, 1;"
 	"cmp rax, 0;"
-	"je _there_2;"
-	"jmp _end1_2;"
-	"_there_2:;"
+	"jne _func_main_if_then_2;"
+	"_func_main_or_right_5:;"
 	"mov rax, 20;"
-	"neg rax;"
 	"cmp rax, 0;"
-	"je _end0_2;"
-	"jmp _end1_2;"
-	"_end1_2:;"
-	"mov rax, 1;"
-	"jmp _end_2;"
-	"_end0_2:;"
-	"xor rax, rax;"
-	"jmp _end_2;"
-	"_end_2:;"
-	"cmp rax, 0;"
-	"je _else_1;"
-	"mov rax, 10;"
-	"push rax;"
-	"jmp _post_cond_1;"
-	"_else_1:;"
-	"mov rax, 6;"
-	"mov [rbp - 16], rax;"
-	"_post_cond_1:;"
+	"je _func_main_if_else_3;"
+	"_func_main_if_then_2:;"
+	"mov QWORD PTR [rbp - 16], 10;"
+	"jmp _func_main_if_end_4;"
+	"_func_main_if_else_3:;"
+	"mov QWORD PTR [rbp - 16], 6;"
+	"_func_main_if_end_4:;"
 	"mov rax, [rbp - 16];"
-	"jmp _func_main_pre_end;"
 	"_func_main_pre_end:;"
 	"mov rsp, rbp;"
 	"pop rbp;"
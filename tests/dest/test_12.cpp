@@ -11,69 +11,45 @@ int main()
 	"_func_main:;"
 	"push rbp;"
 	"mov rbp, rsp;"
-	"mov rax, 12;"
-	"push rax;"
+	"sub rsp, 64;"
+	"mov QWORD PTR [rbp - 8], 12;"
 	"mov rax, 0;"
 	"cmp rax, 0;"
-	"je _there_2;"
-	"jmp _end1_2;"
-	"_there_2:;"
+	"jne _func_main_if_then_2;"
+	"_func_main_or_right_5:;"
 	"mov rax, 1;"
 	"cmp rax, 0;"
-	"je _end0_2;"
-	"jmp _end1_2;"
-	"_end1_2:;"
-	"mov rax, 1;"
-	"jmp _end_2;"
-	"_end0_2:;"
-	"xor rax, rax;"
-	"jmp _end_2;"
-	"_end_2:;"
-	"cmp rax, 0;"
-	"je _else_1;"
+	"je _func_main_if_else_3;"
+	"_func_main_if_then_2:;"
 	"mov rax, 10;"
-	"push rax;"
-	"mov rax, 6;"
-	"push rax;"
-	"pop rax;"
-	"pop rbx;"
-	"xor rdx, rdx;"
-	"cqo;"
-	"imul rbx;"
-	"push rax;"
+	"imul rax, 6;"
+	"mov [rbp - 16], rax;"
 	"mov rax, [rbp - 16];"
-	"push rax;"
-	"mov rax, 2;"
-	"push rax;"
-	"pop rax;"
-	"pop rbx;"
-	"add rax, rbx;"
-	"push rax;"
+	"mov [rbp - 24], rax;"
 	"mov rax, [rbp - 24];"
-	"push rax;"
-	"mov rax, 2;"
-	"push rax;"
-	"pop rbx;"
-	"pop rax;"
+	"add rax, 2;"
+	"mov [rbp - 32], rax;"
+	"mov rax, [rbp - 32];"
+	"mov [rbp - 40], rax;"
+	"mov rax, [rbp - 40];"
+	"mov rcx, 2;"
 	"cqo;"
-	"idiv rbx;"
-	"push rax;"
-	"jmp _post_cond_1;"
-	"_else_1:;"
-	"mov rax, 10;"
-	"mov [rbp - 8], rax;"
+	"idiv rcx;"
+	"mov [rbp - 48], rax;"
+	"mov rax, [rbp - 48];"
+	"mov [rbp - 56], rax;"
+	"jmp _func_main_if_end_4;"
+	"_func_main_if_else_3:;"
+	"mov QWORD PTR [rbp - 8], 10;"
 	"mov rax, [rbp - 8];"
-	"push rax;"
-	"mov rax, 2;"
-	"push rax;"
-	"pop rbx;"
-	"pop rax;"
+	"mov rcx, 2;"
 	"cqo;"
-	"idiv rbx;"
-	"mov [rbp - 32], rax;"
-	"_post_cond_1:;"
-	"mov rax, [rbp - 32];"
-	"jmp _func_main_pre_end;"
+	"idiv rcx;"
+	"mov [rbp - 64], rax;"
+	"mov rax, [rbp - 64];"
+	"mov [rbp - 56], rax;"
+	"_func_main_if_end_4:;"
+	"mov rax, [rbp - 56];"
 	"_func_main_pre_end:;"
 	"mov rsp, rbp;"
 	"pop rbp;"
@@ -11,56 +11,34 @@ int main()
 	"_func_main:;"
 	"push rbp;"
 	"mov rbp, rsp;"
-	"mov rax, 16;"
-	"push rax;"
-	"mov rax, 2;"
-	"push rax;"
+	"sub rsp, 64;"
 	"mov rax, 12;"
-	"push rax;"
-	"mov rax, 3;"
-	"push rax;"
-	"pop rbx;"
-	"pop rax;"
+	"mov rcx, 3;"
 	"cqo;"
-	"idiv rbx;"
-	"push rax;"
-	"pop rax;"
-	"pop rbx;"
-	"xor rdx, rdx;"
-	"cqo;"
-	"imul rbx;"
-	"push rax;"
-	"mov rax, 4;"
-	"push rax;"
-	"pop rbx;"
-	"pop rax;"
-	"cqo;"
-	"idiv rbx;"
-	"push rax;"
-	"pop rax;"
-	"pop rbx;"
-	"add rax, rbx;"
-	"push rax;"
-	"mov rax, 2;"
-	"push rax;"
-	"mov rax, [rbp - 16];"
-	"push rax;"
-	"mov rax, [rbp - 8];"
-	"push rax;"
-	"mov rax, [rbp - 16];"
-	"push rax;"
-	"pop rax;"
-	"pop rbx;"
-	"add rax, rbx;"
-	"push rax;"
-	"pop rax;"
-	"pop rbx;"
-	"xor rdx, rdx;"
-	"cqo;"
-	"imul rbx;"
+	"idiv rcx;"
+	"mov [rbp - 8], rax;"
+	"imul rax, [rbp - 8], 2;"
 	"mov [rbp - 16], rax;"
 	"mov rax, [rbp - 16];"
-	"jmp _func_main_pre_end;"
+	"mov rcx, 4;"
+	"cqo;"
+	"idiv rcx;"
+	"mov [rbp - 24], rax;"
+	"mov rax, [rbp - 24];"
+	"add rax, 16;"
+	"mov [rbp - 32], rax;"
+	"mov rax, [rbp - 32];"
+	"mov [rbp - 40], rax;"
+	"mov QWORD PTR [rbp - 48], 2;"
+	"mov rax, [rbp - 40];"
+	"add rax, [rbp - 48];"
+	"mov [rbp - 56], rax;"
+	"mov rax, [rbp - 48];"
+	"imul rax, [rbp - 56];"
+	"mov [rbp - 64], rax;"
+	"mov rax, [rbp - 64];"
+	"mov [rbp - 48], rax;"
+	"mov rax, [rbp - 48];"
 	"_func_main_pre_end:;"
 	"mov rsp, rbp;"
 	"pop rbp;"
@@ -11,14 +11,11 @@ int main()
 	"_func_addition:;"
 	"push rbp;"
 	"mov rbp, rsp;"
+	"sub rsp, 8;"
 	"mov rax, [rbp + 16];"
-	"push rax;"
-	"mov rax, [rbp + 24];"
-	"push rax;"
-	"pop rax;"
-	"pop rbx;"
-	"add rax, rbx;"
-	"jmp _func_addition_pre_end;"
+	"add rax, [rbp + 24];"
+	"mov [rbp - 8], rax;"
+	"mov rax, [rbp - 8];"
 	"_func_addition_pre_end:;"
 	"mov rsp, rbp;"
 	"pop rbp;"
@@ -28,22 +25,18 @@ int main()
 	"_func_main:;"
 	"push rbp;"
 	"mov rbp, rsp;"
+	"sub rsp, 24;"
 	"push 5;"
 	"push 4;"
 	"call _func_addition;"
-	"push rax;"
-	"mov rax, [rbp - 8];"
-	"push rax;"
-	"mov rax, 2;"
-	"push rax;"
-	"pop rax;"
-	"pop rbx;"
-	"xor rdx, rdx;"
-	"cqo;"
-	"imul rbx;"
 	"mov [rbp - 8], rax;"
 	"mov rax, [rbp - 8];"
-	"jmp _func_main_pre_end;"
+	"mov [rbp - 16], rax;"
+	"imul rax, [rbp - 16], 2;"
+	"mov [rbp - 24], rax;"
+	"mov rax, [rbp - 24];"
+	"mov [rbp - 16], rax;"
+	"mov rax, [rbp - 16];"
 	"_func_main_pre_end:;"
 	"mov rsp, rbp;"
 	"pop rbp;"
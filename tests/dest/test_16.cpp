@@ -11,49 +11,37 @@ int main()
 	"_func_main:;"
 	"push rbp;"
 	"mov rbp, rsp;"
-	"mov rax, 1;"
-	"push rax;"
-	"mov rax, 4;"
-	"push rax;"
-	"_start_cycle_1:;"
+	"sub rsp, 40;"
+	"mov QWORD PTR [rbp - 8], 1;"
+	"mov QWORD PTR [rbp - 16], 4;"
+	"_func_main_while_cond_2:;"
 	"mov rax, [rbp - 16];"
 	"cmp rax, 0;"
-	"je _end_cycle_1;"
+	"je _func_main_while_end_4;"
+	"_func_main_while_body_3:;"
 	"mov rax, [rbp - 16];"
-	"push rax;"
-	"mov rax, 2;"
-	"push rax;"
-	"pop rbx;"
-	"pop rax;"
-	"sub rax, rbx;"
+	"sub rax, 2;"
+	"mov [rbp - 24], rax;"
+	"mov rax, [rbp - 24];"
 	"cmp rax, 0;"
-	"je _else_2;"
-	"mov rax, [rbp - 8];"
-	"push rax;"
-	"mov rax, 2;"
-	"push rax;"
-	"pop rax;"
-	"pop rbx;"
-	"xor rdx, rdx;"
-	"cqo;"
-	"imul rbx;"
+	"je _func_main_if_else_6;"
+	"_func_main_if_then_5:;"
+	"imul rax, [rbp - 8], 2;"
+	"mov [rbp - 32], rax;"
+	"mov rax, [rbp - 32];"
 	"mov [rbp - 8], rax;"
-	"jmp _post_cond_2;"
-	"_else_2:;"
-	"jmp _end_cycle_1;"
-	"_post_cond_2:;"
+	"jmp _func_main_if_end_7;"
+	"_func_main_if_else_6:;"
+	"jmp _func_main_while_end_4;"
+	"_func_main_if_end_7:;"
 	"mov rax, [rbp - 16];"
-	"push rax;"
-	"mov rax, 1;"
-	"push rax;"
-	"pop rbx;"
-	"pop rax;"
-	"sub rax, rbx;"
+	"sub rax, 1;"
+	"mov [rbp - 40], rax;"
+	"mov rax, [rbp - 40];"
 	"mov [rbp - 16], rax;"
-	"jmp _start_cycle_1;"
-	"_end_cycle_1:;"
+	"jmp _func_main_while_cond_2;"
+	"_func_main_while_end_4:;"
 	"mov rax, [rbp - 8];"
-	"jmp _func_main_pre_end;"
 	"_func_main_pre_end:;"
 	"mov rsp, rbp;"
 	"pop rbp;"
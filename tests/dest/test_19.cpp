@@ -11,16 +11,13 @@ int main()
 	"_func_main:;"
 	"push rbp;"
 	"mov rbp, rsp;"
+	"sub rsp, 8;"
 	"mov rax, 10;"
-	"push rax;"
-	"mov rax, 3;"
-	"push rax;"
-	"pop rbx;"
-	"pop rax;"
+	"mov rcx, 3;"
 	"cqo;"
-	"idiv rbx;"
-	"mov rax, rdx;"
-	"jmp _func_main_pre_end;"
+	"idiv rcx;"
+	"mov [rbp - 8], rdx;"
+	"mov rax, [rbp - 8];"
 	"_func_main_pre_end:;"
 	"mov rsp, rbp;"
 	"pop rbp;"
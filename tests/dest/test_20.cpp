@@ -11,20 +11,15 @@ int main()
 	"_func_main:;"
 	"push rbp;"
 	"mov rbp, rsp;"
-	"mov rax, 2;"
-	"push rax;"
-	"mov rax, 2;"
-	"push rax;"
+	"sub rsp, 24;"
+	"mov QWORD PTR [rbp - 8], 2;"
+	"mov QWORD PTR [rbp - 16], 2;"
 	"mov rax, [rbp - 8];"
-	"push rax;"
-	"mov rax, [rbp - 16];"
-	"push rax;"
-	"pop rbx;"
-	"pop rcx;"
-	"xor rax, rax;"
-	"cmp rcx, rbx;"
+	"cmp rax, [rbp - 16];"
 	"sete al;"
-	"jmp _func_main_pre_end;"
+	"movzx eax, al;"
+	"mov [rbp - 24], rax;"
+	"mov rax, [rbp - 24];"
 	"_func_main_pre_end:;"
 	"mov rsp, rbp;"
 	"pop rbp;"
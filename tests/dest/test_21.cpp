@@ -11,56 +11,33 @@ int main()
 	"_func_is_prime:;"
 	"push rbp;"
 	"mov rbp, rsp;"
-	"mov rax, 2;"
-	"push rax;"
-	"_start_cycle_1:;"
+	"sub rsp, 24;"
+	"mov QWORD PTR [rbp - 8], 2;"
+	"_func_is_prime_while_cond_2:;"
 	"mov rax, [rbp - 8];"
-	"push rax;"
+	"cmp rax, [rbp + 16];"
+	"jge _func_is_prime_while_end_4;"
+	"_func_is_prime_while_body_3:;"
 	"mov rax, [rbp + 16];"
-	"push rax;"
-	"pop rbx;"
-	"pop rcx;"
-	"xor rax, rax;"
-	"cmp rcx, rbx;"
-	"setl al;"
-	"cmp rax, 0;"
-	"je _end_cycle_1;"
-	"mov rax, [rbp + 16];"
-	"push rax;"
-	"mov rax, [rbp - 8];"
-	"push rax;"
-	"pop rbx;"
-	"pop rax;"
 	"cqo;"
-	"idiv rbx;"
-	"mov rax, rdx;"
-	"push rax;"
-	"mov rax, 0;"
-	"push rax;"
-	"pop rbx;"
-	"pop rcx;"
-	"xor rax, rax;"
-	"cmp rcx, rbx;"
-	"sete al;"
+	"idiv QWORD PTR [rbp - 8];"
+	"mov [rbp - 16], rdx;"
+	"mov rax, [rbp - 16];"
 	"cmp rax, 0;"
-	"je _else_2;"
+	"jne _func_is_prime_if_else_6;"
+	"_func_is_prime_if_then_5:;"
 	"mov rax, 0;"
 	"jmp _func_is_prime_pre_end;"
-	"jmp _post_cond_2;"
-	"_else_2:;"
+	"_func_is_prime_if_else_6:;"
 	"mov rax, [rbp - 8];"
-	"push rax;"
-	"mov rax, 1;"
-	"push rax;"
-	"pop rax;"
-	"pop rbx;"
-	"add rax, rbx;"
+	"add rax, 1;"
+	"mov [rbp - 24], rax;"
+	"mov rax, [rbp - 24];"
 	"mov [rbp - 8], rax;"
-	"_post_cond_2:;"
-	"jmp _start_cycle_1;"
-	"_end_cycle_1:;"
+	"_func_is_prime_if_end_7:;"
+	"jmp _func_is_prime_while_cond_2;"
+	"_func_is_prime_while_end_4:;"
 	"mov rax, 1;"
-	"jmp _func_is_prime_pre_end;"
 	"_func_is_prime_pre_end:;"
 	"mov rsp, rbp;"
 	"pop rbp;"
@@ -70,58 +47,43 @@ int main()
 	"_func_main:;"
 	"push rbp;"
 	"mov rbp, rsp;"
-	"mov rax, 0;"
-	"push rax;"
+	"sub rsp, 48;"
+	"mov QWORD PTR [rbp - 8], 0;"
 	"mov rax, [rbp + 16];"
-	"push rax;"
-	"_start_cycle_3:;"
-	"mov rax, [rbp - 16];"
-	"push rax;"
-	"mov rax, [rbp + 24];"
-	"push rax;"
-	"pop rbx;"
-	"pop rcx;"
-	"xor rax, rax;"
-	"cmp rcx, rbx;"
-	"setle al;"
-	"cmp rax, 0;"
-	"je _end_cycle_3;"
+	"mov [rbp - 16], rax;"
+	"_func_main_while_cond_2:;"
 	"mov rax, [rbp - 16];"
-	"push rax;"
+	"cmp rax, [rbp + 24];"
+	"jg _func_main_while_end_4;"
+	"_func_main_while_body_3:;"
+	"push QWORD PTR [rbp - 16];"
 	"call _func_is_prime;"
+	"mov [rbp - 24], rax;"
+	"mov rax, [rbp - 24];"
 	"cmp rax, 0;"
-	"je _else_4;"
+	"je _func_main_if_else_6;"
+	"_func_main_if_then_5:;"
 	"mov rax, [rbp - 8];"
-	"push rax;"
-	"mov rax, [rbp - 16];"
-	"push rax;"
-	"pop rax;"
-	"pop rbx;"
-	"add rax, rbx;"
+	"add rax, [rbp - 16];"
+	"mov [rbp - 32], rax;"
+	"mov rax, [rbp - 32];"
 	"mov [rbp - 8], rax;"
 	"mov rax, [rbp - 16];"
-	"push rax;"
-	"mov rax, 1;"
-	"push rax;"
-	"pop rax;"
-	"pop rbx;"
-	"add rax, rbx;"
+	"add rax, 1;"
+	"mov [rbp - 40], rax;"
+	"mov rax, [rbp - 40];"
 	"mov [rbp - 16], rax;"
-	"jmp _post_cond_4;"
-	"_else_4:;"
+	"jmp _func_main_if_end_7;"
+	"_func_main_if_else_6:;"
 	"mov rax, [rbp - 16];"
-	"push rax;"
-	"mov rax, 1;"
-	"push rax;"
-	"pop rax;"
-	"pop rbx;"
-	"add rax, rbx;"
+	"add rax, 1;"
+	"mov [rbp - 48], rax;"
+	"mov rax, [rbp - 48];"
 	"mov [rbp - 16], rax;"
-	"_post_cond_4:;"
-	"jmp _start_cycle_3;"
-	"_end_cycle_3:;"
+	"_func_main_if_end_7:;"
+	"jmp _func_main_while_cond_2;"
+	"_func_main_while_end_4:;"
 	"mov rax, [rbp - 8];"
-	"jmp _func_main_pre_end;"
 	"_func_main_pre_end:;"
 	"mov rsp, rbp;"
 	"pop rbp;"
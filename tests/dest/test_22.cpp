@@ -11,18 +11,14 @@ int main()
 	"_func_main:;"
 	"push rbp;"
 	"mov rbp, rsp;"
-	"mov rax, 2;"
-	"push rax;"
+	"sub rsp, 16;"
+	"mov QWORD PTR [rbp - 8], 2;"
 	"mov rax, [rbp - 8];"
-	"push rax;"
-	"mov rax, 4;"
-	"push rax;"
-	"pop rax;"
-	"pop rbx;"
-	"add rax, rbx;"
+	"add rax, 4;"
+	"mov [rbp - 16], rax;"
+	"mov rax, [rbp - 16];"
 	"mov [rbp - 8], rax;"
 	"mov rax, [rbp - 8];"
-	"jmp _func_main_pre_end;"
 	"_func_main_pre_end:;"
 	"mov rsp, rbp;"
 	"pop rbp;"
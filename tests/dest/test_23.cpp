@@ -11,21 +11,16 @@ int main()
 	"_func_main:;"
 	"push rbp;"
 	"mov rbp, rsp;"
-	"mov rax, 0b1010;"
-	"push rax;"
-	"mov rax, 0b10;"
-	"push rax;"
-	"pop rax;"
-	"pop rbx;"
-	"add rax, rbx;"
-	"push rax;"
-	"mov rax, 0b100;"
-	"push rax;"
-	"pop rbx;"
-	"pop rax;"
+	"sub rsp, 16;"
+	"mov rax, 10;"
+	"add rax, 2;"
+	"mov [rbp - 8], rax;"
+	"mov rax, [rbp - 8];"
+	"mov rcx, 4;"
 	"cqo;"
-	"idiv rbx;"
-	"jmp _func_main_pre_end;"
+	"idiv rcx;"
+	"mov [rbp - 16], rax;"
+	"mov rax, [rbp - 16];"
 	"_func_main_pre_end:;"
 	"mov rsp, rbp;"
 	"pop rbp;"
@@ -1,20 +1,48 @@
+import os
+from tempfile import TemporaryDirectory
 from unittest import TestCase
 from compiler import compiler
-import subprocess
+from ir.pipeline import CODEGENS, OPT_LEVELS
+from lexer.source import load_source
 from subprocess import Popen, PIPE
 
 OUTPUT_DIR = "tests/dest/"
+EXEC_DIR = "tests/exec/"
 
 
-# todo fix test running to fit new compiler interface
 def build_and_run(file_name: str) -> str:
-    with open(f"tests/src/{file_name}.py", "rb") as f:
-        text = str(f.read())[2:-1]  # trims b'str' to str
-    path = OUTPUT_DIR + f"{file_name}.cpp"
-    compiler(text, system_arch=64, output_path=path, test=True)
-    subprocess.run(f"g++ -masm=intel tests/dest/{file_name}.cpp -o tests/exec/{file_name}".split(" "))
+    return build_and_run_text(file_name, load_source(f"tests/src/{file_name}.py"), keep_outputs=True)
 
-    p = Popen([f"./tests/exec/{file_name}"], stdin=PIPE, stdout=PIPE, stderr=PIPE)
+
+def build_and_run_text(file_name: str, text, codegen: str = "ir", opt_levels=OPT_LEVELS,
+                       keep_outputs: bool = False) -> str:
+    """
+    Builds program at each of opt_levels in a temporary directory, with keep_outputs outputs of the default
+    level are kept in tests/dest and tests/exec. Returns output of the program, or outputs of all levels
+    if they differ
+    """
+    results = []
+    with TemporaryDirectory() as temp_dir:
+        for opt_level in opt_levels:
+            kept = keep_outputs and opt_level == 0
+            output_dir, exec_dir = (OUTPUT_DIR, EXEC_DIR) if kept else (temp_dir + "/", temp_dir + "/")
+            compiler(
+                text,
+                arch=64,
+                test=True,
+                output_cpp=output_dir + f"{file_name}.cpp",
+                output_exec=exec_dir + file_name,
+                codegen=codegen,
+                opt_level=opt_level,
+            )
+            results.append(run(exec_dir + file_name))
+    if len(set(results)) > 1:
+        return " ".join(f"-O{opt_level}: {res}" for opt_level, res in zip(opt_levels, results))
+    return results[0]
+
+
+def run(exec_path: str) -> str:
+    p = Popen([os.path.abspath(exec_path)], stdin=PIPE, stdout=PIPE, stderr=PIPE)
     output, err = p.communicate()
     res = output.decode("utf-8")
     res = res.replace("\n", "")
@@ -114,3 +142,184 @@ class Test1(TestCase):
     def test_23(self):
         res = build_and_run("test_23")
         self.assertEqual(res, "3")
+
+
+class TestDeepExpressions(TestCase):
+
+    def test_deeply_nested_expressions(self):
+        depth = 3001
+        text = "def main():\n" \
+               f"    a = {'1 - (' * depth}0{')' * depth}\n" \
+               f"    b = {'-(' * 1001}5{')' * 1001}\n" \
+               f"    c = {' + '.join(['a'] * 5000)}\n" \
+               "    return a + b + c\n" \
+               "\n" \
+               "main()\n"
+        res = build_and_run_text("test_deep_expressions", text)
+        self.assertEqual(res, "4996")
+
+
+class TestRegisterPressure(TestCase):
+
+    def test_more_live_variables_than_registers(self):
+        # more variables are live at the call than there are registers for them on both archs
+        names = [f"v{chr(ord('a') + i)}" for i in range(16)]
+        text = "def g(a):\n" \
+               "    b = a * 2\n" \
+               "    c = b + a\n" \
+               "    return c - b\n" \
+               "\n" \
+               "def main(x):\n" + \
+               "".join(f"    {name} = x * {i + 1}\n" for i, name in enumerate(names)) + \
+               "    y = g(x)\n" \
+               f"    return {' + '.join(f'{name} * {i + 1}' for i, name in enumerate(names))} + y\n" \
+               "\n" \
+               "main(1)\n"
+        res = build_and_run_text("test_register_pressure", text)
+        self.assertEqual(res, str(sum((i + 1) ** 2 for i in range(len(names))) + 1))
+
+
+class TestFrameLayout(TestCase):
+
+    def test_loop_local_variables(self):
+        # t is first assigned inside of the loop, its slot must not be allocated again on each iteration
+        iterations = 3000000
+        text = "def main():\n" \
+               "    i = 0\n" \
+               f"    while i < {iterations}:\n" \
+               "        t = i % 7\n" \
+               "        i = i + 1\n" \
+               "    return t + i\n" \
+               "\n" \
+               "main()\n"
+        for codegen in CODEGENS:
+            with self.subTest(codegen=codegen):
+                res = build_and_run_text("test_loop_locals", text, codegen=codegen)
+                self.assertEqual(res, str((iterations - 1) % 7 + iterations))
+
+
+class TestStrengthReduction(TestCase):
+
+    def test_division_by_constants(self):
+        # quotients of negative numbers are rounded towards zero, as with idiv at -O0
+        text = "def f(x):\n" \
+               "    return x / 7 + x % 10 * 3 + x / -8 + x % 4 + x * 9 + x * -4 + x / 2 + x % -16\n" \
+               "\n" \
+               "def main():\n" \
+               "    s = 0\n" \
+               "    x = -500\n" \
+               "    while x < 500:\n" \
+               "        y = f(x)\n" \
+               "        s = s + y\n" \
+               "        x = x + 1\n" \
+               "    return s\n" \
+               "\n" \
+               "main()\n"
+
+        def div(a, b):
+            return abs(a) // abs(b) * (1 if (a < 0) == (b < 0) else -1)
+
+        def mod(a, b):
+            return a - div(a, b) * b
+
+        expected = sum(div(x, 7) + mod(x, 10) * 3 + div(x, -8) + mod(x, 4) + x * 9 - x * 4 + div(x, 2) + mod(x, -16)
+                       for x in range(-500, 500))
+        res = build_and_run_text("test_strength_reduction", text)
+        self.assertEqual(res, str(expected))
+
+
+class TestTailCalls(TestCase):
+
+    def test_deep_tail_recursion(self):
+        # one stack frame per call would overflow the stack, tail calls are jumps from -O1
+        depth = 10000000
+        text = "def count(n, acc):\n" \
+               "    if n == 0:\n" \
+               "        return acc\n" \
+               "    else:\n" \
+               "        m = n - 1\n" \
+               "        a = acc + 3\n" \
+               "        return count(m, a)\n" \
+               "\n" \
+               f"count({depth}, 0)\n"
+        for codegen in CODEGENS:
+            with self.subTest(codegen=codegen):
+                res = build_and_run_text("test_tail_calls", text, codegen=codegen, opt_levels=(1,))
+                self.assertEqual(res, str(3 * depth))
+
+
+class TestLoopUnrolling(TestCase):
+
+    def test_counted_loops(self):
+        # trip counts which are not multiples of the unroll factor leave iterations for the remainder loop
+        text = "def first_divisor(n):\n" \
+               "    d = 2\n" \
+               "    while d < n:\n" \
+               "        if n % d == 0:\n" \
+               "            return d\n" \
+               "        else:\n" \
+               "            d += 1\n" \
+               "    return n\n" \
+               "\n" \
+               "def main():\n" \
+               "    s = 0\n" \
+               "    n = 2\n" \
+               "    while n <= 200:\n" \
+               "        d = first_divisor(n)\n" \
+               "        s = s + d * n\n" \
+               "        n += 1\n" \
+               "    k = 10\n" \
+               "    while k > 3:\n" \
+               "        s = s - k * 2\n" \
+               "        k = k - 2\n" \
+               "    return s\n" \
+               "\n" \
+               "main()\n"
+        expected = sum(next(d for d in range(2, n + 1) if n % d == 0) * n for n in range(2, 201)) - (10 + 8 + 6 + 4) * 2
+        for codegen in CODEGENS:
+            with self.subTest(codegen=codegen):
+                self.assertEqual(build_and_run_text("test_unrolling", text, codegen=codegen), str(expected))
+
+
+class TestConditionalMoves(TestCase):
+
+    def test_if_else_assignments(self):
+        # values of both branches are computed, division is still emitted with a branch
+        text = "def f(a, b):\n" \
+               "    if a < b:\n" \
+               "        c = a * 3 - b\n" \
+               "    else:\n" \
+               "        c = b + 7\n" \
+               "    if c > 0:\n" \
+               "        d = 1\n" \
+               "    else:\n" \
+               "        d = 0\n" \
+               "    if b != 0:\n" \
+               "        e = a / b\n" \
+               "    else:\n" \
+               "        e = 0\n" \
+               "    return c + d * 100 + e * 1000\n" \
+               "\n" \
+               "def main():\n" \
+               "    s = 0\n" \
+               "    a = 0 - 10\n" \
+               "    while a < 10:\n" \
+               "        b = 0 - 5\n" \
+               "        while b < 5:\n" \
+               "            r = f(a, b)\n" \
+               "            s = s + r * a\n" \
+               "            b = b + 1\n" \
+               "        a = a + 1\n" \
+               "    return s\n" \
+               "\n" \
+               "main()\n"
+
+        def f(a, b):
+            c = a * 3 - b if a < b else b + 7
+            e = abs(a) // abs(b) * (1 if (a < 0) == (b < 0) else -1) if b != 0 else 0
+            return c + (c > 0) * 100 + e * 1000
+
+        expected = sum(f(a, b) * a for a in range(-10, 10) for b in range(-5, 5))
+        for codegen in CODEGENS:
+            with self.subTest(codegen=codegen):
+                self.assertEqual(build_and_run_text("test_conditional_moves", text, codegen=codegen), str(expected))
@@ -0,0 +1,112 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from subprocess import CompletedProcess, Popen, PIPE
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from cache.compilation_cache import CompilationCache
+from compiler import compiler
+from lexer.source import load_source
+from my_parser.AST import FunctionAST
+
+
+def run(exec_path: str) -> str:
+    p = Popen([exec_path], stdin=PIPE, stdout=PIPE, stderr=PIPE)
+    output, err = p.communicate()
+    return output.decode("utf-8").replace("\n", "")
+
+
+def store_entries(cache_path: str, exec_path: str, keys: list) -> None:
+    cache = CompilationCache(cache_path)
+    for key in keys:
+        cache.store(key, None, "asm", "cpp", exec_path)
+
+
+class TestCompilationCache(TestCase):
+
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.dir = self.temp_dir.name
+        self.cache = CompilationCache(os.path.join(self.dir, "cache"))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _compile(self, text, name: str, arch: int = 64, **options) -> str:
+        exec_path = os.path.join(self.dir, name)
+        compiler(text, arch=arch, test=True, output_asm=exec_path + ".asm", output_cpp=exec_path + ".cpp",
+                 output_exec=exec_path, cache=self.cache, **options)
+        return exec_path
+
+    def test_unchanged_source_is_restored_from_cache(self):
+        text = load_source("tests/src/test_05.py", use_mmap=False)
+        first = self._compile(text, "first")
+        second = self._compile(text, "second")
+        self.assertEqual(self.cache.stats()[:3], (1, 1, 1))
+        self.assertEqual(run(first), "100")
+        self.assertEqual(run(second), "100")
+        for extension in (".asm", ".cpp"):
+            with open(first + extension) as f, open(second + extension) as g:
+                self.assertEqual(f.read(), g.read())
+
+        ast = self.cache.load_ast(self.cache.key(text, 64))
+        self.assertIsInstance(ast.hl_statements[0], FunctionAST)
+
+    def test_arena_trees_are_stored(self):
+        text = load_source("tests/src/test_05.py", use_mmap=False)
+        # tree built in parser arena and tree stitched from arena views of parallel parser
+        for name, options in (("arena", {"ast_arena": True}), ("jobs", {"jobs": 2})):
+            with self.subTest(name):
+                self.cache.clear()
+                self.assertEqual(run(self._compile(text, name, **options)), "100")
+                ast = self.cache.load_ast(self.cache.key(text, 64))
+                self.assertIsInstance(ast.hl_statements[0], FunctionAST)
+                self.assertEqual(run(self._compile(text, name + "-restored", **options)), "100")
+                self.assertEqual(self.cache.stats()[:3], (1, 1, 1))
+
+    def test_key_depends_on_source_and_arch(self):
+        text = load_source("tests/src/test_05.py", use_mmap=False)
+        key = self.cache.key(text, 64)
+        self.assertEqual(key, self.cache.key(load_source("tests/src/test_05.py"), 64))
+        self.assertNotEqual(key, self.cache.key(text, 32))
+        self.assertNotEqual(key, self.cache.key(text + "\n", 64))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        texts = [load_source(f"tests/src/test_0{i}.py", use_mmap=False) for i in (1, 2, 3)]
+        self._compile(texts[0], "a")
+        entry_size = self.cache.stats().size
+        self.cache.max_size = entry_size * 2.5
+        self._compile(texts[1], "b")
+        # the first entry becomes the most recently used one
+        self._compile(texts[0], "a")
+        self._compile(texts[2], "c")
+
+        self.assertEqual(self.cache.stats().entries, 2)
+        self.assertTrue(self.cache.restore(self.cache.key(texts[0], 64)))
+        self.assertFalse(self.cache.restore(self.cache.key(texts[1], 64)))
+
+    def test_concurrent_stores_keep_index(self):
+        exec_path = os.path.join(self.dir, "exec")
+        with open(exec_path, "w") as f:
+            f.write("exec")
+        # each process stores its own keys and the keys shared by all of them
+        keys = [[f"{process}-{i}" for i in range(10)] + [f"shared-{i}" for i in range(10)] for process in range(4)]
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            list(executor.map(store_entries, [self.cache.path] * 4, [exec_path] * 4, keys))
+
+        stored = {key for process_keys in keys for key in process_keys}
+        self.assertEqual(self.cache.stats().entries, len(stored))
+        self.assertEqual({name for name in os.listdir(self.cache.path) if "-" in name}, stored)
+        self.assertTrue(all(self.cache.restore(key) for key in stored))
+
+    def test_failed_build_is_not_stored(self):
+        text = load_source("tests/src/test_05.py", use_mmap=False)
+        exec_path = self._compile(text, "first")
+        self.cache.clear()
+        # executable of the previous build is left at output path
+        with patch("compiler.subprocess.run", return_value=CompletedProcess([], 1)):
+            self._compile(text, "first")
+        self.assertEqual(self.cache.stats().entries, 0)
+        self.assertFalse([name for name in os.listdir(self.cache.path) if name.startswith("tmp-")])
+        self.assertEqual(run(exec_path), "100")
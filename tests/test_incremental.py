@@ -0,0 +1,73 @@
+import os
+from glob import glob
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from benchmarks.sources import generate_source
+from cache.incremental import IncrementalCompiler
+from exceptions.my_exceptions import InvalidSyntaxException, UnrecognizedTokenException
+from ir.pipeline import CODEGENS, Pipeline
+from lexer.lexer import Lexer
+from lexer.source import load_source
+from my_parser.my_parser import Parser
+
+
+def full_build(text, arch: int = 32, codegen: str = "ir") -> list:
+    ast = Parser(Lexer(text).iter_tokens()).parse()
+    return Pipeline(arch, codegen).generate(ast).generated_code
+
+
+class TestIncrementalCompiler(TestCase):
+
+    def test_same_code_as_full_build(self):
+        for path in sorted(glob("tests/src/*.py")) + ["src.py"]:
+            text = load_source(path)
+            for codegen in CODEGENS:
+                with self.subTest(path=path, codegen=codegen):
+                    self.assertEqual(IncrementalCompiler(codegen=codegen).generate(text, 64).generated_code,
+                                     full_build(text, 64, codegen))
+
+    def test_only_changed_function_is_compiled(self):
+        text = generate_source(10)
+        incremental = IncrementalCompiler()
+        incremental.generate(text)
+        chunks_count = sum(incremental.stats)
+
+        edited = text.replace("def main_d(start, end):\n    summ = 0", "def main_d(start, end):\n    summ = 7")
+        code = incremental.generate(edited).generated_code
+        self.assertEqual(incremental.stats, (chunks_count - 1, 1))
+        self.assertEqual(code, full_build(edited))
+
+    def test_state_is_saved_between_runs(self):
+        text = load_source("tests/src/test_22.py")
+        with TemporaryDirectory() as temp_dir:
+            state_path = os.path.join(temp_dir, "state")
+            IncrementalCompiler(state_path).generate(text)
+            incremental = IncrementalCompiler(state_path)
+            incremental.generate(text)
+            self.assertEqual(incremental.stats.compiled, 0)
+
+    def test_rows_of_errors_in_later_functions(self):
+        text = "def f(a):\n    return a\n\n\ndef g(a):\n    return a\n\nf(1)\n" * 9
+        for lexer_engine in Lexer.ENGINES:
+            with self.subTest(lexer_engine=lexer_engine):
+                incremental = IncrementalCompiler(lexer_engine=lexer_engine)
+                with self.assertRaisesRegex(UnrecognizedTokenException, "row=74"):
+                    incremental.generate(text + "def h(a):\n    b = a $ 1\n    return b\n")
+                with self.assertRaisesRegex(InvalidSyntaxException, "row=76"):
+                    incremental.generate(text + "def h(a):\n    if a:\n        b = a\n      return b\n")
+                with self.assertRaisesRegex(InvalidSyntaxException, "row=74"):
+                    incremental.generate(text + "def h(a):\n    return a a\n")
+
+    def test_unroll_factor_is_part_of_fingerprint(self):
+        text = load_source("tests/src/test_21.py")
+        with TemporaryDirectory() as temp_dir:
+            state_path = os.path.join(temp_dir, "state")
+            unrolled = IncrementalCompiler(state_path, opt_level=2, unroll_factor=4)
+            code = unrolled.generate(text, 64).generated_code
+            self.assertEqual(unrolled.pass_stats["loop-unrolling unrolled"], 2)
+
+            incremental = IncrementalCompiler(state_path, opt_level=2, unroll_factor=1)
+            self.assertNotEqual(incremental.generate(text, 64).generated_code, code)
+            self.assertEqual(incremental.stats.reused, 0)
+            self.assertEqual(incremental.pass_stats["loop-unrolling unrolled"], 0)
@@ -0,0 +1,508 @@
+from unittest import TestCase
+
+from exceptions.my_exceptions import InvalidIRException, NoSuchVariableException
+from ir.constant_folding import ConstantFolding, evaluate
+from ir.if_conversion import IfConversion
+from ir.inlining import Inlining
+from ir.ir import Function, Instruction, Const, MOV, PARAM, DIV, MOD, MUL, CALL, JMP, RET
+from ir.licm import LoopInvariantCodeMotion
+from ir.loop_rotation import LoopRotation
+from ir.lowering import Lowering
+from ir.passes import Pass, PassManager, verify_function
+from ir.reachability import Reachability
+from ir.regalloc import LinearScan, live_intervals
+from ir.strength_reduction import StrengthReduction
+from ir.tail_calls import TailCallElimination
+from ir.unrolling import LoopUnrolling
+from lexer.lexer import Lexer
+from my_parser.my_parser import Parser
+
+
+def lower(text: str):
+    return Lowering(Parser(Lexer(text).iter_tokens()).parse()).lower()
+
+
+class TestLowering(TestCase):
+
+    def test_dump(self):
+        module = lower("def f(a):\n    b = 0\n    while a > 0 or b:\n        a = a - 1\n    return -a or b\n\nf(010)\n")
+        self.assertEqual(repr(module), "\n".join([
+            "function f(a):",
+            "  entry_1:",
+            "    %a = param 0",
+            "    %b = mov 0",
+            "    jmp while_cond_2",
+            "  while_cond_2:",
+            "    br gt %a, 0 ? while_body_3 : or_right_5",
+            "  or_right_5:",
+            "    br ne %b, 0 ? while_body_3 : while_end_4",
+            "  while_body_3:",
+            "    %t3 = sub %a, 1",
+            "    %a = mov %t3",
+            "    jmp while_cond_2",
+            "  while_end_4:",
+            "    %t5 = neg %a",
+            "    br ne %t5, 0 ? or_true_7 : or_right_6",
+            "  or_right_6:",
+            "    %t4 = ne %b, 0",
+            "    jmp or_end_8",
+            "  or_true_7:",
+            "    %t4 = mov 1",
+            "    jmp or_end_8",
+            "  or_end_8:",
+            "    ret %t4",
+            "",
+            "call f(8)",
+            "",
+        ]))
+
+    def test_conditions_are_lowered_to_branches(self):
+        terms = 3000
+        text = "def f(a):\n" \
+               f"    if {' or '.join(f'a == {i}' for i in range(terms))}:\n" \
+               "        b = 1\n" \
+               "    else:\n" \
+               "        b = 0\n" \
+               "    return b\n" \
+               "\n" \
+               "f(1)\n"
+        function = lower(text).functions[0]
+        branches = [instruction for instruction in function.instructions() if instruction.op == "br"]
+        self.assertEqual(len(branches), terms)
+        self.assertTrue(all(branch.cond == "eq" for branch in branches))
+        self.assertFalse(any(instruction.op == "eq" for instruction in function.instructions()))
+
+    def test_unknown_variable(self):
+        with self.assertRaises(NoSuchVariableException):
+            lower("def f():\n    return a\n\nf()\n")
+
+
+class TestPassManager(TestCase):
+
+    def test_broken_pass_is_reported(self):
+        class DropTerminators(Pass):
+            name = "drop-terminators"
+
+            def run(self, function: Function) -> int:
+                for block in function.blocks:
+                    block.instructions.pop()
+                return len(function.blocks)
+
+        module = lower("def f():\n    return 1\n\nf()\n")
+        with self.assertRaisesRegex(InvalidIRException, "after drop-terminators"):
+            PassManager([DropTerminators()]).run(module)
+
+    def test_unknown_target(self):
+        function = Function("f", [])
+        function.blocks.append(function.new_block("entry"))
+        function.blocks[0].instructions.append(Instruction(JMP, targets=["nowhere"]))
+        with self.assertRaises(InvalidIRException):
+            verify_function(function)
+        function.blocks[0].instructions[0] = Instruction(RET, args=[Const(0)])
+        verify_function(function)
+
+
+class TestConstantFolding(TestCase):
+
+    def fold(self, text: str, bits: int = 32):
+        module = lower(text)
+        stats = PassManager([ConstantFolding(bits)]).run(module)
+        return module, stats["constant-folding"]
+
+    def test_division_truncates_towards_zero(self):
+        module, removed = self.fold("def f():\n    return (-7 / 2) * 100 + -7 % 2 * 10 + 7 % -2\n\nf()\n")
+        self.assertEqual(repr(module.functions[0]), "function f():\n  entry_1:\n    ret -309")
+        self.assertEqual(removed, 10)
+
+    def test_overflow_wraps_to_word(self):
+        text = "def f():\n    a = 2147483647\n    return a + 1\n\nf()\n"
+        self.assertEqual(repr(self.fold(text, 32)[0].functions[0].blocks[0]), "  entry_1:\n    ret -2147483648")
+        self.assertEqual(repr(self.fold(text, 64)[0].functions[0].blocks[0]), "  entry_1:\n    ret 2147483648")
+
+    def test_or_and_branches(self):
+        module, _ = self.fold("def f(a):\n    if 0 or 2 > 1:\n        a = 3\n    else:\n        a = 4\n"
+                              "    return a\n\nf(1)\n")
+        self.assertEqual(repr(module.functions[0]), "function f(a):\n  entry_1:\n    ret 3")
+
+    def test_division_by_zero_is_left_for_runtime(self):
+        module, _ = self.fold("def f():\n    return 1 / 0\n\nf()\n")
+        self.assertEqual([instruction.op for instruction in module.functions[0].instructions()], ["div", "ret"])
+
+    def test_variables_changed_in_loop_are_not_propagated(self):
+        module, _ = self.fold("def f(n):\n    i = 0\n    while i < n:\n        i = i + 1\n    return i\n\nf(3)\n")
+        self.assertIn("br lt %i, %n", repr(module))
+        self.assertIn("%t3 = add %i, 1", repr(module))
+
+
+class TestStrengthReduction(TestCase):
+
+    @staticmethod
+    def compute(op: str, value: int, divisor: int, bits: int) -> Const:
+        """
+        Reduces op of parameter and divisor, then replaces parameter with value and folds the function
+        """
+        function = Function("f", ["x"])
+        block = function.new_block("entry")
+        function.blocks.append(block)
+        param, dest = function.new_vreg("x"), function.new_vreg()
+        block.instructions = [Instruction(PARAM, param, [Const(0)]), Instruction(op, dest, [param, Const(divisor)]),
+                              Instruction(RET, args=[dest])]
+        StrengthReduction(bits).run(function)
+        block.instructions[0] = Instruction(MOV, param, [Const(value)])
+        ConstantFolding(bits).run(function)
+        return function.blocks[0].instructions[-1].args[0]
+
+    def test_reduced_operations_match_folded_ones(self):
+        for bits in (32, 64):
+            low, high = -2 ** (bits - 1), 2 ** (bits - 1) - 1
+            values = [0, 1, -1, 6, -6, 7, -7, 100, -100, 12345, -12345, low, low + 1, high, high - 1]
+            for op in (MUL, DIV, MOD):
+                for divisor in (1, 2, 3, 7, 8, 10, 641, 2 ** 20, high, -1, -2, -7, -8, -10, low):
+                    for value in values:
+                        if op != MUL and value == low and divisor == -1:
+                            continue
+                        with self.subTest(bits=bits, op=op, value=value, divisor=divisor):
+                            self.assertEqual(self.compute(op, value, divisor, bits),
+                                             Const(evaluate(op, [value, divisor], bits)))
+
+    def test_division_by_constant_is_replaced(self):
+        function = lower("def f(x):\n    return x / 7 + x % 8 + x * 4 + x * 9\n\nf(1)\n").functions[0]
+        self.assertEqual(StrengthReduction(32).run(function), 3)
+        ops = [instruction.op for instruction in function.instructions()]
+        self.assertNotIn(DIV, ops)
+        self.assertNotIn(MOD, ops)
+        # multiplication by 9 is emitted as lea
+        self.assertEqual(ops.count(MUL), 1)
+
+
+class TestReachability(TestCase):
+
+    def prune(self, text: str, whole_program: bool = True):
+        reachability = Reachability(32, whole_program)
+        module = Lowering(reachability.run(Parser(Lexer(text).iter_tokens()).parse())).lower()
+        return module, reachability.stats
+
+    def test_functions_not_called_from_top_level_are_removed(self):
+        text = "def a():\n    return b()\n\ndef b():\n    return 1\n\ndef c():\n    return a()\n\na()\n"
+        module, stats = self.prune(text)
+        self.assertEqual([function.name for function in module.functions], ["a", "b"])
+        self.assertEqual(stats["functions"], 1)
+        module, stats = self.prune(text, whole_program=False)
+        self.assertEqual(len(module.functions), 3)
+
+    def test_unreachable_statements_and_constant_branches(self):
+        text = "def f(x):\n" \
+               "    while x < 10:\n" \
+               "        if x > 5:\n" \
+               "            break\n" \
+               "        else:\n" \
+               "            continue\n" \
+               "        x = 1\n" \
+               "    if 0 or 2 > 1:\n" \
+               "        x = 2\n" \
+               "    else:\n" \
+               "        x = 3\n" \
+               "    while 0:\n" \
+               "        x = 4\n" \
+               "    return x\n" \
+               "    x = 5\n" \
+               "\n" \
+               "f(1)\n"
+        module, stats = self.prune(text)
+        self.assertEqual(stats, {"functions": 0, "statements": 2, "branches": 2})
+        self.assertEqual([str(instruction.args[0]) for instruction in module.functions[0].instructions()
+                          if instruction.op == MOV], ["2"])
+
+
+class TestLoopUnrolling(TestCase):
+
+    def unroll(self, text: str, factor: int = 4):
+        unrolling = LoopUnrolling(32, factor)
+        module = Lowering(unrolling.run(Parser(Lexer(text).iter_tokens()).parse())).lower()
+        return module, unrolling.stats
+
+    def test_counted_loops(self):
+        text = "def f(n):\n" \
+               "    s = 0\n" \
+               "    i = 0\n" \
+               "    while i < n:\n" \
+               "        s = s + i * 7\n" \
+               "        i += 1\n" \
+               "    j = 1\n" \
+               "    while j <= 3:\n" \
+               "        s = s + j * 5\n" \
+               "        j = j + 1\n" \
+               "    return s\n" \
+               "\n" \
+               "f(10)\n"
+        module, stats = self.unroll(text)
+        self.assertEqual(stats, {"unrolled": 1, "fully unrolled": 1})
+        function = module.functions[0]
+        # guard of unrolled loop keeps n - 3 from overflow, then 4 copies of body, remainder loop and 3 copies
+        self.assertEqual(repr(function.blocks[0].terminator), "br ge %n, -2147483645 ? if_then_2 : if_else_3")
+        self.assertEqual(sum(instruction.op == MUL and instruction.args[1] == Const(7)
+                             for instruction in function.instructions()), 5)
+        self.assertEqual(sum(instruction.op == MUL and instruction.args[1] == Const(5)
+                             for instruction in function.instructions()), 3)
+        _, stats = self.unroll(text, factor=1)
+        self.assertEqual(stats, {"unrolled": 0, "fully unrolled": 0})
+
+    def test_loops_which_are_not_counted(self):
+        text = "def f(n, m):\n" \
+               "    i = 0\n" \
+               "    while i < n:\n" \
+               "        if i > m:\n" \
+               "            break\n" \
+               "        else:\n" \
+               "            i = i + 1\n" \
+               "    while i < n:\n" \
+               "        n = n - 1\n" \
+               "        i = i + 1\n" \
+               "    while i < m:\n" \
+               "        i = i * 2\n" \
+               "    while i > m:\n" \
+               "        i = i + 1\n" \
+               "    while i < m:\n" \
+               "        if i > n:\n" \
+               "            i = i + 1\n" \
+               "        else:\n" \
+               "            i = i + 2\n" \
+               "    return i\n" \
+               "\n" \
+               "f(10, 5)\n"
+        _, stats = self.unroll(text)
+        self.assertEqual(stats, {"unrolled": 0, "fully unrolled": 0})
+
+
+class TestInlining(TestCase):
+
+    def inline(self, text: str, threshold: int = 24):
+        module = lower(text)
+        stats = PassManager([Inlining(threshold), ConstantFolding(32)]).run(module)
+        return module, stats
+
+    def test_return_in_loop_jumps_to_continuation(self):
+        text = "def first_divisor(n):\n" \
+               "    d = 2\n" \
+               "    while d < n:\n" \
+               "        if n % d == 0:\n" \
+               "            return d\n" \
+               "        else:\n" \
+               "            d = d + 1\n" \
+               "    return n\n" \
+               "\n" \
+               "def main():\n" \
+               "    a = first_divisor(91)\n" \
+               "    return a * 10\n" \
+               "\n" \
+               "main()\n"
+        module, stats = self.inline(text)
+        self.assertEqual(stats["inlining"], 1)
+        self.assertEqual(stats["inlining first_divisor"], 1)
+        # the loop is left as it is, but the continuation of main gets the returned value
+        main = module.functions[1]
+        self.assertNotIn(CALL, [instruction.op for instruction in main.instructions()])
+        self.assertEqual(sum(instruction.op == RET for instruction in main.instructions()), 1)
+
+    def test_constant_arguments_are_folded(self):
+        text = "def square(a):\n    return a * a\n\ndef main():\n    b = square(7)\n    return b + 1\n\nmain()\n"
+        module, _ = self.inline(text)
+        self.assertEqual(repr(module.functions[1]), "function main():\n  entry_1:\n    ret 50")
+
+    def test_recursive_and_large_functions_are_not_inlined(self):
+        text = "def odd(n):\n    if n == 0:\n        return 0\n" \
+               "    else:\n        m = n - 1\n        return even(m)\n\n" \
+               "def even(n):\n    if n == 0:\n        return 1\n" \
+               "    else:\n        m = n - 1\n        return odd(m)\n\n" \
+               "def twice(n):\n    return n * 2\n\n" \
+               "def main():\n    a = even(4)\n    b = twice(a)\n    return b\n\nmain()\n"
+        _, stats = self.inline(text)
+        self.assertEqual(stats["inlining"], 1)
+        self.assertEqual(stats["inlining twice"], 1)
+        _, stats = self.inline(text, threshold=0)
+        self.assertEqual(stats["inlining"], 0)
+
+    def test_call_chain_grows_linearly(self):
+        def chain_size(depth: int) -> int:
+            # each function calls the previous one twice
+            names = ["chain_" + chr(ord("a") + i) for i in range(depth)]
+            text = f"def {names[0]}(n):\n    return n + 1\n\n"
+            for previous, name in zip(names, names[1:]):
+                text += f"def {name}(n):\n    a = {previous}(n)\n    b = {previous}(a)\n    return b\n\n"
+            text += f"def main():\n    a = {names[-1]}(1)\n    return a\n\nmain()\n"
+            module, _ = self.inline(text)
+            return sum(len(list(function.instructions())) for function in module.functions)
+
+        sizes = [chain_size(depth) for depth in range(4, 9)]
+        steps = {second - first for first, second in zip(sizes, sizes[1:])}
+        self.assertEqual(len(steps), 1, sizes)
+
+
+class TestTailCallElimination(TestCase):
+
+    def test_self_call_in_return_becomes_jump(self):
+        text = "def gcd(a, b):\n" \
+               "    if b == 0:\n" \
+               "        return a\n" \
+               "    else:\n" \
+               "        c = a % b\n" \
+               "        return gcd(b, c)\n" \
+               "\n" \
+               "gcd(4, 6)\n"
+        module = lower(text)
+        stats = PassManager([TailCallElimination()]).run(module)
+        self.assertEqual(stats["tail-call-elimination"], 1)
+        self.assertEqual(repr(module.functions[0]), "\n".join([
+            "function gcd(a, b):",
+            "  entry_1:",
+            "    %a = param 0",
+            "    %b = param 1",
+            "    jmp body_5",
+            "  body_5:",
+            "    br eq %b, 0 ? if_then_2 : if_else_3",
+            "  if_then_2:",
+            "    ret %a",
+            "  if_else_3:",
+            "    %t3 = mod %a, %b",
+            "    %c = mov %t3",
+            "    %t6 = mov %b",
+            "    %t7 = mov %c",
+            "    %a = mov %t6",
+            "    %b = mov %t7",
+            "    jmp body_5",
+            "  if_end_4:",
+            "    ret 0",
+        ]))
+
+    def test_call_whose_result_is_changed_is_kept(self):
+        text = "def f(n):\n    if n == 0:\n        return 0\n    else:\n        m = n - 1\n" \
+               "        r = f(m)\n        return r + 1\n\nf(3)\n"
+        module = lower(text)
+        self.assertEqual(PassManager([TailCallElimination()]).run(module)["tail-call-elimination"], 0)
+
+
+class TestLoopInvariantCodeMotion(TestCase):
+
+    def hoist(self, text: str):
+        module = lower(text)
+        stats = PassManager([LoopInvariantCodeMotion()]).run(module)
+        return module.functions[0], stats["loop-invariant-code-motion"]
+
+    def test_invariants_of_nested_loops_are_hoisted_before_outer_loop(self):
+        text = "def f(n, k):\n" \
+               "    s = 0\n" \
+               "    i = 0\n" \
+               "    while i < n - 1:\n" \
+               "        j = 0\n" \
+               "        while j < k * 3:\n" \
+               "            s = s + n * k + j\n" \
+               "            j = j + 1\n" \
+               "        i = i + 1\n" \
+               "    return s\n" \
+               "\n" \
+               "f(100, 7)\n"
+        function, hoisted = self.hoist(text)
+        self.assertEqual(hoisted, 3)
+        self.assertEqual(repr(function.blocks[0]).splitlines()[-4:],
+                         ["    %t5 = sub %n, 1", "    %t7 = mul %k, 3", "    %t8 = mul %n, %k", "    jmp while_cond_2"])
+
+    def test_variables_live_after_loop_and_division_are_not_hoisted(self):
+        text = "def f(n, a):\n" \
+               "    i = 0\n" \
+               "    x = 0\n" \
+               "    while i < n:\n" \
+               "        x = a + 1\n" \
+               "        y = 100 / a\n" \
+               "        i = i + y\n" \
+               "    return x\n" \
+               "\n" \
+               "f(3, 5)\n"
+        function, hoisted = self.hoist(text)
+        # only a + 1, x is returned, so it is assigned only if the loop runs
+        self.assertEqual(hoisted, 1)
+        self.assertIn("%x = mov", repr(function.block_map()["while_body_3"]))
+        self.assertIn("div 100, %a", repr(function.block_map()["while_body_3"]))
+
+
+class TestLoopRotation(TestCase):
+
+    def test_test_is_copied_to_the_end_of_iteration(self):
+        text = "def f(n):\n" \
+               "    i = 0\n" \
+               "    while i < n:\n" \
+               "        if i > 5:\n" \
+               "            i = i + 2\n" \
+               "            continue\n" \
+               "        else:\n" \
+               "            i = i + 1\n" \
+               "    return i\n" \
+               "\n" \
+               "f(10)\n"
+        module = lower(text)
+        self.assertEqual(PassManager([LoopRotation()]).run(module)["loop-rotation"], 1)
+        blocks = module.functions[0].block_map()
+        # guard is left before the first iteration, continue and the end of body branch back to the body
+        self.assertEqual(repr(blocks["while_cond_2"].terminator), "br lt %i, %n ? while_body_3 : while_end_4")
+        branches = [block.label for block in blocks.values()
+                    if repr(block.terminator) == "br lt %i, %n ? while_body_3 : while_end_4"]
+        self.assertEqual(branches, ["while_cond_2", "if_then_5", "if_end_7"])
+
+
+class TestIfConversion(TestCase):
+
+    def test_assignments_of_both_branches_become_select(self):
+        text = "def f(a, b):\n" \
+               "    if a < b:\n" \
+               "        c = a * 2\n" \
+               "    else:\n" \
+               "        c = b - 1\n" \
+               "    if c == 4:\n" \
+               "        d = 0\n" \
+               "    else:\n" \
+               "        d = 1\n" \
+               "    if b != 0:\n" \
+               "        e = a / b\n" \
+               "    else:\n" \
+               "        e = 0\n" \
+               "    return c + d + e\n" \
+               "\n" \
+               "f(1, 2)\n"
+        module = lower(text)
+        self.assertEqual(PassManager([IfConversion()]).run(module)["if-conversion"], 2)
+        instructions = list(map(repr, module.functions[0].instructions()))
+        self.assertEqual(instructions[2:7], [
+            "%t3 = mul %a, 2",
+            "%t5 = sub %b, 1",
+            "%c = select lt %a, %b ? %t3 : %t5",
+            "%d = ne %c, 4",
+            "br ne %b, 0 ? if_then_8 : if_else_9",
+        ])
+        # division may trap if it is computed on the other path
+        self.assertIn("%t7 = div %a, %b", instructions)
+
+
+class TestLinearScan(TestCase):
+
+    def test_live_registers_are_not_shared(self):
+        names = [f"v{chr(ord('a') + i)}" for i in range(6)]
+        text = "def f(x):\n" + "".join(f"    {name} = x * {i + 2}\n" for i, name in enumerate(names)) + \
+               f"    return {' + '.join(names)}\n\nf(1)\n"
+        function = lower(text).functions[0]
+        allocator = LinearScan(("ebx", "esi", "edi"))
+        registers = allocator.allocate(function)
+        intervals = live_intervals(function)
+        self.assertEqual(allocator.spilled, len(intervals) - len(registers))
+        self.assertGreater(allocator.spilled, 0)
+        for first in intervals:
+            for second in intervals:
+                if first is not second and first.vreg in registers and second.vreg in registers and \
+                        first.start <= second.end and second.start <= first.end:
+                    self.assertNotEqual(registers[first.vreg], registers[second.vreg])
+
+    def test_loop_variables_live_through_the_loop(self):
+        function = lower("def f(n):\n    i = 0\n    s = 0\n    while i < n:\n        s = s + i\n"
+                         "        i = i + 1\n    return s\n\nf(3)\n").functions[0]
+        intervals = {interval.vreg.name: interval for interval in live_intervals(function)}
+        loop_end = 2 * sum(len(block.instructions) for block in function.blocks[:-1]) - 1
+        for name in ("n", "i", "s"):
+            self.assertGreaterEqual(intervals[name].end, loop_end)
@@ -0,0 +1,54 @@
+import os
+from glob import glob
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from lexer.lexer import Lexer
+from lexer.source import load_source, open_source
+
+
+def dump_tokens(text: str, engine: str):
+    return [(token.value, token.tok_type, token.pos) for token in Lexer(text, engine=engine).get_tokens()]
+
+
+class TestLexerEngines(TestCase):
+
+    def test_engines_produce_same_tokens(self):
+        for path in sorted(glob("tests/src/*.py")) + ["src.py"]:
+            text = load_source(path, use_mmap=False)
+            with self.subTest(path=path):
+                self.assertEqual(dump_tokens(text, "table"), dump_tokens(text, "char"))
+
+    def test_memory_mapped_source_produces_same_tokens(self):
+        with TemporaryDirectory() as temp_dir:
+            # positions in rows with multibyte chars are counted in chars
+            non_ascii_path = os.path.join(temp_dir, "non_ascii.py")
+            with open(non_ascii_path, "w", encoding="utf-8") as f:
+                f.write("def main():\n    # ünïcode\n    a = \"héllo\" + \"wörld\"  # ü\n"
+                        "    return a\n\nmain()\n")
+            for path in sorted(glob("tests/src/*.py")) + ["src.py", non_ascii_path]:
+                with self.subTest(path=path), open_source(path) as source:
+                    text = load_source(path, use_mmap=False)
+                    self.assertEqual(dump_tokens(source, "table"), dump_tokens(text, "char"))
+                    self.assertEqual([(token.value, token.tok_type, token.pos)
+                                      for token in Lexer(source).get_token_table()], dump_tokens(text, "char"))
+                # mapping is closed on exit
+                self.assertTrue(source.closed)
+
+    def test_crlf_newlines(self):
+        text = "def main():\n    a = 4\n    return a\n\nmain()\n"
+        self.assertEqual(dump_tokens(text.replace("\n", "\r\n"), "table"), dump_tokens(text, "table"))
+
+    def test_engines_produce_same_tokens_on_odd_spacing(self):
+        text = "def f(a,b):\n      y = a>=b\r\n\n   # c\n      z +=   3     * 0b101 # c\n      return 0x1f or y"
+        self.assertEqual(dump_tokens(text, "table"), dump_tokens(text, "char"))
+
+    def test_token_table_produces_same_tokens(self):
+        for path in sorted(glob("tests/src/*.py")) + ["src.py"]:
+            source = load_source(path)
+            with self.subTest(path=path):
+                table = Lexer(source).get_token_table()
+                self.assertEqual(
+                    [(token.value, token.tok_type, token.pos) for token in table],
+                    dump_tokens(source, "table"),
+                )
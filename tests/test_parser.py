@@ -0,0 +1,155 @@
+from glob import glob
+from unittest import TestCase
+
+from benchmarks.sources import generate_expressions_source
+from exceptions.my_exceptions import InvalidSyntaxException, UnrecognizedTokenException
+from lexer.lexer import Lexer
+from lexer.source import load_source
+from lexer.my_token import Token
+from my_parser.AST import AST, AssignExpAST, BinOpAST, IdAST, UnOpAST, iter_statements
+from my_parser.ast_arena import ASTArena
+from my_parser.my_parser import Parser
+from my_parser.parallel_parser import ParallelParser
+
+
+def dump_ast(node):
+    """
+    Returns nested tuples/lists describing the tree, used to compare trees built in different ways
+    """
+    if isinstance(node, Token):
+        return node.tok_type, node.value, node.pos
+    if isinstance(node, AST):
+        return type(node).__name__, tuple((name, dump_ast(getattr(node, name))) for name in node.fields())
+    if isinstance(node, list):
+        return [dump_ast(item) for item in node]
+    return node
+
+
+class TestParserTokenStream(TestCase):
+
+    def test_lazy_tokens_build_same_ast(self):
+        for path in sorted(glob("tests/src/*.py")) + ["src.py"]:
+            text = load_source(path, use_mmap=False)
+            with self.subTest(path=path):
+                from_list = Parser(Lexer(text).get_tokens()).parse()
+                from_generator = Parser(Lexer(text).iter_tokens()).parse()
+                self.assertEqual(dump_ast(from_list), dump_ast(from_generator))
+
+    def test_lookahead_stays_small(self):
+        text = "def f(a):\n    x = a\n    while x < 10:\n        x += 1\n    return x\n\n" * 200 + "f(1)\n"
+        parser = Parser(Lexer(text).iter_tokens())
+        max_lookahead = 0
+        set_next_token = parser._set_next_token
+
+        def tracking_set_next_token():
+            nonlocal max_lookahead
+            max_lookahead = max(max_lookahead, len(parser.tokens._lookahead))
+            set_next_token()
+
+        parser._set_next_token = tracking_set_next_token
+        parser.parse()
+        self.assertLess(max_lookahead, 8)
+
+
+class TestParserBlocks(TestCase):
+
+    def test_several_blocks_closed_at_once(self):
+        text = "def f(a):\n    while a:\n        if a:\n            a = 0\n        else:\n" \
+               "            a = 1\n\n    # comment\n    return a\n\nf(1)"
+        program = Parser(Lexer(text).iter_tokens()).parse()
+        function, call = program.hl_statements
+        while_statement, return_statement = function.statement_list.children
+        self.assertEqual(len(while_statement.while_body.children), 1)
+        self.assertEqual(call.func_id.value, "f")
+
+    def test_unindent_should_match_outer_level(self):
+        text = "def f(a):\n    a = 1\n  return a\n\nf(1)\n"
+        with self.assertRaises(InvalidSyntaxException):
+            Parser(Lexer(text).iter_tokens()).parse()
+
+
+class TestIterStatements(TestCase):
+
+    def test_statements_in_order_of_text(self):
+        text = "def f(a):\n    b = a\n    if b > 1:\n        c = -b\n" \
+               "    else:\n        while b:\n            d = b + 1\n" \
+               "    return c\n\nf(1)\n"
+        function = Parser(Lexer(text).iter_tokens()).parse().hl_statements[0]
+        assigned = [node.var_id.value for node in iter_statements(function) if isinstance(node, AssignExpAST)]
+        self.assertEqual(assigned, ["b", "c", "d"])
+        self.assertNotIn(UnOpAST, map(type, iter_statements(function)))
+        nodes = list(map(type, iter_statements(function, with_expressions=True)))
+        self.assertEqual(nodes.count(IdAST), 6)
+        self.assertIn(UnOpAST, nodes)
+
+
+class TestParserDeepExpressions(TestCase):
+
+    def test_nesting_deeper_than_recursion_limit(self):
+        depth = 20000
+        text = f"def f(a):\n    return {'(a - ' * depth}1{')' * depth}\n\nf(1)\n"
+        program = Parser(Lexer(text).iter_tokens()).parse()
+        node = program.hl_statements[0].statement_list.children[0].exp
+        nesting = 0
+        while isinstance(node, BinOpAST):
+            nesting += 1
+            node = node.right
+        self.assertEqual(nesting, depth)
+        self.assertEqual(node.token.value, "1")
+
+
+class TestASTArena(TestCase):
+
+    def test_arena_views_build_same_ast(self):
+        for path in sorted(glob("tests/src/*.py")) + ["src.py"]:
+            text = load_source(path, use_mmap=False)
+            with self.subTest(path=path):
+                tree = Parser(Lexer(text).iter_tokens()).parse()
+                from_parser = Parser(Lexer(text).iter_tokens(), arena=ASTArena()).parse()
+                arena, root = ASTArena.from_tree(tree)
+                self.assertEqual(dump_ast(tree), dump_ast(from_parser))
+                self.assertEqual(dump_ast(tree), dump_ast(arena.view(root)))
+
+    def test_views_are_node_instances(self):
+        text = "def f(a):\n    a += 2\n    return -a\n\nf(1)\n"
+        program = Parser(Lexer(text).iter_tokens(), arena=ASTArena()).parse()
+        function, call = program.hl_statements
+        assign, return_statement = function.statement_list.children
+        self.assertIsInstance(assign.exp, BinOpAST)
+        self.assertEqual(type(assign.exp).__name__, "BinOpAST")
+        self.assertEqual(assign.exp.left.var_id, "a")
+        self.assertIsNone(assign.exp.op.pos)
+        self.assertEqual(assign.exp.right.value, "2")
+        self.assertEqual([arg.value for arg in call.args], ["1"])
+
+
+class TestParallelParser(TestCase):
+
+    def _parse(self, text, lexer_engine: str = "table"):
+        parser = ParallelParser(text, workers=2, lexer_engine=lexer_engine)
+        # small test sources are parsed in the process pool as well
+        parser.MIN_PARALLEL_SIZE = 0
+        return parser.parse()
+
+    def test_parallel_parser_builds_same_ast(self):
+        texts = [load_source(path, use_mmap=False) for path in sorted(glob("tests/src/*.py")) + ["src.py"]]
+        texts.append(generate_expressions_source(20, 5, 8))
+        for text in texts:
+            with self.subTest(text=text[:20]):
+                self.assertEqual(dump_ast(self._parse(text)), dump_ast(Parser(Lexer(text).iter_tokens()).parse()))
+
+    def test_rows_of_later_functions(self):
+        # 8 rows in each copy, error is in the last one
+        text = "def f(a):\n    return a\n\n\ndef g(a):\n    return a\n\nf(1)\n" * 9 \
+            + "def f(a):\n    return a\n\n\ndef g(a):\n    return a a\n\nf(1)\n"
+        with self.assertRaisesRegex(InvalidSyntaxException, "row=78"):
+            self._parse(text)
+
+    def test_rows_of_lexer_errors_in_later_functions(self):
+        text = "def f(a):\n    return a\n\n\ndef g(a):\n    return a\n\nf(1)\n" * 9
+        for engine in Lexer.ENGINES:
+            with self.subTest(engine=engine):
+                with self.assertRaisesRegex(UnrecognizedTokenException, "row=74"):
+                    self._parse(text + "def h(a):\n    b = a $ 1\n    return b\n", engine)
+                with self.assertRaisesRegex(InvalidSyntaxException, "row=76"):
+                    self._parse(text + "def h(a):\n    if a:\n        b = a\n      return b\n", engine)
@@ -0,0 +1,62 @@
+from unittest import TestCase
+
+from code_generator.code_generator import CodeGenerator
+from code_generator.peephole import Peephole
+
+
+class TestPeephole(TestCase):
+
+    def test_push_pop(self):
+        peephole = Peephole()
+        self.assertEqual(peephole.run(["push eax", "pop eax", "push eax", "pop ebx", "add eax, ebx"]),
+                         ["mov ebx, eax", "add eax, ebx"])
+        self.assertEqual(peephole.hits["push-pop"], 2)
+
+    def test_mov_push_only_if_register_is_overwritten(self):
+        peephole = Peephole()
+        self.assertEqual(peephole.run(["mov rax, [rbp - 8]", "push rax", "mov rax, 5"]),
+                         ["push QWORD PTR [rbp - 8]", "mov rax, 5"])
+        code = ["mov eax, 5", "push eax", "add eax, 1"]
+        self.assertEqual(peephole.run(code), code)
+        self.assertEqual(peephole.hits["mov-push"], 1)
+
+    def test_mov_push_keeps_saved_register_over_call(self):
+        code = ["mov rbx, [rbp + 16]", "push rbx", "call _func_f", "push rbx", "call _func_g"]
+        self.assertEqual(Peephole().run(code), code)
+        self.assertEqual(Peephole().run(["mov eax, [ebp + 8]", "push eax", "call _func_f"]),
+                         ["push DWORD PTR [ebp + 8]", "call _func_f"])
+
+    def test_rewrites_are_matched_again(self):
+        code = ["mov eax, 1", "jmp _l_end", "mov eax, 2", "jmp _l_end", "_l_end:"]
+        self.assertEqual(Peephole().run(code), ["mov eax, 1", "_l_end:"])
+
+    def test_compare_branch(self):
+        code = ["xor eax, eax", "cmp ecx, ebx", "setl al", "cmp eax, 0", "je _f_end_cycle_1"]
+        self.assertEqual(Peephole().run(code), ["cmp ecx, ebx", "jge _f_end_cycle_1"])
+
+    def test_compare_select_and_set(self):
+        code = ["xor rax, rax", "cmp rcx, rbx", "setl al", "cmp rax, 0", "pop rax", "pop rcx", "cmovne rax, rcx"]
+        self.assertEqual(Peephole().run(code), ["cmp rcx, rbx", "pop rax", "pop rcx", "cmovl rax, rcx"])
+        code = ["xor eax, eax", "cmp ecx, ebx", "setg al", "cmp eax, 0", "mov eax, 0", "sete al"]
+        self.assertEqual(Peephole().run(code), ["xor eax, eax", "cmp ecx, ebx", "setle al"])
+
+    def test_enabled_rules(self):
+        peephole = Peephole(["jmp-next"])
+        code = ["push eax", "pop eax", "jmp _l", "_l:"]
+        self.assertEqual(peephole.run(code), ["push eax", "pop eax", "_l:"])
+        self.assertEqual(peephole.hits, {"jmp-next": 1})
+
+
+class TestAlignLabels(TestCase):
+
+    def test_function_entries_and_loop_heads_are_aligned(self):
+        code_generator = CodeGenerator()
+        code_generator.generated_code = [
+            "jmp _func_f_end", "_func_f:", "jmp _func_f_pre_end", "_func_f_body_cycle_1:", "dec eax",
+            "jne _func_f_body_cycle_1", "_func_f_pre_end:", "ret", "_func_f_end:",
+        ]
+        code_generator.align_labels(4)
+        self.assertEqual(code_generator.generated_code, [
+            "jmp _func_f_end", ".p2align 4", "_func_f:", "jmp _func_f_pre_end", ".p2align 4", "_func_f_body_cycle_1:",
+            "dec eax", "jne _func_f_body_cycle_1", "_func_f_pre_end:", "ret", "_func_f_end:",
+        ])